@@ -0,0 +1,133 @@
+"""
+Benchmark do tempo de inicialização (cold start) do CLI
+
+Executa `python -X importtime` em processos novos para cada módulo de entrada
+e mede também o tempo total de `python main.py --help`. Útil para garantir que
+dependências pesadas (selenium, smtplib, backends opcionais) só são carregadas
+pelos subcomandos que precisam delas.
+
+Uso:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --repeticoes 10 --top 15
+    python -m benchmarks.import_time --modulos main,services.browser_service
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List
+
+from benchmarks.run_benchmarks import DIRETORIO_RESULTADOS, _versao_git
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Módulos que não devem ser importados no caminho padrão da reconciliação
+MODULOS_PESADOS = ("selenium", "smtplib", "email.mime", "cProfile", "httpx")
+
+
+def medir_importtime(modulo: str) -> Dict:
+    """
+    Importa o módulo em um interpretador novo com -X importtime
+
+    Returns:
+        Dicionário com o tempo acumulado (µs) do módulo, a lista de módulos
+        carregados com seus tempos e os módulos pesados encontrados
+    """
+    processo = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=RAIZ, capture_output=True, text=True, check=True,
+    )
+
+    modulos: List[Dict] = []
+    for linha in processo.stderr.splitlines():
+        if not linha.startswith("import time:") or "|" not in linha:
+            continue
+        proprio, acumulado, nome = (parte.strip() for parte in linha[len("import time:"):].split("|"))
+        if not proprio.isdigit():
+            continue  # cabeçalho
+        modulos.append({"modulo": nome, "proprio_us": int(proprio), "acumulado_us": int(acumulado)})
+
+    total = next((m["acumulado_us"] for m in reversed(modulos) if m["modulo"] == modulo), 0)
+    pesados = sorted({
+        p for p in MODULOS_PESADOS
+        if any(m["modulo"] == p or m["modulo"].startswith(p + ".") for m in modulos)
+    })
+    return {"total_us": total, "modulos": modulos, "pesados": pesados}
+
+
+def medir_inicializacao(argumentos: List[str], repeticoes: int) -> Dict:
+    """Tempo de parede de `python main.py <argumentos>` em processos novos"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "main.py", *argumentos],
+            cwd=RAIZ, capture_output=True, check=False,
+        )
+        tempos.append(time.perf_counter() - inicio)
+    return {
+        "min_s": round(min(tempos), 4),
+        "mediana_s": round(statistics.median(tempos), 4),
+        "max_s": round(max(tempos), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo de importação e inicialização do CLI")
+    parser.add_argument("--modulos", default="main",
+                        help="Módulos medidos com -X importtime, separados por vírgula")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Módulos mais lentos exibidos")
+    parser.add_argument("--saida", default=None, help="Arquivo JSON de saída")
+    args = parser.parse_args()
+
+    relatorio = {
+        "versao": _versao_git(),
+        "data": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "modulos": {},
+    }
+
+    for modulo in (m.strip() for m in args.modulos.split(",") if m.strip()):
+        # A primeira importação compila os .pyc; mede as seguintes
+        medir_importtime(modulo)
+        medicoes = [medir_importtime(modulo) for _ in range(args.repeticoes)]
+        totais = [m["total_us"] for m in medicoes]
+        ultima = medicoes[-1]
+        mais_lentos = sorted(ultima["modulos"], key=lambda m: m["proprio_us"], reverse=True)[:args.top]
+
+        relatorio["modulos"][modulo] = {
+            "mediana_ms": round(statistics.median(totais) / 1000, 2),
+            "min_ms": round(min(totais) / 1000, 2),
+            "modulos_carregados": len(ultima["modulos"]),
+            "pesados": ultima["pesados"],
+            "mais_lentos": mais_lentos,
+        }
+
+        print(f"⏱️  import {modulo}: {statistics.median(totais) / 1000:.1f}ms "
+              f"({len(ultima['modulos'])} módulos)")
+        if ultima["pesados"]:
+            print(f"   ⚠️  módulos pesados carregados: {', '.join(ultima['pesados'])}")
+        for m in mais_lentos:
+            print(f"   {m['modulo']:<50} {m['proprio_us'] / 1000:>8.2f}ms")
+
+    relatorio["main_help"] = medir_inicializacao(["--help"], args.repeticoes)
+    print(f"\n⏱️  python main.py --help: {relatorio['main_help']['mediana_s']:.3f}s (mediana)")
+
+    saida = args.saida or os.path.join(
+        DIRETORIO_RESULTADOS, f"importtime_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(saida) or ".", exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as f:
+        json.dump(relatorio, f, indent=2, ensure_ascii=False)
+
+    print(f"\n📄 Resultados salvos em: {saida}")
+
+
+if __name__ == "__main__":
+    main()
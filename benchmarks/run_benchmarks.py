@@ -0,0 +1,270 @@
+"""
+Benchmarks dos serviços de reconciliação contra o servidor stub local
+
+Mede PaymentService, WinthorService, ReconciliationService.confrontar_pagamentos
+e os geradores de relatório para cada volume e salva os tempos em JSON,
+permitindo comparar versões. Com --transportes, as buscas HTTP são medidas em
+cada transporte (requests, httpx) com os bytes trafegados; --compressao faz o
+stub responder com br/gzip.
+
+Uso:
+    python -m benchmarks.run_benchmarks                        # 1k, 100k e 1M registros
+    python -m benchmarks.run_benchmarks --tamanhos 1000,10000 --latencia 0.01
+    python -m benchmarks.run_benchmarks --tamanhos 1000000 --processos 8   # --replay em 8 processos
+    python -m benchmarks.run_benchmarks --tamanhos 100000 --transportes requests,httpx --compressao
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, Sequence
+
+from benchmarks.stub_server import ConfiguracaoStub, StubServer
+from services.notification_service import NotificationService
+from services.parallel_reconciliation import ParallelReconciliationService
+from services.payment_service import PaymentService
+from services.reconciliation_service import ReconciliationService
+from services.winthor_service import WinthorService
+from utils.circuit_breaker import FonteIndisponivelError
+from utils.http_client import definir_transporte
+from utils.metrics import metricas
+
+DIRETORIO_RESULTADOS = os.path.join(os.path.dirname(__file__), "resultados")
+
+
+def _cronometrar(func: Callable, repeticoes: int = 1) -> Dict:
+    """Executa a função N vezes e retorna o retorno da última e os tempos"""
+    tempos = []
+    retorno = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        retorno = func()
+        tempos.append(time.perf_counter() - inicio)
+    return {
+        "retorno": retorno,
+        "min_s": round(min(tempos), 6),
+        "media_s": round(sum(tempos) / len(tempos), 6),
+        "max_s": round(max(tempos), 6),
+    }
+
+
+def _cronometrar_http(nome: str, func: Callable, repeticoes: int, transporte: str, esperado: int) -> Dict:
+    """
+    Como `_cronometrar`, somando os bytes trafegados por execução (etapa própria
+    em `metricas`) e conferindo a quantidade de itens de cada repetição
+
+    Com --taxa-erro, uma busca que devolve menos itens que o stub possui não
+    pode ser comparada com as demais: o resultado sai com "completo": false,
+    as respostas de erro (503...) são contadas em "erros_http" e as buscas
+    abortadas (FonteIndisponivelError) em "falhas".
+    """
+    contagens = []
+    falhas = []
+
+    def executar():
+        try:
+            retorno = func()
+        except FonteIndisponivelError as e:
+            falhas.append(str(e))
+            retorno = []
+        contagens.append(len(retorno))
+        return retorno
+
+    with metricas.etapa(f"benchmark_{nome}"):
+        medicao = _cronometrar(executar, repeticoes)
+    trafego = metricas.consultar(f"benchmark_{nome}")
+    erros_http = sum(
+        quantidade for status, quantidade in trafego.status_http.items() if status not in ("200", "304")
+    )
+    return {
+        **medicao,
+        "transporte": transporte,
+        "bytes": trafego.bytes // repeticoes,
+        "erros_http": erros_http,
+        "falhas": len(falhas),
+        "itens": contagens[-1],
+        "esperado": esperado,
+        "completo": all(contagem == esperado for contagem in contagens),
+    }
+
+
+def executar_volume(config: ConfiguracaoStub, itens_por_pagina: int, repeticoes: int,
+                    processos: int = 0, transportes: Sequence[str] = ("requests",)) -> Dict:
+    """
+    Executa todos os benchmarks para um volume de registros
+
+    As buscas HTTP são medidas em cada transporte disponível; o primeiro fica com os nomes
+    originais (payment_service, winthor_service) e os demais recebem o nome do
+    transporte como sufixo (payment_service_httpx...).
+    """
+    resultados = {}
+    pagamentos = pedidos = None
+
+    with StubServer(config) as server:
+        payment_service = PaymentService(server.url_maxpayment, "token-benchmark")
+        winthor_service = WinthorService(server.url_winthor, "token-benchmark")
+
+        for transporte in transportes:
+            if definir_transporte(transporte) != transporte:
+                continue
+            sufixo = f"_{transporte}" if pagamentos is not None else ""
+
+            medicao = _cronometrar_http(
+                f"payment_service{sufixo}",
+                lambda: payment_service.buscar_todas_paginas(
+                    "2026-02-09T00:00:00.000Z", "2026-02-09T23:59:59.999Z", itens_por_pagina
+                ),
+                repeticoes, transporte, config.total_pagamentos
+            )
+            retorno = medicao.pop("retorno")
+            resultados[f"payment_service{sufixo}"] = medicao
+            pagamentos = pagamentos if pagamentos is not None else retorno
+
+            medicao = _cronometrar_http(
+                f"winthor_service{sufixo}", winthor_service.buscar_pedidos_importados, repeticoes, transporte,
+                len(server.dados.pedidos_winthor)
+            )
+            retorno = medicao.pop("retorno")
+            resultados[f"winthor_service{sufixo}"] = medicao
+            pedidos = pedidos if pedidos is not None else retorno
+
+        definir_transporte()
+        # Páginas como ficariam no arquivo de respostas, para medir o --replay
+        paginas = math.ceil(config.total_pagamentos / itens_por_pagina)
+        corpos = [server.dados.pagina_pagamentos(pagina, itens_por_pagina)
+                  for pagina in range(1, paginas + 1)] if processos else []
+
+    medicao = _cronometrar(
+        lambda: ReconciliationService.confrontar_pagamentos(pagamentos, pedidos), repeticoes
+    )
+    resultado = medicao.pop("retorno")
+    resultados["confrontar_pagamentos"] = {**medicao, "rejeitados": resultado.total_rejeitados}
+
+    if processos:
+        # --replay sequencial (decodifica aqui) contra o pool de processos
+        numeros = ReconciliationService.numeros_winthor(pedidos)
+        medicao = _cronometrar(
+            lambda: ReconciliationService.confrontar_com_numeros(
+                [p for corpo in corpos for p in PaymentService.extrair_pagamentos(json.loads(corpo))],
+                numeros,
+            ),
+            repeticoes
+        )
+        resultado_sequencial = medicao.pop("retorno")
+        resultados["replay_sequencial"] = {**medicao, "rejeitados": resultado_sequencial.total_rejeitados}
+        medicao = _cronometrar(
+            lambda: ParallelReconciliationService.confrontar_respostas(corpos, numeros, processos),
+            repeticoes
+        )
+        resultado_paralelo, _linhas = medicao.pop("retorno")
+        resultados["replay_processos"] = {
+            **medicao, "processos": processos, "rejeitados": resultado_paralelo.total_rejeitados,
+        }
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        arquivo_json = os.path.join(diretorio, "relatorio.json")
+        arquivo_txt = os.path.join(diretorio, "relatorio.txt")
+
+        medicao = _cronometrar(
+            lambda: NotificationService.salvar_relatorio_json(resultado, arquivo_json), repeticoes
+        )
+        medicao.pop("retorno")
+        resultados["salvar_relatorio_json"] = {**medicao, "bytes": os.path.getsize(arquivo_json)}
+
+        medicao = _cronometrar(
+            lambda: NotificationService.salvar_relatorio_texto(resultado, arquivo_txt), repeticoes
+        )
+        medicao.pop("retorno")
+        resultados["salvar_relatorio_texto"] = {**medicao, "bytes": os.path.getsize(arquivo_txt)}
+
+    return resultados
+
+
+def _versao_git() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            stderr=subprocess.DEVNULL,
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconhecida"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks da reconciliação de pagamentos")
+    parser.add_argument("--tamanhos", default="1000,100000,1000000",
+                        help="Volumes de registros separados por vírgula")
+    parser.add_argument("--itens-por-pagina", type=int, default=1000)
+    parser.add_argument("--repeticoes", type=int, default=1)
+    parser.add_argument("--latencia", type=float, default=0.0)
+    parser.add_argument("--taxa-erro", type=float, default=0.0)
+    parser.add_argument("--tamanho-extra", type=int, default=0)
+    parser.add_argument("--saida", default=None, help="Arquivo JSON de saída")
+    parser.add_argument("--rps", type=float, default=1000.0,
+                        help="Limite de requisições por segundo do cliente (RATE_LIMIT_RPS)")
+    parser.add_argument("--com-cache", action="store_true",
+                        help="Mantém o cache HTTP ativo (por padrão mede sempre a rede)")
+    parser.add_argument("--processos", type=int, default=0,
+                        help="Mede também o --replay em N processos (0 = não mede)")
+    parser.add_argument("--transportes", default="requests",
+                        help="Transportes HTTP comparados, separados por vírgula (requests,httpx)")
+    parser.add_argument("--compressao", action="store_true",
+                        help="O stub comprime as respostas (br/gzip) conforme Accept-Encoding")
+    args = parser.parse_args()
+    transportes = [t.strip() for t in args.transportes.split(",") if t.strip()]
+
+    if not args.com_cache:
+        os.environ["HTTP_CACHE"] = "0"
+    os.environ["RATE_LIMIT_RPS"] = str(args.rps)
+
+    relatorio = {
+        "versao": _versao_git(),
+        "data": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "plataforma": platform.platform(),
+        "parametros": vars(args),
+        "volumes": {},
+    }
+
+    for tamanho in (int(t) for t in args.tamanhos.split(",") if t.strip()):
+        print(f"⏱️  Benchmark com {tamanho} registros...")
+        config = ConfiguracaoStub(
+            total_pagamentos=tamanho,
+            latencia=args.latencia,
+            taxa_erro=args.taxa_erro,
+            tamanho_extra=args.tamanho_extra,
+            compressao=args.compressao,
+        )
+        resultados = executar_volume(
+            config, args.itens_por_pagina, args.repeticoes, args.processos, transportes
+        )
+        relatorio["volumes"][str(tamanho)] = resultados
+
+        for nome, dados in resultados.items():
+            trafego = ""
+            if "transporte" in dados:
+                trafego = f"   {dados['bytes'] / 1024:>10.1f} KB   {dados['erros_http']:>4} erros HTTP"
+                if not dados["completo"]:
+                    trafego += f"   ⚠️  incompleto ({dados['itens']}/{dados['esperado']} itens)"
+            print(f"   {nome:<24} {dados['media_s']:>10.4f}s{trafego}")
+
+    saida = args.saida or os.path.join(
+        DIRETORIO_RESULTADOS, f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(saida) or ".", exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as f:
+        json.dump(relatorio, f, indent=2, ensure_ascii=False)
+
+    print(f"\n📄 Resultados salvos em: {saida}")
+
+
+if __name__ == "__main__":
+    main()
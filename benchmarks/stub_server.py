@@ -0,0 +1,293 @@
+"""
+Servidor HTTP local que imita a MaxPayment e a API do Winthor para benchmarks
+
+Endpoints:
+    GET  /maxpayment/pagamentos?Pagina=1&ItensPorPagina=100  -> {"data": [...]}
+    GET  /winthor/imported                                   -> [...]
+    GET  /winthor/imported?dataImportacaoInicio=...          -> [...] (só os importados a partir da data)
+    GET  /winthor/imported/filial/{filial}                    -> [...]
+    HEAD /winthor/items/{numero}                              -> 200 / 404
+
+Uso:
+    python -m benchmarks.stub_server --pagamentos 100000 --latencia 0.02
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+try:
+    import brotli as _brotli
+except ImportError:
+    _brotli = None
+
+NUMERO_BASE = 100_000_000
+TOTAL_FILIAIS = 10
+
+
+@dataclass
+class ConfiguracaoStub:
+    """Parâmetros do servidor stub"""
+    total_pagamentos: int = 1000
+    latencia: float = 0.0          # segundos de espera por requisição
+    taxa_erro: float = 0.0         # fração de requisições respondidas com 503
+    tamanho_extra: int = 0         # bytes de preenchimento por registro (simula payloads maiores)
+    taxa_rejeicao: float = 0.02    # fração de pagamentos sem pedido no Winthor
+    esquema_auth_winthor: str = "" # se definido ("Basic"/"Bearer"), o Winthor responde 401 aos demais
+    filtro_delta: bool = True      # False = ignora dataImportacaoInicio (API sem filtro)
+    compressao: bool = False       # True = responde com br/gzip conforme Accept-Encoding
+    semente: int = 42
+
+
+class DadosStub:
+    """Gera e mantém em memória os payloads servidos pelo stub"""
+
+    def __init__(self, config: ConfiguracaoStub):
+        self.config = config
+        aleatorio = random.Random(config.semente)
+        preenchimento = "x" * config.tamanho_extra
+
+        self.pagamentos: List[Dict] = []
+        self.pedidos_winthor: List[Dict] = []
+        self.numeros_winthor = set()
+
+        for i in range(config.total_pagamentos):
+            numero = NUMERO_BASE + i
+            filial = (i % TOTAL_FILIAIS) + 1
+            pagamento = {
+                "nomeFilial": f"{filial} - Empresa {filial} Ltda",
+                "nomeCliente": f"CLIENTE {i}",
+                "pedido": {"codigoPedidoMaxima": numero},
+                "dtIncluido": f"2026-02-09T{(i // 3600) % 24:02d}:{(i // 60) % 60:02d}:{i % 60:02d}.000Z",
+                "valor": round(10 + (i % 1000) * 1.37, 2),
+                "nomeGateway": "Cartão de Crédito",
+                "statusPagamento": "Aprovado",
+            }
+            if preenchimento:
+                pagamento["observacao"] = preenchimento
+            self.pagamentos.append(pagamento)
+
+            if aleatorio.random() >= config.taxa_rejeicao:
+                pedido = {
+                    "numpedrca": str(numero),
+                    "filial": str(filial),
+                    "cliente": f"CLIENTE {i}",
+                    "dataImportacao": pagamento["dtIncluido"],
+                    "status": "IMPORTADO",
+                }
+                if preenchimento:
+                    pedido["observacao"] = preenchimento
+                self.pedidos_winthor.append(pedido)
+                self.numeros_winthor.add(str(numero))
+
+        # Payloads estáticos serializados uma única vez
+        self._imported = json.dumps(self.pedidos_winthor).encode("utf-8")
+        self._por_filial: Dict[str, bytes] = {}
+        for filial in range(1, TOTAL_FILIAIS + 1):
+            itens = [p for p in self.pedidos_winthor if p["filial"] == str(filial)]
+            self._por_filial[str(filial)] = json.dumps(itens).encode("utf-8")
+
+        self._comprimidos: Dict[Tuple[str, str], bytes] = {}
+        self._lock = threading.Lock()
+
+    def pagina_pagamentos(self, pagina: int, itens_por_pagina: int) -> bytes:
+        inicio = (pagina - 1) * itens_por_pagina
+        itens = self.pagamentos[inicio:inicio + itens_por_pagina]
+        return json.dumps({"data": itens, "total": len(self.pagamentos)}).encode("utf-8")
+
+    def imported(self, filial: Optional[str] = None, desde: Optional[str] = None) -> bytes:
+        if desde is not None and self.config.filtro_delta:
+            itens = [p for p in self.pedidos_winthor if p["dataImportacao"] >= desde]
+            return json.dumps(itens).encode("utf-8")
+        if filial is None:
+            return self._imported
+        return self._por_filial.get(filial, b"[]")
+
+
+    def comprimir(self, corpo: bytes, etag: str, aceitas: str) -> Tuple[Optional[str], bytes]:
+        """
+        Comprime o corpo no melhor formato aceito pelo cliente (br > gzip)
+
+        As versões comprimidas ficam em memória por ETag, para que o custo de
+        compressão do stub não entre na medição do cliente.
+        """
+        aceitas = {c.split(";")[0].strip() for c in aceitas.split(",")}
+        codificacao = "br" if "br" in aceitas and _brotli is not None else "gzip" if "gzip" in aceitas else None
+        if not self.config.compressao or codificacao is None:
+            return None, corpo
+
+        with self._lock:
+            comprimido = self._comprimidos.get((etag, codificacao))
+        if comprimido is None:
+            if codificacao == "br":
+                comprimido = _brotli.compress(corpo, quality=5)
+            else:
+                comprimido = gzip.compress(corpo, compresslevel=6)
+            with self._lock:
+                self._comprimidos[(etag, codificacao)] = comprimido
+        return codificacao, comprimido
+
+
+class _Handler(BaseHTTPRequestHandler):
+    dados: DadosStub = None
+    aleatorio = random.Random(7)
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _simular_rede(self) -> bool:
+        config = self.dados.config
+        if config.latencia:
+            time.sleep(config.latencia)
+        with self.lock:
+            falhou = self.aleatorio.random() < config.taxa_erro
+        if falhou:
+            self._responder(503, b'{"erro": "indisponivel"}')
+        return not falhou
+
+    def _responder(self, status: int, corpo: bytes = b"", enviar_corpo: bool = True):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        if enviar_corpo and corpo:
+            self.wfile.write(corpo)
+
+    def _responder_json(self, corpo: bytes):
+        """Responde 200 com ETag, ou 304 se o cliente já tiver a mesma versão"""
+        etag = f'"{hashlib.md5(corpo).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        codificacao, corpo = self.dados.comprimir(corpo, etag, self.headers.get("Accept-Encoding", ""))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.send_header("ETag", etag)
+        if codificacao:
+            self.send_header("Content-Encoding", codificacao)
+            self.send_header("Vary", "Accept-Encoding")
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _autorizado(self, partes: List[str]) -> bool:
+        esquema = self.dados.config.esquema_auth_winthor
+        if partes[:1] != ["winthor"] or not esquema:
+            return True
+        if self.headers.get("Authorization", "").startswith(esquema + " "):
+            return True
+        self._responder(401, b'{"erro": "nao autorizado"}', enviar_corpo=self.command != "HEAD")
+        return False
+
+    def do_GET(self):
+        if not self._simular_rede():
+            return
+
+        url = urlparse(self.path)
+        partes = [p for p in url.path.split("/") if p]
+        if not self._autorizado(partes):
+            return
+
+        if partes[:2] == ["maxpayment", "pagamentos"]:
+            params = parse_qs(url.query)
+            pagina = int(params.get("Pagina", ["1"])[0])
+            itens = int(params.get("ItensPorPagina", ["10"])[0])
+            self._responder_json(self.dados.pagina_pagamentos(pagina, itens))
+        elif partes == ["winthor", "imported"]:
+            desde = parse_qs(url.query).get("dataImportacaoInicio", [None])[0]
+            self._responder_json(self.dados.imported(desde=desde))
+        elif partes[:3] == ["winthor", "imported", "filial"] and len(partes) == 4:
+            self._responder_json(self.dados.imported(partes[3]))
+        else:
+            self._responder(404, b'{"erro": "nao encontrado"}')
+
+    def do_HEAD(self):
+        if not self._simular_rede():
+            return
+
+        partes = [p for p in urlparse(self.path).path.split("/") if p]
+        if not self._autorizado(partes):
+            return
+        if partes[:2] == ["winthor", "items"] and len(partes) == 3:
+            status = 200 if partes[2] in self.dados.numeros_winthor else 404
+            self._responder(status, enviar_corpo=False)
+        else:
+            self._responder(404, enviar_corpo=False)
+
+
+class StubServer:
+    """Servidor stub executado em uma thread de fundo"""
+
+    def __init__(self, config: ConfiguracaoStub, porta: int = 0):
+        self.dados = DadosStub(config)
+        handler = type("Handler", (_Handler,), {"dados": self.dados})
+        self._server = ThreadingHTTPServer(("127.0.0.1", porta), handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url_base(self) -> str:
+        host, porta = self._server.server_address[:2]
+        return f"http://{host}:{porta}"
+
+    @property
+    def url_maxpayment(self) -> str:
+        return f"{self.url_base}/maxpayment/pagamentos"
+
+    @property
+    def url_winthor(self) -> str:
+        return f"{self.url_base}/winthor"
+
+    def __enter__(self) -> "StubServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor stub MaxPayment/Winthor")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--pagamentos", type=int, default=1000)
+    parser.add_argument("--latencia", type=float, default=0.0)
+    parser.add_argument("--taxa-erro", type=float, default=0.0)
+    parser.add_argument("--tamanho-extra", type=int, default=0)
+    parser.add_argument("--sem-filtro-delta", action="store_true",
+                        help="Ignora o filtro dataImportacaoInicio, como APIs do Winthor sem delta")
+    parser.add_argument("--compressao", action="store_true",
+                        help="Comprime as respostas JSON (br/gzip) conforme Accept-Encoding")
+    args = parser.parse_args()
+
+    config = ConfiguracaoStub(
+        total_pagamentos=args.pagamentos,
+        latencia=args.latencia,
+        taxa_erro=args.taxa_erro,
+        tamanho_extra=args.tamanho_extra,
+        filtro_delta=not args.sem_filtro_delta,
+        compressao=args.compressao,
+    )
+    with StubServer(config, porta=args.porta) as server:
+        print(f"🧪 Stub MaxPayment: {server.url_maxpayment}")
+        print(f"🧪 Stub Winthor:    {server.url_winthor}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
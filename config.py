@@ -1,7 +1,40 @@
 import os
+from typing import Optional, Tuple
 from dotenv import load_dotenv
 
-load_dotenv()
+ENV_PATH = os.path.join(os.path.dirname(__file__), '.env')
+
+# (mtime do .env, override) da última carga; evita reler o arquivo a cada chamada
+_ultima_carga: Optional[Tuple[float, bool]] = None
+
+
+def carregar_ambiente(override: bool = False) -> None:
+    """
+    Carrega o .env do projeto uma única vez por processo
+
+    Chamadas repetidas não releem o arquivo, exceto quando ele foi alterado
+    desde a última carga (ex.: token renovado) ou quando `override` é pedido
+    pela primeira vez.
+
+    Args:
+        override: Valores do .env sobrescrevem variáveis já definidas no ambiente
+    """
+    global _ultima_carga
+    try:
+        mtime = os.path.getmtime(ENV_PATH)
+    except OSError:
+        mtime = 0.0
+
+    if _ultima_carga is not None:
+        mtime_anterior, override_anterior = _ultima_carga
+        if mtime == mtime_anterior and (override_anterior or not override):
+            return
+
+    load_dotenv(ENV_PATH, override=override)
+    _ultima_carga = (mtime, override)
+
+
+carregar_ambiente()
 
 class Config:
     URL = os.getenv("MAXIMA_URL")
@@ -9,4 +42,4 @@ class Config:
     PASS = os.getenv("SENHA_LOGIN")
     XPATH_USER = os.getenv("XPATH_USER")
     XPATH_PASS = os.getenv("XPATH_PASS")
-    ENV_PATH = os.path.join(os.path.dirname(__file__), '.env')
\ No newline at end of file
+    ENV_PATH = ENV_PATH
@@ -10,6 +10,8 @@ from services.payment_service import PaymentService
 from services.winthor_service import WinthorService
 from services.reconciliation_service import ReconciliationService
 from services.notification_service import NotificationService
+from models.resultado_confronto import ResultadoConfrontoPagamentos
+from utils.circuit_breaker import FonteIndisponivelError
 
 # Carrega variáveis de ambiente
 load_dotenv()
@@ -44,11 +46,15 @@ def main():
 
     # Busca pagamentos dos últimos 0 dias (hoje)
     print("  ▶ Consultando pagamentos na MaxPayment...")
-    pagamentos = payment_service.buscar_pagamentos_ultimos_dias(
-        dias=0,
-        itens_por_pagina=50,
-        gateways="3"  # Cartão de crédito
-    )
+    try:
+        pagamentos = payment_service.buscar_pagamentos_ultimos_dias(
+            dias=0,
+            itens_por_pagina=50,
+            gateways="3"  # Cartão de crédito
+        )
+    except FonteIndisponivelError as e:
+        print(f"❌ {e}. Abortando.")
+        return
     print(f"  ✅ {len(pagamentos)} pagamentos encontrados\n")
 
     if not pagamentos:
@@ -57,7 +63,17 @@ def main():
 
     # Busca pedidos importados no Winthor
     print("  ▶ Consultando pedidos importados no Winthor...")
-    pedidos_winthor = winthor_service.buscar_pedidos_importados()
+    try:
+        pedidos_winthor = winthor_service.buscar_pedidos_importados()
+    except FonteIndisponivelError as e:
+        # Sem o Winthor todos os pagamentos seriam falsos rejeitados: salva o relatório como incompleto
+        print(f"⚠️ {e}. Confronto abortado.")
+        resultado = ResultadoConfrontoPagamentos.incompleto(len(pagamentos), [e.fonte])
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        NotificationService.salvar_relatorio_json(
+            resultado, f"logs/relatorio_confronto_{timestamp}_incompleto.json"
+        )
+        return
     print(f"  ✅ {len(pedidos_winthor)} pedidos encontrados no Winthor\n")
 
     # ========== RECONCILIAÇÃO ==========
@@ -5,6 +5,16 @@ Entry point principal da aplicação
 Uso:
     python main.py                      # Executa reconciliação completa
     python main.py --token              # Apenas renova o token
+    python main.py --profile            # Reconciliação com perfil de desempenho
+    python main.py --arquivar           # Reconciliação arquivando as respostas brutas
+    python main.py --replay <run-id>    # Reprocessa uma execução arquivada (sem rede)
+    python main.py --tenants t.json     # Reconcilia várias empresas em paralelo
+    python main.py --replay <id> --processos 8  # Reprocessamento em 8 processos (backfills)
+    python main.py --sync-delta         # Busca no Winthor só o que mudou desde a última execução
+    python main.py --retomar            # Retoma a última execução interrompida (diário)
+    python main.py --watch              # Monitora pagamentos novos e alerta rejeições
+    python main.py --reverificar        # Reconsulta apenas a fila de rejeitados
+    python main.py --servir 8080        # API local de consulta por pedido/filial
     python main.py --help               # Mostra ajuda
 """
 
@@ -12,20 +22,28 @@ import os
 import sys
 import time
 import argparse
-from datetime import datetime
-from dotenv import load_dotenv
+from datetime import date, datetime, timedelta
+from typing import List, Optional
 
-from services.browser_service import BrowserService
+from config import carregar_ambiente
 from services.payment_service import PaymentService
 from services.winthor_service import WinthorService
 from services.reconciliation_service import ReconciliationService
 from services.notification_service import NotificationService
-from models.token_model import TokenModel
+from models.resultado_confronto import ResultadoConfrontoPagamentos
+from utils.circuit_breaker import FonteIndisponivelError
+from utils.janelas import agora_local, janelas_do_dia
 from utils.logger import log
+from utils.metrics import metricas
+from utils.progresso import progresso
 
 
 def renovar_token():
     """Renova o token de autenticação MaxPayment"""
+    # Selenium só é carregado neste subcomando (é o import mais pesado da aplicação)
+    from services.browser_service import BrowserService
+    from models.token_model import TokenModel
+
     print("\n" + "=" * 80)
     print("🔐 RENOVAÇÃO DE TOKEN")
     print("=" * 80)
@@ -56,14 +74,26 @@ def renovar_token():
         return False
 
 
-def reconciliar_pagamentos():
-    """Executa a reconciliação completa de pagamentos"""
+def reconciliar_pagamentos(
+    sync_delta: bool = False,
+    dias: int = 0,
+    retomar: Optional[str] = None,
+):
+    """
+    Executa a reconciliação completa de pagamentos
+
+    Args:
+        sync_delta: Atualiza um snapshot local dos pedidos do Winthor em vez de
+                    baixar `/imported` inteiro
+        dias: Dia reconciliado, em dias para trás (0 = hoje, 1 = ontem...)
+        retomar: Retoma a execução com este run_id ("" = a mais recente) a partir do diário
+    """
     print("\n" + "=" * 80)
     print("📊 RECONCILIAÇÃO DE PAGAMENTOS")
     print("=" * 80 + "\n")
 
-    # Recarregar variáveis de ambiente
-    load_dotenv(override=True)
+    # Recarregar variáveis de ambiente (só relê o .env se ele mudou, ex.: token renovado)
+    carregar_ambiente(override=True)
 
     # Validar configurações
     maxpayment_url = os.getenv("MAXPAYMENT_API_URL")
@@ -81,82 +111,436 @@ def reconciliar_pagamentos():
         print("\nConfigure estas variáveis no arquivo .env\n")
         return False
 
+    try:
+        diario = abrir_diario(dias, retomar)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"\n❌ {e}\n")
+        log.error(str(e))
+        return False
+    if diario is not None and diario.concluido:
+        print(f"✅ A execução {diario.run_id} já foi concluída; nada a retomar.\n")
+        diario.fechar()
+        return True
+
     try:
         # ========== 1. BUSCAR PAGAMENTOS ==========
         print("📥 Etapa 1: Buscando pagamentos na MaxPayment...")
-        payment_service = PaymentService(maxpayment_url, maxima_token)
-        pagamentos = payment_service.buscar_pagamentos_ultimos_dias(
-            dias=0,
-            itens_por_pagina=100,
-            gateways="3"  # Cartão de crédito
-        )
+        with metricas.etapa("payment_fetch") as etapa, progresso.acompanhar("payment_fetch"):
+            payment_service = PaymentService(maxpayment_url, maxima_token)
+            if diario is not None:
+                parametros = diario.parametros
+                pagamentos = payment_service.buscar_pagamentos_janelas(
+                    janelas_do_dia(date.fromisoformat(parametros["dia"]), parametros["granularidade"]),
+                    diario=diario,
+                    itens_por_pagina=parametros["itens_por_pagina"],
+                    gateways=parametros["gateways"],
+                )
+            else:
+                pagamentos = payment_service.buscar_pagamentos_ultimos_dias(
+                    dias=dias,
+                    itens_por_pagina=100,
+                    gateways="3"  # Cartão de crédito
+                )
+            etapa.adicionar_itens(len(pagamentos))
+            log.info(f"{len(pagamentos)} pagamentos encontrados")
         print(f"   ✓ {len(pagamentos)} pagamentos encontrados\n")
 
         if not pagamentos:
             print("⚠️  Nenhum pagamento encontrado para o período.\n")
+            if diario is not None:
+                diario.concluir()
             return True
 
         # ========== 2. BUSCAR PEDIDOS WINTHOR ==========
         print("📥 Etapa 2: Buscando pedidos importados no Winthor...")
-        winthor_service = WinthorService(winthor_url, winthor_token)
-        pedidos_winthor = winthor_service.buscar_pedidos_importados()
+        try:
+            with metricas.etapa("winthor_fetch") as etapa:
+                winthor_service = WinthorService(winthor_url, winthor_token)
+                if sync_delta:
+                    from services.winthor_sync_service import SincronizacaoWinthor
+                    pedidos_winthor = SincronizacaoWinthor(winthor_service).sincronizar(
+                        {p.codigo_filial for p in pagamentos}
+                    )
+                else:
+                    pedidos_winthor = winthor_service.buscar_pedidos_importados()
+                # Índice montado uma vez por snapshot e usado por todo o confronto
+                indice_winthor = ReconciliationService.numeros_winthor(pedidos_winthor)
+                etapa.adicionar_itens(len(pedidos_winthor))
+                log.info(f"{len(pedidos_winthor)} pedidos encontrados no Winthor")
+        except FonteIndisponivelError as e:
+            # Sem o Winthor todos os pagamentos seriam falsos rejeitados: aborta sem notificar
+            return registrar_confronto_incompleto(len(pagamentos), e)
         print(f"   ✓ {len(pedidos_winthor)} pedidos encontrados no Winthor\n")
 
         # ========== 3. RECONCILIAÇÃO ==========
         print("🔄 Etapa 3: Reconciliando pagamentos...")
-        resultado = ReconciliationService.confrontar_pagamentos(
-            pagamentos=pagamentos,
-            pedidos_winthor=pedidos_winthor
-        )
+        with metricas.etapa("reconcile") as etapa:
+            resultado = ReconciliationService.confrontar_pagamentos(
+                pagamentos=pagamentos,
+                pedidos_winthor=pedidos_winthor,
+                indice=indice_winthor
+            )
+            etapa.adicionar_itens(resultado.total_pagamentos)
+            log.info(resultado.resumo())
         print(f"   ✓ Reconciliação concluída\n")
+        if diario is not None:
+            diario.registrar_confronto({
+                "total_pagamentos": resultado.total_pagamentos,
+                "total_integrados": resultado.total_integrados,
+                "total_rejeitados": resultado.total_rejeitados,
+                "rejeitados": [p.numero_pedido for p in resultado.pedidos_rejeitados],
+            })
+
+        # Rejeitados saem já no alerta, marcados como pendentes até a fila confirmá-los
+        apresentar_resultado(resultado, pendente_confirmacao=True)
+        processar_fila_reverificacao(winthor_service, resultado)
+        if diario is not None:
+            diario.concluir()
+        return True
 
-        # ========== 4. EXIBIR RESULTADO ==========
-        print("=" * 80)
-        print(f"📊 RESULTADO: {resultado.resumo()}")
-        print("=" * 80 + "\n")
+    except FonteIndisponivelError as e:
+        print(f"\n❌ {e}\n")
+        log.error(str(e))
+        return False
 
-        # Exibir rejeitados se houver
-        if resultado.pedidos_rejeitados:
-            NotificationService.notificar_rejeitados_console(resultado)
+    except Exception as e:
+        print(f"\n❌ Erro durante reconciliação: {str(e)}\n")
+        log.error(f"Erro: {str(e)}")
+        return False
 
-        # ========== 5. SALVAR RELATÓRIOS ==========
-        print("💾 Gerando relatórios...\n")
+    finally:
+        if diario is not None:
+            diario.fechar()
+        exportar_metricas()
+
+
+def abrir_diario(dias: int, retomar: Optional[str]):
+    """
+    Cria o diário da execução (DIARIO_EXECUCAO=0 desativa) ou reabre o de
+    uma execução interrompida
+
+    Args:
+        dias: Dia reconciliado, em dias para trás
+        retomar: run_id a retomar ("" = o diário mais recente não concluído; None = nova execução)
+
+    Returns:
+        DiarioExecucao, ou None se desativado
+
+    Raises:
+        FileNotFoundError: se não houver diário para retomar
+    """
+    if retomar is None and os.getenv("DIARIO_EXECUCAO", "1") == "0":
+        return None
+
+    from utils.diario_execucao import DiarioExecucao
+
+    if retomar is not None:
+        diario = DiarioExecucao.retomar(retomar or None)
+        print(f"⏯️  Retomando a execução {diario.run_id} (dia {diario.parametros.get('dia')}): "
+              f"{diario.total_janelas_concluidas} janelas e {diario.total_paginas} páginas já registradas\n")
+        log.info(f"Retomando a execução {diario.run_id}", resumed_run=diario.run_id)
+        return diario
+
+    return DiarioExecucao.criar({
+        "dia": (agora_local() - timedelta(days=dias)).date().isoformat(),
+        "granularidade": os.getenv("JANELA_GRANULARIDADE", "dia"),
+        "itens_por_pagina": 100,
+        "gateways": "3",
+    })
+
+
+def apresentar_resultado(
+    resultado: ResultadoConfrontoPagamentos,
+    prefixo_relatorio: str = "relatorio_confronto",
+    linhas_rejeitados: Optional[List[str]] = None,
+    pendente_confirmacao: bool = False
+) -> None:
+    """
+    Exibe o resultado, notifica rejeitados, salva os relatórios e o resumo por filial
+
+    `linhas_rejeitados` são as linhas do relatório texto já formatadas no
+    confronto em processos (None = formatar aqui). Com `pendente_confirmacao`
+    os rejeitados são notificados como ainda não confirmados (a fila de
+    reverificação confirma depois os que continuarem ausentes).
+    """
+    # ========== 4. EXIBIR RESULTADO ==========
+    print("=" * 80)
+    print(f"📊 RESULTADO: {resultado.resumo()}")
+    print("=" * 80 + "\n")
 
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        arquivo_json = f"logs/relatorio_confronto_{timestamp}.json"
+    # Exibir rejeitados se houver
+    if resultado.pedidos_rejeitados:
+        with metricas.etapa("notify") as etapa:
+            NotificationService.notificar_rejeitados_console(resultado, pendente_confirmacao)
+            etapa.adicionar_itens(resultado.total_rejeitados)
+
+    # ========== 5. SALVAR RELATÓRIOS ==========
+    print("💾 Gerando relatórios...\n")
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    with metricas.etapa("report_write") as etapa:
+        arquivo_json = f"logs/{prefixo_relatorio}_{timestamp}.json"
         NotificationService.salvar_relatorio_json(resultado, arquivo_json)
+
+        arquivo_txt = f"logs/{prefixo_relatorio}_{timestamp}.txt"
+        NotificationService.salvar_relatorio_texto(resultado, arquivo_txt, linhas_rejeitados)
+        etapa.adicionar_itens(len(resultado.pedidos))
+
+    # ========== 6. RESUMO POR FILIAL ==========
+    print("\n📋 Resumo por filial:\n")
+
+    agrupado = ReconciliationService.agrupar_por_filial(resultado)
+
+    for filial in sorted(agrupado.keys()):
+        dados = agrupado[filial]
+        taxa = (dados["integrados"] / dados["total"] * 100) if dados["total"] > 0 else 0
         
-        arquivo_txt = f"logs/relatorio_confronto_{timestamp}.txt"
-        NotificationService.salvar_relatorio_texto(resultado, arquivo_txt)
+        print(f"  Filial {filial}: {dados['total']} total | "
+              f"{dados['integrados']} ✅ | {dados['rejeitados']} ❌ | {taxa:.1f}%")
 
-        # ========== 6. RESUMO POR FILIAL ==========
-        print("\n📋 Resumo por filial:\n")
+        if dados["pedidos_rejeitados"] and len(dados["pedidos_rejeitados"]) <= 5:
+            for p in dados["pedidos_rejeitados"]:
+                print(f"     └─ {p['numero']}: {p['cliente'][:40]}")
 
-        agrupado = ReconciliationService.agrupar_por_filial(resultado)
+    print("\n" + "=" * 80)
+    print("✅ Processo concluído com sucesso!")
+    print("=" * 80 + "\n")
 
-        for filial in sorted(agrupado.keys()):
-            dados = agrupado[filial]
-            taxa = (dados["integrados"] / dados["total"] * 100) if dados["total"] > 0 else 0
-            
-            print(f"  Filial {filial}: {dados['total']} total | "
-                  f"{dados['integrados']} ✅ | {dados['rejeitados']} ❌ | {taxa:.1f}%")
 
-            if dados["pedidos_rejeitados"] and len(dados["pedidos_rejeitados"]) <= 5:
-                for p in dados["pedidos_rejeitados"]:
-                    print(f"     └─ {p['numero']}: {p['cliente'][:40]}")
+def reprocessar_execucao(run_id: str, processos: int = 0) -> bool:
+    """
+    Refaz o confronto e os relatórios de uma execução arquivada, sem acessar as APIs
 
-        print("\n" + "=" * 80)
-        print("✅ Processo concluído com sucesso!")
-        print("=" * 80 + "\n")
+    Com `processos`, as páginas arquivadas são decodificadas e confrontadas em
+    paralelo, cada processo com um bloco de respostas.
+    """
+    from services.replay_service import ReplayService
 
+    print("\n" + "=" * 80)
+    print(f"⏪ REPROCESSAMENTO DA EXECUÇÃO {run_id}")
+    print("=" * 80 + "\n")
+
+    try:
+        linhas_rejeitados = None
+        with metricas.etapa("replay_load") as etapa:
+            # Índice do Winthor em cache por execução (mmap nos reprocessamentos seguintes)
+            indice = ReplayService.carregar_indice_winthor(run_id)
+            if processos:
+                corpos = ReplayService.carregar_corpos_maxpayment(run_id)
+                etapa.adicionar_itens(len(corpos) + len(indice))
+            else:
+                pagamentos = ReplayService.carregar_pagamentos(run_id)
+                etapa.adicionar_itens(len(pagamentos) + len(indice))
+
+        if processos:
+            from services.parallel_reconciliation import ParallelReconciliationService
+
+            print(f"   ✓ {len(corpos)} páginas e {len(indice)} pedidos Winthor arquivados\n")
+            with metricas.etapa("reconcile") as etapa:
+                resultado, linhas_rejeitados = ParallelReconciliationService.confrontar_respostas(
+                    corpos, indice, processos=processos,
+                )
+                etapa.adicionar_itens(resultado.total_pagamentos)
+        else:
+            print(f"   ✓ {len(pagamentos)} pagamentos e {len(indice)} pedidos Winthor arquivados\n")
+            with metricas.etapa("reconcile") as etapa:
+                resultado = ReconciliationService.confrontar_com_numeros(pagamentos, indice)
+                etapa.adicionar_itens(resultado.total_pagamentos)
+
+        apresentar_resultado(
+            resultado,
+            prefixo_relatorio=f"relatorio_replay_{run_id}",
+            linhas_rejeitados=linhas_rejeitados,
+        )
         return True
 
-    except Exception as e:
-        print(f"\n❌ Erro durante reconciliação: {str(e)}\n")
-        log.error(f"Erro: {str(e)}")
+    except FileNotFoundError as e:
+        print(f"\n❌ {e}\n")
+        log.error(str(e))
         return False
 
+    finally:
+        exportar_metricas()
+
+
+def reconciliar_tenants(caminho_tenants: str, max_workers: int) -> bool:
+    """Reconcilia todos os tenants do arquivo em paralelo e exibe o resumo agregado"""
+    from models.tenant import Tenant
+    from services.tenant_runner import TenantRunner
+
+    print("\n" + "=" * 80)
+    print("🏢 RECONCILIAÇÃO MULTI-TENANT")
+    print("=" * 80 + "\n")
+
+    try:
+        tenants = Tenant.carregar_arquivo(caminho_tenants)
+        if not tenants:
+            print(f"⚠️  Nenhum tenant configurado em {caminho_tenants}\n")
+            return False
+
+        print(f"🔄 Reconciliando {len(tenants)} tenants ({max_workers} em paralelo)...\n")
+        resultados = TenantRunner.executar(tenants, max_workers=max_workers)
+
+        print(TenantRunner.gerar_resumo_texto(resultados))
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        arquivo_resumo = f"logs/resumo_tenants_{timestamp}.json"
+        TenantRunner.salvar_resumo_json(resultados, arquivo_resumo)
+        print(f"\n📄 Resumo salvo em: {arquivo_resumo}")
+        print("   Relatórios individuais em logs/<tenant>/\n")
+
+        return all(r.sucesso for r in resultados)
+
+    except (OSError, ValueError, KeyError) as e:
+        print(f"\n❌ Erro no arquivo de tenants: {e}\n")
+        log.error(f"Erro no arquivo de tenants: {e}")
+        return False
+
+    finally:
+        exportar_metricas()
+
+
+def processar_fila_reverificacao(
+    winthor_service: WinthorService,
+    resultado: Optional[ResultadoConfrontoPagamentos] = None
+) -> None:
+    """
+    Coloca os rejeitados do confronto na fila persistente, reconsulta os
+    vencidos e notifica apenas as rejeições confirmadas
+    """
+    from services.reverificacao_service import FilaReverificacao
+
+    with metricas.etapa("retry_queue") as etapa:
+        fila = FilaReverificacao()
+        if resultado is not None:
+            fila.adicionar_rejeitados(resultado)
+        resumo = fila.processar_vencidos(winthor_service)
+        etapa.adicionar_itens(resumo.verificados)
+
+    with metricas.etapa("notify") as etapa:
+        NotificationService.notificar_reverificacao_console(resumo)
+        etapa.adicionar_itens(len(resumo.confirmados))
+
+
+def reverificar_rejeitados() -> bool:
+    """Reconsulta no Winthor apenas os pedidos da fila de reverificação (sem buscar /imported)"""
+    print("\n" + "=" * 80)
+    print("🔁 REVERIFICAÇÃO DE PEDIDOS REJEITADOS")
+    print("=" * 80)
+
+    winthor_url = os.getenv("WINTHOR_API_URL")
+    winthor_token = os.getenv("WINTHOR_AUTH_TOKEN")
+    if not (winthor_url and winthor_token):
+        print("❌ ERRO: WINTHOR_API_URL e WINTHOR_AUTH_TOKEN precisam estar configurados.\n")
+        return False
+
+    try:
+        processar_fila_reverificacao(WinthorService(winthor_url, winthor_token))
+        print()
+        return True
+    finally:
+        exportar_metricas()
+
+
+def monitorar_pagamentos(intervalo: float, carencia_minutos: float) -> bool:
+    """Modo watch: acompanha pagamentos novos e alerta pedidos ausentes após a carência"""
+    from services.watch_service import WatchService
+
+    print("\n" + "=" * 80)
+    print("👀 MODO WATCH - PAGAMENTOS NOVOS")
+    print("=" * 80 + "\n")
+
+    maxpayment_url = os.getenv("MAXPAYMENT_API_URL")
+    maxima_token = os.getenv("MAXIMA_AUTH_TOKEN")
+    winthor_url = os.getenv("WINTHOR_API_URL")
+    winthor_token = os.getenv("WINTHOR_AUTH_TOKEN")
+
+    if not all([maxpayment_url, maxima_token, winthor_url, winthor_token]):
+        print("❌ ERRO: Variáveis de ambiente não configuradas! Veja `python main.py` para detalhes.\n")
+        return False
+
+    watch = WatchService(
+        PaymentService(maxpayment_url, maxima_token),
+        WinthorService(winthor_url, winthor_token),
+        carencia=carencia_minutos * 60,
+        intervalo=intervalo,
+    )
+    print(f"   Consulta a cada {intervalo:.0f}s | carência de {carencia_minutos:.0f} min")
+    print(f"   Alertas em: {watch.arquivo_alertas}")
+    print("   Ctrl+C para encerrar\n")
+
+    try:
+        watch.executar()
+    finally:
+        exportar_metricas()
+    return True
+
+
+def servir_consultas(porta: int, intervalo: float, dias: int = 0) -> bool:
+    """Servidor HTTP local com o confronto mais recente, atualizado em segundo plano"""
+    from services.consulta_service import ConsultaService, ServidorConsulta
+
+    print("\n" + "=" * 80)
+    print("🔎 API DE CONSULTA DE PEDIDOS")
+    print("=" * 80 + "\n")
+
+    maxpayment_url = os.getenv("MAXPAYMENT_API_URL")
+    maxima_token = os.getenv("MAXIMA_AUTH_TOKEN")
+    winthor_url = os.getenv("WINTHOR_API_URL")
+    winthor_token = os.getenv("WINTHOR_AUTH_TOKEN")
+
+    if not all([maxpayment_url, maxima_token, winthor_url, winthor_token]):
+        print("❌ ERRO: Variáveis de ambiente não configuradas! Veja `python main.py` para detalhes.\n")
+        return False
+
+    servico = ConsultaService(
+        PaymentService(maxpayment_url, maxima_token),
+        WinthorService(winthor_url, winthor_token),
+        intervalo=intervalo,
+        dias=dias,
+    )
+    try:
+        servidor = ServidorConsulta(servico, porta=porta)
+    except OSError as e:
+        print(f"❌ Não foi possível abrir a porta {porta}: {e}\n")
+        return False
+
+    print(f"   {servidor.url_base}/pedidos/<numero>")
+    print(f"   {servidor.url_base}/filiais/<codigo>?status=REJEITADO")
+    print(f"   {servidor.url_base}/resumo  |  {servidor.url_base}/saude")
+    print(f"   Atualização a cada {intervalo:.0f}s | Ctrl+C para encerrar\n")
+    log.info(f"🔎 API de consulta em {servidor.url_base}", stage="consulta")
+
+    try:
+        servidor.executar()
+    finally:
+        exportar_metricas()
+    return True
+
+
+def registrar_confronto_incompleto(total_pagamentos: int, erro: FonteIndisponivelError) -> bool:
+    """Salva um relatório marcado como incompleto (sem rejeições nem notificações)"""
+    print(f"\n⚠️  {erro}")
+    print("   Confronto abortado: nenhum pedido será marcado como rejeitado nesta execução.\n")
+    log.error(f"Confronto abortado: {erro}")
+
+    resultado = ResultadoConfrontoPagamentos.incompleto(total_pagamentos, [erro.fonte])
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    NotificationService.salvar_relatorio_json(
+        resultado, f"logs/relatorio_confronto_{timestamp}_incompleto.json"
+    )
+    return False
+
+
+def exportar_metricas():
+    """Salva o resumo de métricas da execução (JSON e formato Prometheus) em logs/"""
+    try:
+        metricas.exportar_json(os.path.join(log.log_dir, f"metricas_{log.run_id}.json"))
+        metricas.exportar_prometheus(os.path.join(log.log_dir, "metricas.prom"))
+    except OSError as e:
+        log.error(f"Erro ao exportar métricas: {e}")
+
 
 def main():
     """Função principal com argumentos de linha de comando"""
@@ -167,6 +551,17 @@ def main():
 Exemplos:
   python main.py              # Executa reconciliação completa
   python main.py --token      # Apenas renova o token
+  python main.py --profile    # Reconciliação com cProfile (resultados em logs/)
+  python main.py --arquivar   # Arquiva as respostas brutas em logs/arquivo/
+  python main.py --replay ID  # Reprocessa a execução ID a partir do arquivo
+  python main.py --tenants tenants.json --workers 4
+  python main.py --replay ID --processos 8   # Reprocessa um backfill arquivado em 8 processos
+  python main.py --sync-delta # Winthor: snapshot local + apenas as mudanças
+  python main.py --dias 1     # Reconcilia o dia de ontem
+  python main.py --retomar    # Retoma a última execução interrompida, sem rebuscar o que já veio
+  python main.py --watch --intervalo 60 --carencia 10
+  python main.py --reverificar   # Reconsulta os rejeitados pendentes (ex.: cron a cada 5 min)
+  python main.py --servir 8080 --intervalo 120   # API local: /pedidos/<numero>, /filiais/<codigo>
   python main.py --help       # Mostra esta mensagem
         """
     )
@@ -177,24 +572,174 @@ Exemplos:
         help="Apenas renova o token de autenticação"
     )
 
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Executa a reconciliação sob o cProfile e salva o perfil em logs/"
+    )
+
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=30,
+        metavar="N",
+        help="Quantidade de funções no resumo do perfil (padrão: 30)"
+    )
+
+    parser.add_argument(
+        "--arquivar",
+        action="store_true",
+        help="Arquiva as respostas brutas da MaxPayment e do Winthor (logs/arquivo/)"
+    )
+
+    parser.add_argument(
+        "--replay",
+        metavar="RUN_ID",
+        help="Reprocessa uma execução arquivada, sem acessar as APIs"
+    )
+
+    parser.add_argument(
+        "--tenants",
+        metavar="ARQUIVO",
+        help="Arquivo JSON com várias empresas para reconciliar no mesmo processo"
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Tenants processados em paralelo com --tenants (padrão: 4)"
+    )
+
+    parser.add_argument(
+        "--processos",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Com --replay: decodifica e confronta as páginas arquivadas em N processos "
+             "(0 = desligado; útil em backfills grandes)"
+    )
+
+    parser.add_argument(
+        "--sync-delta",
+        action="store_true",
+        help="Mantém um snapshot dos pedidos do Winthor e busca apenas as mudanças"
+    )
+
+    parser.add_argument(
+        "--dias",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Reconcilia o dia de N dias atrás (padrão: 0 = hoje)"
+    )
+
+    parser.add_argument(
+        "--retomar",
+        nargs="?",
+        const="",
+        metavar="RUN_ID",
+        help="Retoma uma execução interrompida a partir do diário (padrão: a mais recente não "
+             "concluída). Só janelas já encerradas ficam no diário: com --dias 0 e a granularidade "
+             "padrão (dia) o dia corrente é buscado de novo; use JANELA_GRANULARIDADE=hora"
+    )
+
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Monitora pagamentos novos continuamente e alerta pedidos ausentes no Winthor"
+    )
+
+    parser.add_argument(
+        "--intervalo",
+        type=float,
+        default=60.0,
+        metavar="SEGUNDOS",
+        help="Intervalo entre consultas à MaxPayment no --watch e atualizações no --servir (padrão: 60)"
+    )
+
+    parser.add_argument(
+        "--carencia",
+        type=float,
+        default=10.0,
+        metavar="MINUTOS",
+        help="Tempo de espera antes de consultar o pedido no Winthor no --watch (padrão: 10)"
+    )
+
+    parser.add_argument(
+        "--reverificar",
+        action="store_true",
+        help="Reconsulta no Winthor apenas os pedidos da fila de reverificação. "
+             "Agende entre as execuções completas (ex.: cron a cada 5 min): sem ele a "
+             "confirmação das rejeições só avança quando o confronto completo roda"
+    )
+
+    parser.add_argument(
+        "--servir",
+        type=int,
+        nargs="?",
+        const=8080,
+        metavar="PORTA",
+        help="API HTTP local de consulta por pedido e filial (padrão: porta 8080)"
+    )
+
     args = parser.parse_args()
+    if args.processos and not args.replay:
+        # Com os pagamentos já decodificados o pool é mais lento que o confronto sequencial
+        parser.error("--processos só vale com --replay")
 
     # Carregar variáveis de ambiente
-    load_dotenv()
+    carregar_ambiente()
 
     print("\n" + "=" * 80)
     print("🤖 PEDIDO REJEITADO v5 - Sistema de Reconciliação de Pagamentos")
     print(f"   Iniciado em: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
     print("=" * 80)
 
+    if args.arquivar:
+        from utils.response_archive import ativar_arquivo
+        ativar_arquivo()
+        print(f"   Execução: {log.run_id} (respostas arquivadas)")
+
     try:
         if args.token:
             # Apenas renova o token
             sucesso = renovar_token()
             sys.exit(0 if sucesso else 1)
+        elif args.tenants:
+            # Reconcilia todos os tenants do arquivo
+            sucesso = reconciliar_tenants(args.tenants, args.workers)
+            sys.exit(0 if sucesso else 1)
+        elif args.reverificar:
+            # Reconsulta apenas a fila de rejeitados
+            sucesso = reverificar_rejeitados()
+            sys.exit(0 if sucesso else 1)
+        elif args.watch:
+            # Monitora pagamentos novos até ser interrompido
+            sucesso = monitorar_pagamentos(args.intervalo, args.carencia)
+            sys.exit(0 if sucesso else 1)
+        elif args.servir is not None:
+            # Atende consultas até ser interrompido
+            sucesso = servir_consultas(args.servir, args.intervalo, dias=args.dias)
+            sys.exit(0 if sucesso else 1)
+        elif args.replay:
+            # Reprocessa uma execução arquivada
+            sucesso = reprocessar_execucao(args.replay, processos=args.processos)
+            sys.exit(0 if sucesso else 1)
+        elif args.profile:
+            # Executa o workflow completo sob o profiler
+            from utils.profiler import executar_com_perfil
+            sucesso, arquivo_resumo = executar_com_perfil(
+                reconciliar_pagamentos, top_n=args.profile_top,
+                sync_delta=args.sync_delta, dias=args.dias, retomar=args.retomar,
+            )
+            print(f"🔬 Resumo do perfil: {arquivo_resumo}\n")
+            sys.exit(0 if sucesso else 1)
         else:
             # Executa o workflow completo
-            sucesso = reconciliar_pagamentos()
+            sucesso = reconciliar_pagamentos(
+                sync_delta=args.sync_delta, dias=args.dias, retomar=args.retomar,
+            )
             sys.exit(0 if sucesso else 1)
 
     except KeyboardInterrupt:
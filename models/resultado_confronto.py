@@ -30,6 +30,23 @@ class ResultadoConfrontoPagamentos:
     total_integrados: int
     total_rejeitados: int
     pedidos: List[ResultadoConfrontoPedido] = field(default_factory=list)
+    fontes_indisponiveis: List[str] = field(default_factory=list)
+
+    @classmethod
+    def incompleto(cls, total_pagamentos: int, fontes_indisponiveis: List[str]) -> "ResultadoConfrontoPagamentos":
+        """Resultado de uma execução abortada por indisponibilidade de fonte (sem confronto)"""
+        return cls(
+            data_processamento=datetime.now().isoformat(),
+            total_pagamentos=total_pagamentos,
+            total_integrados=0,
+            total_rejeitados=0,
+            fontes_indisponiveis=list(fontes_indisponiveis),
+        )
+
+    @property
+    def completo(self) -> bool:
+        """False se alguma fonte estava indisponível (os status não são confiáveis)"""
+        return not self.fontes_indisponiveis
 
     @property
     def percentual_integracao(self) -> float:
@@ -50,11 +67,18 @@ class ResultadoConfrontoPagamentos:
             "total_integrados": self.total_integrados,
             "total_rejeitados": self.total_rejeitados,
             "percentual_integracao": self.percentual_integracao,
+            "completo": self.completo,
+            "fontes_indisponiveis": self.fontes_indisponiveis,
             "pedidos": [p.to_dict() for p in self.pedidos],
         }
 
     def resumo(self) -> str:
         """Gera um resumo textual dos resultados"""
+        if not self.completo:
+            return (
+                f"INCOMPLETO ⚠️ | Fontes indisponíveis: {', '.join(self.fontes_indisponiveis)} | "
+                f"Pagamentos não confrontados: {self.total_pagamentos}"
+            )
         return (
             f"Processados: {self.total_pagamentos} | "
             f"Integrados: {self.total_integrados} ✅ | "
@@ -0,0 +1,88 @@
+import json
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional
+from dotenv import dotenv_values
+
+# O nome vira diretório de relatórios (logs/<tenant>/): sem separadores nem ".."
+PADRAO_NOME = re.compile(r"[A-Za-z0-9_-]+")
+
+
+@dataclass
+class Tenant:
+    """Configuração de uma empresa (conta) a ser reconciliada"""
+    nome: str
+    maxpayment_api_url: str
+    maxima_auth_token: str
+    winthor_api_url: str
+    winthor_auth_token: str
+    gateways: str = "3"
+    dias: int = 0
+    env_file: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], diretorio_base: str = ".") -> "Tenant":
+        """
+        Constrói um Tenant a partir de uma entrada do arquivo de tenants.
+        Se `env_file` for informado, as variáveis ausentes são lidas dele
+        (mesmos nomes do .env: MAXPAYMENT_API_URL, MAXIMA_AUTH_TOKEN...).
+
+        Raises:
+            ValueError: se o nome tiver caracteres fora de [A-Za-z0-9_-]
+        """
+        nome = str(data["nome"])
+        if not PADRAO_NOME.fullmatch(nome):
+            raise ValueError(f"Nome de tenant inválido: {nome!r} (use apenas letras, números, _ e -)")
+
+        env_file = data.get("env_file")
+        env: Dict[str, Optional[str]] = {}
+        if env_file:
+            env_file = os.path.join(diretorio_base, env_file)
+            env = dotenv_values(env_file)
+
+        def valor(chave: str) -> str:
+            return data.get(chave.lower()) or env.get(chave) or ""
+
+        return cls(
+            nome=nome,
+            maxpayment_api_url=valor("MAXPAYMENT_API_URL"),
+            maxima_auth_token=valor("MAXIMA_AUTH_TOKEN"),
+            winthor_api_url=valor("WINTHOR_API_URL"),
+            winthor_auth_token=valor("WINTHOR_AUTH_TOKEN"),
+            gateways=str(data.get("gateways", "3")),
+            dias=int(data.get("dias", 0)),
+            env_file=env_file,
+        )
+
+    @classmethod
+    def carregar_arquivo(cls, caminho: str) -> List["Tenant"]:
+        """Lê o arquivo JSON de tenants ({"tenants": [...]} ou lista)"""
+        with open(caminho, encoding="utf-8") as f:
+            dados = json.load(f)
+
+        itens = dados.get("tenants", []) if isinstance(dados, dict) else dados
+        diretorio_base = os.path.dirname(os.path.abspath(caminho))
+        return [cls.from_dict(item, diretorio_base) for item in itens]
+
+    @property
+    def variaveis_faltando(self) -> List[str]:
+        """Nomes das configurações obrigatórias não preenchidas"""
+        obrigatorias = {
+            "MAXPAYMENT_API_URL": self.maxpayment_api_url,
+            "MAXIMA_AUTH_TOKEN": self.maxima_auth_token,
+            "WINTHOR_API_URL": self.winthor_api_url,
+            "WINTHOR_AUTH_TOKEN": self.winthor_auth_token,
+        }
+        return [nome for nome, valor in obrigatorias.items() if not valor]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converte o Tenant para dicionário (sem os tokens)"""
+        return {
+            "nome": self.nome,
+            "maxpayment_api_url": self.maxpayment_api_url,
+            "winthor_api_url": self.winthor_api_url,
+            "gateways": self.gateways,
+            "dias": self.dias,
+            "env_file": self.env_file,
+        }
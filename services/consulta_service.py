@@ -0,0 +1,331 @@
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Container, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlparse
+
+from models.resultado_confronto import ResultadoConfrontoPagamentos, ResultadoConfrontoPedido
+from services.payment_service import PaymentService
+from services.reconciliation_service import ReconciliationService
+from services.winthor_service import WinthorService
+from services.winthor_sync_service import SincronizacaoWinthor
+from utils.logger import log
+from utils.metrics import metricas
+
+STATUS_FILTRO = ("INTEGRADO", "REJEITADO")
+
+
+@dataclass
+class EstadoConsulta:
+    """
+    Fotografia de um confronto servida pela API
+
+    Montada por inteiro a cada atualização e trocada de uma vez no serviço:
+    as requisições em andamento continuam lendo a fotografia anterior, sem
+    locks na leitura.
+    """
+    resultado: ResultadoConfrontoPagamentos
+    indice_winthor: Container[str]
+    atualizado_em: datetime
+    duracao: float
+    pedidos: Dict[str, ResultadoConfrontoPedido] = field(default_factory=dict)
+    filiais: Dict[str, List[ResultadoConfrontoPedido]] = field(default_factory=dict)
+    _respostas: Dict[Tuple[str, str], bytes] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def montar(
+        cls,
+        resultado: ResultadoConfrontoPagamentos,
+        indice_winthor: Container[str],
+        duracao: float = 0.0
+    ) -> "EstadoConsulta":
+        """Indexa o resultado por número de pedido e por filial"""
+        estado = cls(resultado, indice_winthor, datetime.now().astimezone(), duracao)
+        for pedido in resultado.pedidos:
+            estado.pedidos[pedido.numero_pedido] = pedido
+            estado.filiais.setdefault(pedido.codigo_filial, []).append(pedido)
+        return estado
+
+    def consultar_pedido(self, numero: str) -> Optional[Dict]:
+        """
+        Situação de um pedido: o confronto do pagamento, se houver, e a
+        presença no Winthor
+
+        Returns:
+            Dicionário serializável, ou None se o pedido não tiver pagamento
+            no período nem estiver no Winthor
+        """
+        numero = numero.strip()
+        pedido = self.pedidos.get(numero)
+        no_winthor = numero in self.indice_winthor
+        if pedido is None and not no_winthor:
+            return None
+
+        if pedido is not None:
+            dados = pedido.to_dict()
+        else:
+            # Importado no Winthor sem pagamento no período consultado
+            dados = {"numero_pedido": numero, "status": "INTEGRADO", "detalhes": {}}
+        dados["no_winthor"] = no_winthor
+        dados["com_pagamento"] = pedido is not None
+        dados["atualizado_em"] = self.atualizado_em.isoformat()
+        return dados
+
+    def consultar_filial(self, codigo: str, status: Optional[str] = None) -> Optional[bytes]:
+        """
+        Totais e pedidos de uma filial, já serializados (memorizados por fotografia)
+
+        Args:
+            codigo: Código da filial ("10")
+            status: Filtra os pedidos listados ("INTEGRADO" ou "REJEITADO")
+
+        Returns:
+            JSON em bytes, ou None se a filial não tiver pagamentos
+
+        Raises:
+            ValueError: se `status` não for um dos STATUS_FILTRO (a memória
+                de respostas fica limitada a filiais × filtros válidos)
+        """
+        if status and status not in STATUS_FILTRO:
+            raise ValueError(f"status inválido: {status}")
+        pedidos = self.filiais.get(codigo)
+        if pedidos is None:
+            return None
+
+        chave = (codigo, status or "")
+        corpo = self._respostas.get(chave)
+        if corpo is None:
+            integrados = sum(1 for p in pedidos if p.status == "INTEGRADO")
+            corpo = _json({
+                "codigo_filial": codigo,
+                "total": len(pedidos),
+                "integrados": integrados,
+                "rejeitados": len(pedidos) - integrados,
+                "percentual_integracao": round(integrados / len(pedidos) * 100, 2),
+                "atualizado_em": self.atualizado_em.isoformat(),
+                "pedidos": [p.to_dict() for p in pedidos if not status or p.status == status],
+            })
+            self._respostas[chave] = corpo
+        return corpo
+
+    def resumo(self) -> Dict:
+        """Totais do confronto e por filial (sem a lista de pedidos)"""
+        dados = self.resultado.to_dict()
+        dados.pop("pedidos")
+        dados["atualizado_em"] = self.atualizado_em.isoformat()
+        dados["pedidos_winthor"] = len(self.indice_winthor)
+        dados["filiais"] = {
+            filial: {
+                "total": valores["total"],
+                "integrados": valores["integrados"],
+                "rejeitados": valores["rejeitados"],
+            }
+            for filial, valores in sorted(ReconciliationService.agrupar_por_filial(self.resultado).items())
+        }
+        return dados
+
+
+def _json(dados) -> bytes:
+    return json.dumps(dados, ensure_ascii=False).encode("utf-8")
+
+
+class ConsultaService:
+    """
+    Mantém em memória o confronto mais recente para consultas sob demanda
+
+    Uma thread de fundo refaz o confronto a cada `intervalo` segundos de
+    forma incremental: as janelas de pagamento já encerradas vêm do cache
+    HTTP (a do dia é revalidada com ETag) e os pedidos do Winthor vêm da
+    sincronização delta (SincronizacaoWinthor). Se uma atualização falhar,
+    a fotografia anterior continua sendo servida e o erro aparece em /saude.
+    """
+
+    def __init__(
+        self,
+        payment_service: PaymentService,
+        winthor_service: WinthorService,
+        intervalo: float = 60.0,
+        dias: int = 0,
+    ):
+        """
+        Args:
+            payment_service: Serviço da MaxPayment
+            winthor_service: Serviço do Winthor
+            intervalo: Segundos entre atualizações
+            dias: Dia consultado, em dias para trás (0 = hoje)
+        """
+        self.payment_service = payment_service
+        self.sincronizacao = SincronizacaoWinthor(winthor_service)
+        self.intervalo = intervalo
+        self.dias = dias
+        self.estado: Optional[EstadoConsulta] = None
+        self.erro: Optional[str] = None
+        self.atualizando = False
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def atualizar(self) -> EstadoConsulta:
+        """
+        Refaz o confronto e publica a nova fotografia
+
+        Raises:
+            FonteIndisponivelError: se a MaxPayment ou o Winthor não responderem
+        """
+        inicio = time.perf_counter()
+        self.atualizando = True
+        try:
+            with metricas.etapa("payment_fetch") as etapa:
+                pagamentos = self.payment_service.buscar_pagamentos_ultimos_dias(
+                    dias=self.dias, itens_por_pagina=100, gateways="3"
+                )
+                etapa.adicionar_itens(len(pagamentos))
+
+            with metricas.etapa("winthor_fetch") as etapa:
+                pedidos_winthor = self.sincronizacao.sincronizar({p.codigo_filial for p in pagamentos})
+                indice = ReconciliationService.numeros_winthor(pedidos_winthor)
+                etapa.adicionar_itens(len(pedidos_winthor))
+
+            with metricas.etapa("reconcile") as etapa:
+                resultado = ReconciliationService.confrontar_com_numeros(pagamentos, indice)
+                etapa.adicionar_itens(resultado.total_pagamentos)
+        finally:
+            self.atualizando = False
+
+        self.estado = EstadoConsulta.montar(resultado, indice, time.perf_counter() - inicio)
+        self.erro = None
+        log.info(f"🔎 Consulta atualizada em {self.estado.duracao:.2f}s: {resultado.resumo()}", stage="consulta")
+        return self.estado
+
+    def iniciar(self) -> None:
+        """Inicia as atualizações em segundo plano (a primeira é imediata)"""
+        self._thread = threading.Thread(target=self._laco, name="consulta-atualizacao", daemon=True)
+        self._thread.start()
+
+    def parar(self) -> None:
+        """Interrompe as atualizações (uma atualização em andamento não é aguardada)"""
+        self._parar.set()
+
+    def _laco(self) -> None:
+        with log.contexto(stage="consulta"):
+            while not self._parar.is_set():
+                try:
+                    self.atualizar()
+                except Exception as e:
+                    # Mantém a fotografia anterior; a próxima tentativa é no intervalo seguinte
+                    self.erro = str(e)
+                    log.warning(f"Atualização da consulta falhou: {e}", stage="consulta")
+                self._parar.wait(self.intervalo)
+
+    def saude(self) -> Dict:
+        """Situação do serviço (idade da fotografia, última falha)"""
+        estado = self.estado
+        saude = {
+            "pronto": estado is not None,
+            "atualizando": self.atualizando,
+            "atualizado_em": None,
+            "idade_s": None,
+            "duracao_atualizacao_s": None,
+            "intervalo_s": self.intervalo,
+            "erro": self.erro,
+        }
+        if estado is not None:
+            saude["atualizado_em"] = estado.atualizado_em.isoformat()
+            saude["idade_s"] = round((datetime.now().astimezone() - estado.atualizado_em).total_seconds(), 3)
+            saude["duracao_atualizacao_s"] = round(estado.duracao, 3)
+        return saude
+
+
+class _HandlerConsulta(BaseHTTPRequestHandler):
+    servico: ConsultaService = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, formato, *args):
+        log.debug(f"{self.address_string()} {formato % args}", stage="consulta")
+
+    def _responder(self, status: int, corpo: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(corpo)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        partes = [unquote(p) for p in url.path.split("/") if p]
+
+        if partes == ["saude"]:
+            saude = self.servico.saude()
+            self._responder(200 if saude["pronto"] else 503, _json(saude))
+            return
+
+        estado = self.servico.estado
+        if estado is None:
+            self._responder(503, _json({"erro": "confronto ainda não carregado", **self.servico.saude()}))
+            return
+
+        if partes == ["resumo"]:
+            self._responder(200, _json(estado.resumo()))
+        elif partes[:1] == ["pedidos"] and len(partes) == 2:
+            dados = estado.consultar_pedido(partes[1])
+            if dados is None:
+                self._responder(404, _json({
+                    "erro": "pedido sem pagamento no período e ausente no Winthor",
+                    "numero_pedido": partes[1],
+                    "atualizado_em": estado.atualizado_em.isoformat(),
+                }))
+            else:
+                self._responder(200, _json(dados))
+        elif partes[:1] == ["filiais"] and len(partes) == 2:
+            status = parse_qs(url.query).get("status", [None])[0]
+            status = status.upper() if status else None
+            if status and status not in STATUS_FILTRO:
+                self._responder(400, _json({"erro": "status inválido", "status_validos": list(STATUS_FILTRO)}))
+                return
+            corpo = estado.consultar_filial(partes[1], status)
+            if corpo is None:
+                self._responder(404, _json({"erro": "filial sem pagamentos no período", "codigo_filial": partes[1]}))
+            else:
+                self._responder(200, corpo)
+        else:
+            self._responder(404, _json({
+                "erro": "rota não encontrada",
+                "rotas": ["/saude", "/resumo", "/pedidos/{numero}", "/filiais/{codigo}?status=REJEITADO"],
+            }))
+
+    do_HEAD = do_GET
+
+
+class ServidorConsulta:
+    """Servidor HTTP local (somente leitura) sobre um ConsultaService"""
+
+    def __init__(self, servico: ConsultaService, porta: int = 8080, host: Optional[str] = None):
+        """
+        Args:
+            servico: Serviço com a fotografia do confronto
+            porta: Porta TCP
+            host: Interface (padrão: SERVIDOR_HOST ou 127.0.0.1, só acesso local)
+        """
+        self.servico = servico
+        handler = type("HandlerConsulta", (_HandlerConsulta,), {"servico": servico})
+        self._server = ThreadingHTTPServer((host or os.getenv("SERVIDOR_HOST", "127.0.0.1"), porta), handler)
+        self._server.daemon_threads = True
+
+    @property
+    def url_base(self) -> str:
+        host, porta = self._server.server_address[:2]
+        return f"http://{host}:{porta}"
+
+    def executar(self) -> None:
+        """Inicia as atualizações e atende requisições até ser interrompido (Ctrl+C)"""
+        self.servico.iniciar()
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            self.servico.parar()
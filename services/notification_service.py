@@ -1,28 +1,40 @@
 import json
+import os
 from typing import List, Optional
 from datetime import datetime
 from models.pagamento import Pagamento
-from models.resultado_confronto import ResultadoConfrontoPagamentos
+from models.resultado_confronto import ResultadoConfrontoPagamentos, ResultadoConfrontoPedido
+from utils.logger import log
 
 
 class NotificationService:
     """Serviço para notificar sobre pedidos rejeitados e problemas de integração"""
 
     @staticmethod
-    def notificar_rejeitados_console(resultado: ResultadoConfrontoPagamentos) -> None:
+    def notificar_rejeitados_console(
+        resultado: ResultadoConfrontoPagamentos,
+        pendente_confirmacao: bool = False
+    ) -> None:
         """
         Exibe no console os pedidos rejeitados (não encontrados no Winthor)
         
         Args:
             resultado: Resultado do confronto
+            pendente_confirmacao: Marca os rejeitados como ainda não confirmados
+                pela fila de reverificação (podem ser importações atrasadas)
         """
+        if not resultado.completo:
+            print(f"\n⚠️  Confronto incompleto: {resultado.resumo()}")
+            return
+
         rejeitados = resultado.pedidos_rejeitados
 
         if not rejeitados:
             print("\n✅ Nenhum pedido rejeitado encontrado!")
             return
 
-        print(f"\n❌ PEDIDOS REJEITADOS - {resultado.data_processamento}")
+        situacao = " (PENDENTES DE CONFIRMAÇÃO)" if pendente_confirmacao else ""
+        print(f"\n❌ PEDIDOS REJEITADOS{situacao} - {resultado.data_processamento}")
         print("=" * 80)
         print(f"{'FILIAL':<8} | {'PEDIDO':<15} | {'CLIENTE':<30}")
         print("-" * 80)
@@ -37,6 +49,78 @@ class NotificationService:
 
         print("-" * 80)
         print(f"Total de rejeitados: {len(rejeitados)}")
+        if pendente_confirmacao:
+            print("   A fila de reverificação reconsulta estes pedidos e confirma os que")
+            print("   continuarem ausentes (agende `python main.py --reverificar`).")
+
+    @staticmethod
+    def notificar_alerta_rejeitado(
+        pedido: ResultadoConfrontoPedido,
+        caminho_arquivo: str,
+        atraso_minutos: Optional[float] = None
+    ) -> None:
+        """
+        Alerta imediato de um pedido ainda ausente no Winthor (modo watch):
+        exibe no console, registra no log e acrescenta uma linha ao arquivo JSONL
+
+        Args:
+            pedido: Pedido rejeitado
+            caminho_arquivo: Arquivo JSONL de alertas
+            atraso_minutos: Minutos entre o pagamento e o alerta
+        """
+        atraso = f" ({atraso_minutos:.0f} min após o pagamento)" if atraso_minutos is not None else ""
+        cliente = (pedido.cliente or "N/A")[:30]
+        print(f"🚨 Pedido rejeitado: filial {pedido.codigo_filial} | {pedido.numero_pedido} | {cliente}{atraso}")
+        log.warning(
+            f"Pedido {pedido.numero_pedido} ainda ausente no Winthor{atraso}",
+            stage="watch", branch=pedido.codigo_filial,
+        )
+
+        try:
+            entrada = {
+                "ts": datetime.now().isoformat(),
+                "atraso_minutos": round(atraso_minutos, 1) if atraso_minutos is not None else None,
+                **pedido.to_dict(),
+            }
+            os.makedirs(os.path.dirname(caminho_arquivo) or ".", exist_ok=True)
+            with open(caminho_arquivo, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+        except OSError as e:
+            log.error(f"❌ Erro ao registrar alerta: {e}", stage="watch")
+
+    @staticmethod
+    def notificar_reverificacao_console(resumo) -> None:
+        """
+        Exibe o resultado da reverificação dos rejeitados (fila persistente)
+
+        Args:
+            resumo: ResumoReverificacao da rodada
+        """
+        if not (resumo.verificados or resumo.adiados):
+            print(f"\n🔁 Fila de reverificação: {resumo.pendentes} pedidos aguardando")
+            return
+
+        print(f"\n🔁 REVERIFICAÇÃO DE REJEITADOS - {resumo.resumo()}")
+
+        if resumo.integrados:
+            print("   Integrados com atraso:")
+            for item in resumo.integrados:
+                print(f"     ✅ {item.pedido.codigo_filial:<8} | {item.numero_pedido}")
+
+        if resumo.confirmados:
+            print("=" * 80)
+            print(f"{'FILIAL':<8} | {'PEDIDO':<15} | {'CLIENTE':<30} | TENTATIVAS")
+            print("-" * 80)
+            for item in resumo.confirmados:
+                cliente = (item.pedido.cliente or "N/A")[:30]
+                print(f"{item.pedido.codigo_filial:<8} | {item.numero_pedido:<15} | {cliente:<30} | {item.tentativas}")
+            print("-" * 80)
+
+            for item in resumo.confirmados:
+                log.warning(
+                    f"Rejeição confirmada do pedido {item.numero_pedido} após {item.tentativas} verificações",
+                    stage="retry_queue", branch=item.pedido.codigo_filial,
+                )
 
     @staticmethod
     def salvar_relatorio_json(
@@ -63,18 +147,27 @@ class NotificationService:
             return True
 
         except Exception as e:
-            print(f"\n❌ Erro ao salvar relatório: {e}")
+            log.error(f"❌ Erro ao salvar relatório: {e}", stage="report_write")
             return False
 
+    @staticmethod
+    def formatar_linha_rejeitado(codigo_filial: str, numero_pedido: str, cliente: Optional[str]) -> str:
+        """Formata a linha de um pedido rejeitado no relatório texto"""
+        cliente = (cliente or "N/A")[:40]
+        return f"{codigo_filial:<8} | {numero_pedido:<15} | {cliente:<40}"
+
     @staticmethod
     def gerar_relatorio_texto(
-        resultado: ResultadoConfrontoPagamentos
+        resultado: ResultadoConfrontoPagamentos,
+        linhas_rejeitados: Optional[List[str]] = None
     ) -> str:
         """
         Gera um relatório em formato texto
         
         Args:
             resultado: Resultado do confronto
+            linhas_rejeitados: Linhas de rejeitados já formatadas (ex.: geradas em
+                               paralelo); se omitido, são formatadas aqui
         
         Returns:
             String contendo o relatório formatado
@@ -86,6 +179,12 @@ class NotificationService:
         linhas.append("=" * 80)
         linhas.append("")
 
+        if not resultado.completo:
+            linhas.append("⚠️  CONFRONTO INCOMPLETO - FONTES INDISPONÍVEIS: "
+                          + ", ".join(resultado.fontes_indisponiveis))
+            linhas.append("   Os pagamentos abaixo não foram confrontados; nenhum pedido foi marcado como rejeitado.")
+            linhas.append("")
+
         # Resumo geral
         linhas.append("RESUMO GERAL:")
         linhas.append(f"  Total de pagamentos: {resultado.total_pagamentos}")
@@ -101,13 +200,14 @@ class NotificationService:
             linhas.append(f"{'FILIAL':<8} | {'PEDIDO':<15} | {'CLIENTE':<40}")
             linhas.append("-" * 80)
 
-            for pedido in resultado.pedidos_rejeitados:
-                cliente = (pedido.cliente or "N/A")[:40]
-                linhas.append(
-                    f"{pedido.codigo_filial:<8} | "
-                    f"{pedido.numero_pedido:<15} | "
-                    f"{cliente:<40}"
-                )
+            if linhas_rejeitados is None:
+                linhas_rejeitados = [
+                    NotificationService.formatar_linha_rejeitado(
+                        pedido.codigo_filial, pedido.numero_pedido, pedido.cliente
+                    )
+                    for pedido in resultado.pedidos_rejeitados
+                ]
+            linhas.extend(linhas_rejeitados)
 
             linhas.append("-" * 80)
 
@@ -119,7 +219,8 @@ class NotificationService:
     @staticmethod
     def salvar_relatorio_texto(
         resultado: ResultadoConfrontoPagamentos,
-        caminho_arquivo: str
+        caminho_arquivo: str,
+        linhas_rejeitados: Optional[List[str]] = None
     ) -> bool:
         """
         Salva o relatório em formato texto
@@ -127,12 +228,13 @@ class NotificationService:
         Args:
             resultado: Resultado do confronto
             caminho_arquivo: Caminho para salvar o arquivo
+            linhas_rejeitados: Linhas de rejeitados já formatadas (opcional)
         
         Returns:
             True se salvo com sucesso, False caso contrário
         """
         try:
-            relatorio = NotificationService.gerar_relatorio_texto(resultado)
+            relatorio = NotificationService.gerar_relatorio_texto(resultado, linhas_rejeitados)
 
             with open(caminho_arquivo, 'w', encoding='utf-8') as f:
                 f.write(relatorio)
@@ -141,7 +243,7 @@ class NotificationService:
             return True
 
         except Exception as e:
-            print(f"\n❌ Erro ao salvar relatório: {e}")
+            log.error(f"❌ Erro ao salvar relatório: {e}", stage="report_write")
             return False
 
     @staticmethod
@@ -163,6 +265,10 @@ class NotificationService:
         Returns:
             True se enviado com sucesso, False caso contrário
         """
+        if not resultado.completo:
+            log.warning(f"Email não enviado: {resultado.resumo()}", stage="notify")
+            return False
+
         try:
             import smtplib
             from email.mime.text import MIMEText
@@ -198,5 +304,5 @@ class NotificationService:
             return True
 
         except Exception as e:
-            print(f"\n❌ Erro ao enviar email: {e}")
+            log.error(f"❌ Erro ao enviar email: {e}", stage="notify")
             return False
@@ -0,0 +1,135 @@
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Container, List, Optional, Tuple
+
+from models.resultado_confronto import ResultadoConfrontoPagamentos, ResultadoConfrontoPedido
+from services.notification_service import NotificationService
+from utils.indice_pedidos import IndicePedidos
+
+# Formato de troca entre processos: tuplas de primitivos (o pickle de tuplas de str/int é
+# feito em C e é bem menor que o de dataclasses, que carrega nomes de classe e __dict__)
+#   entrada: bloco de corpos de páginas da MaxPayment (bytes)
+#   saída: (codigo_filial, numero_pedido, cliente, integrado,
+#           nome_filial, valor, gateway, data_pagamento, linha_texto)
+
+# Números do Winthor carregados uma única vez por processo (initializer do pool)
+_numeros_winthor: Container[str] = frozenset()
+
+
+def _inicializar_worker(numeros_winthor: Container[str]) -> None:
+    global _numeros_winthor
+    _numeros_winthor = numeros_winthor
+
+
+def _worker_respostas(corpos: List[bytes]) -> List[tuple]:
+    """Worker: decodifica páginas brutas da MaxPayment, confronta e formata os rejeitados"""
+    from services.payment_service import PaymentService
+
+    numeros = _numeros_winthor
+    formatar = NotificationService.formatar_linha_rejeitado
+    linhas = []
+    for corpo in corpos:
+        for p in PaymentService.extrair_pagamentos(json.loads(corpo)):
+            numero = str(p.codigo_pedido_maxima).strip()
+            integrado = numero in numeros
+            linhas.append((
+                p.codigo_filial, numero, p.nome_cliente, integrado,
+                p.nome_filial, p.valor, p.gateway, p.data_pagamento,
+                None if integrado else formatar(p.codigo_filial, numero, p.nome_cliente),
+            ))
+    return linhas
+
+
+class ParallelReconciliationService:
+    """
+    Confronto e formatação do relatório distribuídos em processos (backfills grandes)
+
+    Só compensa a partir das respostas brutas (--replay): a decodificação do
+    JSON e a montagem dos Pagamentos, a parte pesada, ficam nos processos. Com
+    pagamentos já decodificados sobrariam para os processos apenas as buscas
+    no conjunto do Winthor, e o processo principal ainda montaria cada
+    ResultadoConfrontoPedido: o pool sairia mais lento que o modo sequencial.
+
+    As respostas são divididas em blocos contíguos de páginas; cada processo
+    devolve tuplas de primitivos, unidas na ordem original em um único
+    ResultadoConfrontoPagamentos.
+    """
+
+    @staticmethod
+    def processos_padrao() -> int:
+        return os.cpu_count() or 1
+
+    @staticmethod
+    def confrontar_respostas(
+        corpos: List[bytes],
+        numeros_winthor: Container[str],
+        processos: Optional[int] = None
+    ) -> Tuple[ResultadoConfrontoPagamentos, List[str]]:
+        """
+        Confronta diretamente as respostas brutas da MaxPayment (ex.: execução
+        arquivada), decodificando as páginas e montando os Pagamentos nos
+        próprios processos
+
+        Args:
+            corpos: Corpos das páginas da MaxPayment, na ordem original
+            numeros_winthor: Números de pedido importados no Winthor
+            processos: Quantidade de processos (padrão: núcleos disponíveis)
+
+        Returns:
+            Tupla (resultado, linhas de rejeitados já formatadas para o relatório texto)
+        """
+        processos = processos or ParallelReconciliationService.processos_padrao()
+        tamanho = max(math.ceil(len(corpos) / (processos * 4)), 1)
+        blocos = [corpos[i:i + tamanho] for i in range(0, len(corpos), tamanho)]
+        parciais = ParallelReconciliationService._executar(
+            _worker_respostas, blocos, numeros_winthor, processos
+        )
+
+        # Blocos contíguos: concatenar na ordem mantém a ordem original
+        linhas = [linha for parcial in parciais for linha in parcial]
+        rejeitados = [linha[8] for linha in linhas if not linha[3]]
+
+        resultado = ResultadoConfrontoPagamentos(
+            data_processamento=datetime.now().isoformat(),
+            total_pagamentos=len(linhas),
+            total_integrados=len(linhas) - len(rejeitados),
+            total_rejeitados=len(rejeitados),
+        )
+        resultado.pedidos = [ParallelReconciliationService._pedido(*linha[:8]) for linha in linhas]
+        return resultado, rejeitados
+
+    @staticmethod
+    def _executar(worker, particoes: list, numeros_winthor: Container[str], processos: int) -> list:
+        """Executa o worker em cada partição (no próprio processo se houver só uma)"""
+        # IndicePedidos vai como array de inteiros (bem menor que um frozenset de str)
+        numeros = numeros_winthor if isinstance(numeros_winthor, (IndicePedidos, frozenset)) \
+            else frozenset(numeros_winthor)
+        if processos <= 1 or len(particoes) <= 1:
+            _inicializar_worker(numeros)
+            return [worker(p) for p in particoes]
+
+        # O conjunto do Winthor vai uma vez por processo (initializer), não por partição
+        with ProcessPoolExecutor(
+            max_workers=processos,
+            initializer=_inicializar_worker,
+            initargs=(numeros,),
+        ) as executor:
+            return list(executor.map(worker, particoes))
+
+    @staticmethod
+    def _pedido(filial, numero, cliente, integrado, nome_filial, valor, gateway, data) -> ResultadoConfrontoPedido:
+        return ResultadoConfrontoPedido(
+            codigo_filial=filial,
+            numero_pedido=numero,
+            cliente=cliente,
+            status="INTEGRADO" if integrado else "REJEITADO",
+            detalhes={
+                "nome_filial": nome_filial,
+                "valor": valor,
+                "gateway": gateway,
+                "data_pagamento": data,
+            },
+        )
@@ -1,8 +1,17 @@
+import contextvars
 import os
 import requests
-from datetime import datetime, timedelta
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterator, List, Optional
 from models.pagamento import Pagamento
+from utils.circuit_breaker import FonteIndisponivelError
+from utils.diario_execucao import DiarioExecucao
+from utils.http_client import requisitar
+from utils.janelas import Janela, agora_local, janelas_do_dia, margem_fechamento
+from utils.logger import log
+from utils.progresso import progresso
+from utils.rate_limiter import obter_limitador
 
 
 class PaymentService:
@@ -19,6 +28,7 @@ class PaymentService:
         self.base_url = base_url
         self.auth_token = self._limpar_token(auth_token)
         self.headers = self._preparar_headers()
+        self.cache_ttl = float(os.getenv("MAXPAYMENT_CACHE_TTL", "0"))
 
     @staticmethod
     def _limpar_token(token: str) -> str:
@@ -37,7 +47,21 @@ class PaymentService:
             "Content-Type": "application/json",
         }
 
-    def buscar_pagamentos_por_periodo(
+    @staticmethod
+    def _janela_fechada(data_fim: str) -> bool:
+        """
+        Indica se a janela de consulta terminou há mais que JANELA_MARGEM_FECHAMENTO.
+        Pagamentos de janelas encerradas não mudam, então a resposta é imutável no cache.
+        """
+        try:
+            fim = datetime.fromisoformat(data_fim.replace("Z", "+00:00"))
+        except (AttributeError, ValueError):
+            return False
+        if fim.tzinfo is None:
+            fim = fim.replace(tzinfo=timezone.utc)
+        return fim + timedelta(seconds=margem_fechamento()) <= datetime.now(timezone.utc)
+
+    def _buscar_pagina(
         self,
         data_inicio: str,
         data_fim: str,
@@ -46,27 +70,14 @@ class PaymentService:
         filiais: str = "",
         gateways: str = "3",
         status_pagamentos: str = "5",
+        crescente: bool = False,
     ) -> List[Pagamento]:
-        """
-        Busca pagamentos processados em um período específico
-        
-        Args:
-            data_inicio: Data inicial no formato ISO (2026-02-09T03:00:00.000Z)
-            data_fim: Data final no formato ISO (2026-02-09T03:00:00.000Z)
-            pagina: Número da página (padrão: 1)
-            itens_por_pagina: Itens por página (padrão: 10)
-            filiais: IDs das filiais a filtrar (vazio = todas)
-            gateways: ID do gateway (padrão: 3 para cartão de crédito)
-            status_pagamentos: Status dos pagamentos (padrão: 5)
-        
-        Returns:
-            Lista de objetos Pagamento
-        """
+        """Busca uma página de pagamentos (propaga erros de requisição)"""
         params = {
             "Pagina": str(pagina),
             "ItensPorPagina": str(itens_por_pagina),
             "CampoOrdem": "dtIncluido",
-            "TipoOrdemAsc": "false",
+            "TipoOrdemAsc": "true" if crescente else "false",
             "dataInicio": data_inicio,
             "dataFim": data_fim,
             "filialId": "0",
@@ -82,46 +93,266 @@ class PaymentService:
             "filtroAvancado": ""
         }
 
+        response = requisitar(
+            "GET",
+            self.base_url,
+            headers=self.headers,
+            params=params,
+            timeout=30,
+            cache_ttl=self.cache_ttl,
+            imutavel=self._janela_fechada(data_fim),
+            fonte="maxpayment",
+        )
+        response.raise_for_status()
+
+        data_json = response.json()
+        if pagina == 1 and isinstance(data_json.get("total"), int):
+            progresso.adicionar_total(data_json["total"])
+        return self.extrair_pagamentos(data_json)
+
+    @staticmethod
+    def extrair_pagamentos(data_json: dict) -> List[Pagamento]:
+        """Converte o corpo de uma página da MaxPayment (envelope `data`) em Pagamentos"""
+        data = data_json.get("data", [])
+        return [Pagamento.from_dict(item) for item in data]
+
+    def buscar_pagamentos_por_periodo(
+        self,
+        data_inicio: str,
+        data_fim: str,
+        pagina: int = 1,
+        itens_por_pagina: int = 10,
+        filiais: str = "",
+        gateways: str = "3",
+        status_pagamentos: str = "5",
+    ) -> List[Pagamento]:
+        """
+        Busca pagamentos processados em um período específico
+        
+        Args:
+            data_inicio: Data inicial no formato ISO (2026-02-09T03:00:00.000Z)
+            data_fim: Data final no formato ISO (2026-02-09T03:00:00.000Z)
+            pagina: Número da página (padrão: 1)
+            itens_por_pagina: Itens por página (padrão: 10)
+            filiais: IDs das filiais a filtrar (vazio = todas)
+            gateways: ID do gateway (padrão: 3 para cartão de crédito)
+            status_pagamentos: Status dos pagamentos (padrão: 5)
+        
+        Returns:
+            Lista de objetos Pagamento
+        """
         try:
-            response = requests.get(
-                self.base_url,
-                headers=self.headers,
-                params=params,
-                timeout=30
+            return self._buscar_pagina(
+                data_inicio, data_fim, pagina, itens_por_pagina,
+                filiais, gateways, status_pagamentos
             )
-            response.raise_for_status()
-
-            data = response.json().get("data", [])
-            return [Pagamento.from_dict(item) for item in data]
 
         except requests.exceptions.RequestException as e:
-            print(f"❌ Erro ao buscar pagamentos: {e}")
+            log.error(f"❌ Erro ao buscar pagamentos: {e}", stage="payment_fetch")
             return []
 
+    def iterar_paginas(
+        self,
+        data_inicio: str,
+        data_fim: str,
+        itens_por_pagina: int = 10,
+        max_paginas: Optional[int] = None,
+        crescente: bool = False,
+        **filtros
+    ) -> Iterator[List[Pagamento]]:
+        """
+        Percorre as páginas de um período em sequência, uma requisição por vez,
+        até a primeira página incompleta ou `max_paginas`. Quem consome pode
+        parar antes (ex.: ao alcançar um cursor) sem buscar o restante.
+
+        Args:
+            data_inicio: Data inicial no formato ISO
+            data_fim: Data final no formato ISO
+            itens_por_pagina: Itens por página (padrão: 10)
+            max_paginas: Limite de páginas (None = sem limite)
+            crescente: Ordena por dtIncluido crescente (padrão: mais recentes primeiro)
+            **filtros: filiais, gateways, status_pagamentos
+
+        Yields:
+            Pagamentos de cada página, na ordem da API
+
+        Raises:
+            FonteIndisponivelError: se alguma página falhar
+        """
+        pagina = 1
+        try:
+            while max_paginas is None or pagina <= max_paginas:
+                lote = self._buscar_pagina(
+                    data_inicio, data_fim, pagina, itens_por_pagina, crescente=crescente, **filtros
+                )
+                yield lote
+                if len(lote) < itens_por_pagina:
+                    return
+                pagina += 1
+        except requests.exceptions.RequestException as e:
+            raise FonteIndisponivelError("maxpayment", str(e)) from e
+        except FonteIndisponivelError as e:
+            raise FonteIndisponivelError("maxpayment", e.motivo) from e
+
+    def buscar_todas_paginas(
+        self,
+        data_inicio: str,
+        data_fim: str,
+        itens_por_pagina: int = 100,
+        paginas_prontas: Optional[Dict[int, List[Pagamento]]] = None,
+        ao_receber_pagina: Optional[Callable[[int, List[Pagamento]], None]] = None,
+        **filtros
+    ) -> List[Pagamento]:
+        """
+        Busca todas as páginas de um período.
+        Após a primeira página, as seguintes são buscadas em paralelo, em ondas
+        do tamanho do limite de concorrência atual da MaxPayment (AIMD).
+        
+        Args:
+            data_inicio: Data inicial no formato ISO
+            data_fim: Data final no formato ISO
+            itens_por_pagina: Itens por página (padrão: 100)
+            paginas_prontas: Páginas já obtidas (ex.: do diário de execução), não buscadas de novo
+            ao_receber_pagina: Chamado na thread principal, em ordem, para cada página buscada
+            **filtros: filiais, gateways, status_pagamentos
+        
+        Returns:
+            Lista de pagamentos de todas as páginas, na ordem da API
+
+        Raises:
+            FonteIndisponivelError: se alguma página falhar (evita resultado parcial silencioso)
+        """
+        pagamentos: List[Pagamento] = []
+        prontas = paginas_prontas or {}
+
+        try:
+            primeira = prontas.get(1)
+            if primeira is None:
+                primeira = self._buscar_pagina(data_inicio, data_fim, 1, itens_por_pagina, **filtros)
+                if ao_receber_pagina:
+                    ao_receber_pagina(1, primeira)
+            pagamentos.extend(primeira)
+            progresso.avancar(len(primeira))
+            if len(primeira) < itens_por_pagina:
+                return pagamentos
+
+            controlador = obter_limitador(self.base_url).controlador
+            proxima = 2
+
+            with ThreadPoolExecutor(max_workers=controlador.maximo) as executor:
+                while True:
+                    onda = range(proxima, proxima + controlador.limite)
+                    futuros = [
+                        prontas[pagina] if pagina in prontas else executor.submit(
+                            contextvars.copy_context().run,
+                            self._buscar_pagina, data_inicio, data_fim, pagina, itens_por_pagina,
+                            **filtros
+                        )
+                        for pagina in onda
+                    ]
+
+                    for pagina, futuro in zip(onda, futuros):
+                        if isinstance(futuro, list):
+                            lote = futuro
+                        else:
+                            lote = futuro.result()
+                            if ao_receber_pagina:
+                                ao_receber_pagina(pagina, lote)
+                        pagamentos.extend(lote)
+                        progresso.avancar(len(lote))
+                        if len(lote) < itens_por_pagina:
+                            return pagamentos
+
+                    proxima += len(onda)
+
+        except requests.exceptions.RequestException as e:
+            log.error(
+                f"❌ Erro ao buscar pagamentos (após {len(pagamentos)} recebidos): {e}",
+                stage="payment_fetch",
+            )
+            raise FonteIndisponivelError("maxpayment", str(e)) from e
+        except FonteIndisponivelError as e:
+            raise FonteIndisponivelError("maxpayment", e.motivo) from e
+
+    def buscar_pagamentos_janelas(
+        self,
+        janelas: List[Janela],
+        diario: Optional[DiarioExecucao] = None,
+        **kwargs
+    ) -> List[Pagamento]:
+        """
+        Busca os pagamentos de várias janelas, uma consulta paginada por janela
+
+        As janelas não se sobrepõem, então cada pagamento vem uma única vez;
+        janelas encerradas ficam em cache como imutáveis e não são baixadas
+        de novo em execuções seguintes.
+
+        Com `diario`, as páginas de janelas encerradas são registradas e, ao
+        retomar uma execução interrompida, as já registradas não são buscadas
+        de novo (independe do cache HTTP, que muda com o token).
+
+        Args:
+            janelas: Janelas do planejador (utils.janelas)
+            diario: Diário da execução (retomada com --retomar)
+            **kwargs: Argumentos adicionais para buscar_todas_paginas
+
+        Returns:
+            Pagamentos da janela mais recente para a mais antiga (ordem da API)
+
+        Raises:
+            FonteIndisponivelError: se alguma janela falhar
+        """
+        pagamentos: List[Pagamento] = []
+        for janela in sorted(janelas, reverse=True):
+            if diario is None or not janela.fechada():
+                pagamentos.extend(self.buscar_todas_paginas(
+                    data_inicio=janela.data_inicio_api,
+                    data_fim=janela.data_fim_api,
+                    **kwargs
+                ))
+                continue
+
+            chave = f"{janela.data_inicio_api}/{janela.data_fim_api}"
+            prontas = {
+                pagina: [Pagamento(**item) for item in itens]
+                for pagina, itens in diario.paginas_janela(chave).items()
+            }
+            lote = self.buscar_todas_paginas(
+                data_inicio=janela.data_inicio_api,
+                data_fim=janela.data_fim_api,
+                paginas_prontas=prontas,
+                ao_receber_pagina=lambda pagina, itens, chave=chave: diario.registrar_pagina(
+                    chave, pagina, [p.to_dict() for p in itens]
+                ),
+                **kwargs
+            )
+            if not diario.janela_concluida(chave):
+                diario.concluir_janela(chave, len(lote))
+            pagamentos.extend(lote)
+        return pagamentos
+
     def buscar_pagamentos_ultimos_dias(
         self,
         dias: int = 0,
+        granularidade: Optional[str] = None,
         **kwargs
     ) -> List[Pagamento]:
         """
-        Busca pagamentos dos últimos N dias
+        Busca pagamentos de um dia no fuso da operação (America/Sao_Paulo)
         
         Args:
             dias: Número de dias para trás (0 = hoje, 1 = ontem, etc)
-            **kwargs: Argumentos adicionais para buscar_pagamentos_por_periodo
+            granularidade: "dia" ou "hora" (padrão: JANELA_GRANULARIDADE ou "dia");
+                           com "hora", as horas já encerradas vêm do cache
+            **kwargs: Argumentos adicionais para buscar_todas_paginas
         
         Returns:
             Lista de pagamentos
         """
-        agora = datetime.utcnow()
-        data_alvo = agora - timedelta(days=dias)
-        
-        # Formata para ISO 8601 com UTC (Z = Zulu = UTC)
-        data_inicio = data_alvo.strftime("%Y-%m-%dT00:00:00.000Z")
-        data_fim = data_alvo.strftime("%Y-%m-%dT23:59:59.999Z")
-
-        return self.buscar_pagamentos_por_periodo(
-            data_inicio=data_inicio,
-            data_fim=data_fim,
-            **kwargs
+        agora = agora_local()
+        janelas = janelas_do_dia(
+            (agora - timedelta(days=dias)).date(),
+            granularidade or os.getenv("JANELA_GRANULARIDADE", "dia"),
+            agora,
         )
+        return self.buscar_pagamentos_janelas(janelas, **kwargs)
@@ -1,8 +1,10 @@
+import os
 from datetime import datetime
-from typing import List, Tuple
+from typing import Container, Iterable, List, Optional, Tuple
 from models.pagamento import Pagamento
 from models.pedido_winthor import PedidoWinthor
 from models.resultado_confronto import ResultadoConfrontoPagamentos, ResultadoConfrontoPedido
+from utils.indice_pedidos import IndicePedidos
 
 
 class ReconciliationService:
@@ -11,7 +13,8 @@ class ReconciliationService:
     @staticmethod
     def confrontar_pagamentos(
         pagamentos: List[Pagamento],
-        pedidos_winthor: List[PedidoWinthor]
+        pedidos_winthor: List[PedidoWinthor],
+        indice: Optional[Container[str]] = None
     ) -> ResultadoConfrontoPagamentos:
         """
         Realiza o confronto entre pagamentos processados e pedidos importados no Winthor.
@@ -20,13 +23,49 @@ class ReconciliationService:
         Args:
             pagamentos: Lista de pagamentos processados
             pedidos_winthor: Lista de pedidos importados no Winthor
+            indice: Números do Winthor já indexados (ver numeros_winthor); evita
+                    reconstruir o índice quando o mesmo snapshot é usado mais de uma vez
         
         Returns:
             ResultadoConfrontoPagamentos com os resultados
         """
         # Mapeia números de pedidos do Winthor para acesso rápido
-        numeros_winthor = {p.numero_pedido.strip() for p in pedidos_winthor}
+        if indice is None:
+            indice = ReconciliationService.numeros_winthor(pedidos_winthor)
 
+        return ReconciliationService.confrontar_com_numeros(pagamentos, indice)
+
+    @staticmethod
+    def numeros_winthor(pedidos_winthor: Iterable[PedidoWinthor]) -> Container[str]:
+        """
+        Índice dos números de pedido presentes no Winthor
+
+        Até INDICE_COMPACTO_MINIMO pedidos (padrão 200000) usa um set; acima
+        disso usa IndicePedidos (array ordenado de inteiros), que ocupa uma
+        fração da memória em snapshots de vários meses. INDICE_BLOOM_BITS
+        (padrão 0) ativa o filtro de Bloom com esse número de bits por pedido.
+        """
+        numeros = [p.numero_pedido.strip() for p in pedidos_winthor]
+        if len(numeros) < int(os.getenv("INDICE_COMPACTO_MINIMO", "200000")):
+            return set(numeros)
+        return IndicePedidos.construir(numeros, int(os.getenv("INDICE_BLOOM_BITS", "0")))
+
+    @staticmethod
+    def confrontar_com_numeros(
+        pagamentos: List[Pagamento],
+        numeros_winthor: Container[str]
+    ) -> ResultadoConfrontoPagamentos:
+        """
+        Confronta pagamentos com um conjunto já montado de números do Winthor
+        (permite reaproveitar o conjunto entre chamadas e processos)
+        
+        Args:
+            pagamentos: Lista de pagamentos processados
+            numeros_winthor: Números de pedido importados no Winthor (set ou IndicePedidos)
+        
+        Returns:
+            ResultadoConfrontoPagamentos com os resultados
+        """
         resultado = ResultadoConfrontoPagamentos(
             data_processamento=datetime.now().isoformat(),
             total_pagamentos=len(pagamentos),
@@ -67,7 +106,8 @@ class ReconciliationService:
     @staticmethod
     def obter_pendentes_winthor(
         pagamentos: List[Pagamento],
-        pedidos_winthor: List[PedidoWinthor]
+        pedidos_winthor: List[PedidoWinthor],
+        indice: Optional[Container[str]] = None
     ) -> Tuple[List[Pagamento], List[PedidoWinthor]]:
         """
         Identifica quais pagamentos não foram integrados (não estão no Winthor).
@@ -75,11 +115,12 @@ class ReconciliationService:
         Args:
             pagamentos: Lista de pagamentos
             pedidos_winthor: Lista de pedidos no Winthor
+            indice: Números do Winthor já indexados (opcional, ver numeros_winthor)
         
         Returns:
             Tupla com (pagamentos_pendentes, todos_os_pedidos_winthor)
         """
-        numeros_winthor = {p.numero_pedido.strip() for p in pedidos_winthor}
+        numeros_winthor = indice if indice is not None else ReconciliationService.numeros_winthor(pedidos_winthor)
         pendentes = [
             p for p in pagamentos
             if str(p.codigo_pedido_maxima).strip() not in numeros_winthor
@@ -0,0 +1,87 @@
+import json
+import os
+from typing import List, Optional, Tuple
+from models.pagamento import Pagamento
+from models.pedido_winthor import PedidoWinthor
+from services.payment_service import PaymentService
+from services.winthor_service import WinthorService
+from utils.indice_pedidos import IndicePedidos
+from utils.logger import log
+from utils.response_archive import ArquivoRespostas, diretorio_padrao
+
+
+class ReplayService:
+    """Reconstrói os dados de uma execução a partir do arquivo de respostas (sem rede)"""
+
+    @staticmethod
+    def carregar_execucao(
+        run_id: str,
+        diretorio: Optional[str] = None
+    ) -> Tuple[List[Pagamento], List[PedidoWinthor]]:
+        """
+        Lê as respostas arquivadas de uma execução
+
+        Args:
+            run_id: Identificador da execução arquivada
+            diretorio: Pasta do arquivo (padrão: logs/arquivo)
+
+        Returns:
+            Tupla com (pagamentos, pedidos_winthor) exatamente como recebidos na execução
+        """
+        return (
+            ReplayService.carregar_pagamentos(run_id, diretorio),
+            ReplayService.carregar_pedidos_winthor(run_id, diretorio),
+        )
+
+    @staticmethod
+    def carregar_corpos_maxpayment(run_id: str, diretorio: Optional[str] = None) -> List[bytes]:
+        """Páginas da MaxPayment sem decodificar (para o confronto em processos)"""
+        return list(ArquivoRespostas.ler_respostas(diretorio or diretorio_padrao(), run_id, "maxpayment"))
+
+    @staticmethod
+    def carregar_pagamentos(run_id: str, diretorio: Optional[str] = None) -> List[Pagamento]:
+        """Pagamentos da execução arquivada, na ordem em que foram recebidos"""
+        pagamentos: List[Pagamento] = []
+        for corpo in ReplayService.carregar_corpos_maxpayment(run_id, diretorio):
+            pagamentos.extend(PaymentService.extrair_pagamentos(json.loads(corpo)))
+        return pagamentos
+
+    @staticmethod
+    def carregar_pedidos_winthor(run_id: str, diretorio: Optional[str] = None) -> List[PedidoWinthor]:
+        """Pedidos do Winthor da execução arquivada, um por número"""
+        # Respostas do /imported e das filiais podem se sobrepor: mantém um pedido por número
+        pedidos: dict = {}
+        for corpo in ArquivoRespostas.ler_respostas(diretorio or diretorio_padrao(), run_id, "winthor"):
+            for pedido in WinthorService.extrair_pedidos(json.loads(corpo)):
+                pedidos.setdefault(pedido.numero_pedido, pedido)
+        return list(pedidos.values())
+
+    @staticmethod
+    def carregar_indice_winthor(run_id: str, diretorio: Optional[str] = None) -> IndicePedidos:
+        """
+        Índice compacto dos pedidos Winthor da execução
+
+        Na primeira vez é montado a partir das respostas arquivadas e salvo em
+        indices/<run_id>.idx; nos reprocessamentos seguintes o arquivo é aberto
+        via mmap, sem decodificar o snapshot do Winthor de novo.
+
+        Args:
+            run_id: Identificador da execução arquivada
+            diretorio: Pasta do arquivo (padrão: logs/arquivo)
+
+        Returns:
+            IndicePedidos com os números de pedido do Winthor
+        """
+        diretorio = diretorio or diretorio_padrao()
+        caminho = os.path.join(diretorio, "indices", f"{run_id}.idx")
+
+        if os.path.exists(caminho):
+            try:
+                return IndicePedidos.carregar(caminho)
+            except ValueError as e:
+                log.warning(f"Índice do Winthor descartado ({e})")
+
+        pedidos = ReplayService.carregar_pedidos_winthor(run_id, diretorio)
+        indice = IndicePedidos.construir(p.numero_pedido for p in pedidos)
+        indice.salvar(caminho)
+        return indice
@@ -0,0 +1,261 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from models.resultado_confronto import ResultadoConfrontoPagamentos, ResultadoConfrontoPedido
+from services.winthor_service import WinthorService
+from utils.circuit_breaker import FonteIndisponivelError
+from utils.logger import log
+
+PENDENTE = "PENDENTE"
+REJEITADO_CONFIRMADO = "REJEITADO_CONFIRMADO"
+
+
+@dataclass
+class ItemReverificacao:
+    """Pedido rejeitado aguardando nova consulta ao Winthor"""
+    pedido: ResultadoConfrontoPedido
+    rejeitado_em: str
+    proxima_verificacao: float
+    tentativas: int = 0
+    status: str = PENDENTE
+
+    @property
+    def numero_pedido(self) -> str:
+        return self.pedido.numero_pedido
+
+    def to_dict(self) -> dict:
+        return {
+            "pedido": self.pedido.to_dict(),
+            "rejeitado_em": self.rejeitado_em,
+            "proxima_verificacao": self.proxima_verificacao,
+            "tentativas": self.tentativas,
+            "status": self.status,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ItemReverificacao":
+        return cls(
+            pedido=ResultadoConfrontoPedido(**data["pedido"]),
+            rejeitado_em=data["rejeitado_em"],
+            proxima_verificacao=data["proxima_verificacao"],
+            tentativas=data.get("tentativas", 0),
+            status=data.get("status", PENDENTE),
+        )
+
+
+@dataclass
+class ResumoReverificacao:
+    """Resultado de uma rodada de reverificação"""
+    verificados: int = 0
+    integrados: List[ItemReverificacao] = field(default_factory=list)
+    confirmados: List[ItemReverificacao] = field(default_factory=list)
+    adiados: int = 0
+    pendentes: int = 0
+
+    def resumo(self) -> str:
+        return (
+            f"Reverificados: {self.verificados} | "
+            f"Integrados com atraso: {len(self.integrados)} ✅ | "
+            f"Rejeição confirmada: {len(self.confirmados)} ❌ | "
+            f"Aguardando: {self.pendentes}"
+            + (f" | Adiados (Winthor indisponível): {self.adiados}" if self.adiados else "")
+        )
+
+
+class FilaReverificacao:
+    """
+    Fila persistente de pedidos rejeitados para reverificação no Winthor
+
+    Muitos REJEITADO são apenas importações atrasadas. Cada pedido rejeitado é
+    consultado de novo individualmente (HEAD /items/{numero}) em intervalos
+    exponenciais (base, 2×base, 4×base... até o máximo); só depois de
+    `max_tentativas` consultas sem encontrá-lo ele passa a REJEITADO_CONFIRMADO.
+    Falhas de comunicação não contam como tentativa.
+    """
+
+    def __init__(
+        self,
+        arquivo: Optional[str] = None,
+        intervalo_base: Optional[float] = None,
+        intervalo_maximo: Optional[float] = None,
+        max_tentativas: Optional[int] = None,
+        retencao_dias: int = 7,
+    ):
+        """
+        Args:
+            arquivo: JSON da fila (padrão: logs/.cache/fila_reverificacao.json)
+            intervalo_base: Segundos até a 1ª reverificação (REVERIFICACAO_INTERVALO, padrão 300)
+            intervalo_maximo: Teto do intervalo exponencial (REVERIFICACAO_INTERVALO_MAXIMO, padrão 21600)
+            max_tentativas: Consultas até confirmar a rejeição (REVERIFICACAO_TENTATIVAS, padrão 5)
+            retencao_dias: Dias que um pedido fica na fila (evita reinserir confirmados)
+        """
+        self.arquivo = arquivo or os.path.join(log.log_dir, ".cache", "fila_reverificacao.json")
+        self.intervalo_base = intervalo_base if intervalo_base is not None else float(
+            os.getenv("REVERIFICACAO_INTERVALO", "300"))
+        self.intervalo_maximo = intervalo_maximo if intervalo_maximo is not None else float(
+            os.getenv("REVERIFICACAO_INTERVALO_MAXIMO", "21600"))
+        self.max_tentativas = max_tentativas if max_tentativas is not None else int(
+            os.getenv("REVERIFICACAO_TENTATIVAS", "5"))
+        self.retencao_dias = retencao_dias
+        self.itens: Dict[str, ItemReverificacao] = {}
+        self._lock = threading.Lock()
+        self._carregar()
+
+    def _intervalo(self, tentativas: int) -> float:
+        """Espera até a próxima consulta após `tentativas` consultas sem sucesso"""
+        return min(self.intervalo_base * (2 ** tentativas), self.intervalo_maximo)
+
+    @property
+    def pendentes(self) -> List[ItemReverificacao]:
+        return [i for i in self.itens.values() if i.status == PENDENTE]
+
+    @property
+    def confirmados(self) -> List[ItemReverificacao]:
+        return [i for i in self.itens.values() if i.status == REJEITADO_CONFIRMADO]
+
+    def adicionar_rejeitados(self, resultado: ResultadoConfrontoPagamentos) -> int:
+        """
+        Coloca na fila os rejeitados de um confronto e retira os que agora
+        aparecem como integrados
+
+        Args:
+            resultado: Resultado completo do confronto
+
+        Returns:
+            Quantidade de pedidos novos na fila
+        """
+        if not resultado.completo:
+            return 0
+
+        agora = time.time()
+        novos = 0
+        with self._lock:
+            for pedido in resultado.pedidos:
+                item = self.itens.get(pedido.numero_pedido)
+                if pedido.status == "INTEGRADO":
+                    if item is not None:
+                        del self.itens[pedido.numero_pedido]
+                elif item is None:
+                    self.itens[pedido.numero_pedido] = ItemReverificacao(
+                        pedido=pedido,
+                        rejeitado_em=datetime.now().isoformat(),
+                        proxima_verificacao=agora + self._intervalo(0),
+                    )
+                    novos += 1
+        if novos:
+            log.info(f"🔁 {novos} pedidos rejeitados na fila de reverificação", stage="retry_queue")
+        return novos
+
+    def processar_vencidos(
+        self,
+        winthor_service: WinthorService,
+        max_workers: int = 8,
+        tamanho_lote: int = 50
+    ) -> ResumoReverificacao:
+        """
+        Consulta no Winthor os pedidos cuja próxima verificação venceu, em
+        lotes concorrentes
+
+        Args:
+            winthor_service: Serviço do Winthor
+            max_workers: Consultas simultâneas
+            tamanho_lote: Pedidos por lote (entre lotes o circuit breaker pode abrir
+                          e os restantes são adiados sem esperar timeouts)
+
+        Returns:
+            ResumoReverificacao da rodada
+        """
+        agora = time.time()
+        with self._lock:
+            vencidos = sorted(
+                (i for i in self.itens.values() if i.status == PENDENTE and i.proxima_verificacao <= agora),
+                key=lambda i: i.proxima_verificacao,
+            )
+
+        resumo = ResumoReverificacao()
+
+        def consultar(item: ItemReverificacao) -> Optional[bool]:
+            try:
+                return winthor_service.pedido_existe(item.numero_pedido)
+            except FonteIndisponivelError:
+                return None
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="reverificacao") as executor:
+            for inicio in range(0, len(vencidos), tamanho_lote):
+                lote = vencidos[inicio:inicio + tamanho_lote]
+                futuros = [
+                    executor.submit(contextvars.copy_context().run, consultar, item)
+                    for item in lote
+                ]
+                for item, futuro in zip(lote, futuros):
+                    self._registrar(item, futuro.result(), resumo)
+
+        with self._lock:
+            self._expurgar()
+            resumo.pendentes = len(self.pendentes)
+        self.salvar()
+
+        if vencidos:
+            log.info(f"🔁 {resumo.resumo()}", stage="retry_queue")
+        return resumo
+
+    def _registrar(self, item: ItemReverificacao, existe: Optional[bool], resumo: ResumoReverificacao) -> None:
+        agora = time.time()
+        with self._lock:
+            if existe is None:
+                # Winthor indisponível: não conta como tentativa
+                item.proxima_verificacao = agora + self._intervalo(0)
+                resumo.adiados += 1
+                return
+
+            resumo.verificados += 1
+            if existe:
+                self.itens.pop(item.numero_pedido, None)
+                resumo.integrados.append(item)
+                return
+
+            item.tentativas += 1
+            if item.tentativas >= self.max_tentativas:
+                item.status = REJEITADO_CONFIRMADO
+                resumo.confirmados.append(item)
+            else:
+                item.proxima_verificacao = agora + self._intervalo(item.tentativas)
+
+    def _expurgar(self) -> None:
+        """Remove itens mais antigos que a retenção"""
+        limite = (datetime.now() - timedelta(days=self.retencao_dias)).isoformat()
+        for numero in [n for n, i in self.itens.items() if i.rejeitado_em < limite]:
+            del self.itens[numero]
+
+    def _carregar(self) -> None:
+        if not os.path.exists(self.arquivo):
+            return
+        try:
+            with open(self.arquivo, encoding="utf-8") as f:
+                dados = json.load(f)
+            self.itens = {
+                item["pedido"]["numero_pedido"]: ItemReverificacao.from_dict(item)
+                for item in dados.get("itens", [])
+            }
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            log.warning(f"Fila de reverificação ignorada ({e})", stage="retry_queue")
+
+    def salvar(self) -> None:
+        """Grava a fila em disco (escrita atômica)"""
+        with self._lock:
+            dados = {"itens": [item.to_dict() for item in self.itens.values()]}
+        try:
+            os.makedirs(os.path.dirname(self.arquivo), exist_ok=True)
+            temporario = self.arquivo + ".tmp"
+            with open(temporario, "w", encoding="utf-8") as f:
+                json.dump(dados, f, ensure_ascii=False)
+            os.replace(temporario, self.arquivo)
+        except OSError as e:
+            log.warning(f"Falha ao salvar fila de reverificação: {e}", stage="retry_queue")
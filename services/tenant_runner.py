@@ -0,0 +1,185 @@
+import contextvars
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional
+from models.resultado_confronto import ResultadoConfrontoPagamentos
+from models.tenant import Tenant
+from services.notification_service import NotificationService
+from services.payment_service import PaymentService
+from services.reconciliation_service import ReconciliationService
+from services.winthor_service import WinthorService
+from utils.circuit_breaker import FonteIndisponivelError
+from utils.logger import log
+from utils.metrics import metricas
+
+
+@dataclass
+class ResultadoTenant:
+    """Resultado da reconciliação de um tenant"""
+    tenant: str
+    resultado: Optional[ResultadoConfrontoPagamentos] = None
+    erro: Optional[str] = None
+    arquivo_relatorio: Optional[str] = None
+
+    @property
+    def sucesso(self) -> bool:
+        return self.erro is None and self.resultado is not None and self.resultado.completo
+
+    def to_dict(self) -> dict:
+        resultado = self.resultado
+        return {
+            "tenant": self.tenant,
+            "sucesso": self.sucesso,
+            "erro": self.erro,
+            "arquivo_relatorio": self.arquivo_relatorio,
+            "total_pagamentos": resultado.total_pagamentos if resultado else 0,
+            "total_integrados": resultado.total_integrados if resultado else 0,
+            "total_rejeitados": resultado.total_rejeitados if resultado else 0,
+            "percentual_integracao": resultado.percentual_integracao if resultado else 0.0,
+            "completo": resultado.completo if resultado else False,
+        }
+
+
+class TenantRunner:
+    """Reconcilia vários tenants em paralelo no mesmo processo"""
+
+    @staticmethod
+    def reconciliar_tenant(tenant: Tenant, diretorio_relatorios: str = "logs") -> ResultadoTenant:
+        """
+        Executa busca, confronto e relatórios de um tenant.
+        Tokens, cache e relatórios ficam isolados por tenant; as conexões HTTP,
+        limitadores e circuit breakers são compartilhados por host.
+
+        Args:
+            tenant: Configuração do tenant
+            diretorio_relatorios: Pasta base dos relatórios (um subdiretório por tenant)
+
+        Returns:
+            ResultadoTenant com o confronto ou o erro ocorrido
+        """
+        with log.contexto(tenant=tenant.nome):
+            faltando = tenant.variaveis_faltando
+            if faltando:
+                return ResultadoTenant(tenant.nome, erro=f"Configuração ausente: {', '.join(faltando)}")
+
+            try:
+                with metricas.etapa("payment_fetch") as etapa:
+                    pagamentos = PaymentService(
+                        tenant.maxpayment_api_url, tenant.maxima_auth_token
+                    ).buscar_pagamentos_ultimos_dias(
+                        dias=tenant.dias,
+                        itens_por_pagina=100,
+                        gateways=tenant.gateways,
+                    )
+                    etapa.adicionar_itens(len(pagamentos))
+
+                try:
+                    with metricas.etapa("winthor_fetch") as etapa:
+                        pedidos_winthor = WinthorService(
+                            tenant.winthor_api_url, tenant.winthor_auth_token
+                        ).buscar_pedidos_importados()
+                        etapa.adicionar_itens(len(pedidos_winthor))
+
+                    with metricas.etapa("reconcile") as etapa:
+                        resultado = ReconciliationService.confrontar_pagamentos(pagamentos, pedidos_winthor)
+                        etapa.adicionar_itens(resultado.total_pagamentos)
+                except FonteIndisponivelError as e:
+                    log.error(f"Confronto abortado: {e}")
+                    resultado = ResultadoConfrontoPagamentos.incompleto(len(pagamentos), [e.fonte])
+
+                diretorio = os.path.join(diretorio_relatorios, tenant.nome)
+                os.makedirs(diretorio, exist_ok=True)
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                sufixo = "" if resultado.completo else "_incompleto"
+                arquivo_json = os.path.join(diretorio, f"relatorio_confronto_{timestamp}{sufixo}.json")
+
+                with metricas.etapa("report_write") as etapa:
+                    NotificationService.salvar_relatorio_json(resultado, arquivo_json)
+                    if resultado.completo:
+                        NotificationService.salvar_relatorio_texto(
+                            resultado, arquivo_json[:-len(".json")] + ".txt"
+                        )
+                    etapa.adicionar_itens(len(resultado.pedidos))
+
+                log.info(resultado.resumo())
+                return ResultadoTenant(tenant.nome, resultado=resultado, arquivo_relatorio=arquivo_json)
+
+            except Exception as e:
+                log.error(f"Erro ao reconciliar tenant {tenant.nome}: {e}")
+                return ResultadoTenant(tenant.nome, erro=str(e))
+
+    @staticmethod
+    def executar(
+        tenants: List[Tenant],
+        max_workers: int = 4,
+        diretorio_relatorios: str = "logs"
+    ) -> List[ResultadoTenant]:
+        """
+        Reconcilia todos os tenants em um pool de threads compartilhado
+
+        Args:
+            tenants: Lista de tenants
+            max_workers: Quantidade de tenants processados simultaneamente
+            diretorio_relatorios: Pasta base dos relatórios
+
+        Returns:
+            Lista de ResultadoTenant na mesma ordem dos tenants
+        """
+        nomes = [t.nome for t in tenants]
+        if len(set(nomes)) != len(nomes):
+            raise ValueError("Nomes de tenants duplicados no arquivo de configuração")
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tenant") as executor:
+            futuros = [
+                executor.submit(
+                    contextvars.copy_context().run,
+                    TenantRunner.reconciliar_tenant, tenant, diretorio_relatorios
+                )
+                for tenant in tenants
+            ]
+            return [futuro.result() for futuro in futuros]
+
+    @staticmethod
+    def gerar_resumo_texto(resultados: List[ResultadoTenant]) -> str:
+        """Gera a tabela de resumo agregado (o total considera apenas confrontos completos)"""
+        linhas = []
+        linhas.append(f"{'TENANT':<20} | {'TOTAL':>7} | {'INTEGR.':>7} | {'REJEIT.':>7} | {'TAXA':>7} | STATUS")
+        linhas.append("-" * 80)
+
+        total = integrados = rejeitados = 0
+        for item in resultados:
+            if item.resultado is not None:
+                r = item.resultado
+                if r.completo:
+                    total += r.total_pagamentos
+                    integrados += r.total_integrados
+                    rejeitados += r.total_rejeitados
+                status = "✅" if r.completo else "⚠️  incompleto"
+                linhas.append(
+                    f"{item.tenant[:20]:<20} | {r.total_pagamentos:>7} | {r.total_integrados:>7} | "
+                    f"{r.total_rejeitados:>7} | {r.percentual_integracao:>6.2f}% | {status}"
+                )
+            else:
+                linhas.append(f"{item.tenant[:20]:<20} | {'-':>7} | {'-':>7} | {'-':>7} | {'-':>7} | ❌ {item.erro}")
+
+        taxa = round(integrados / total * 100, 2) if total else 0.0
+        linhas.append("-" * 80)
+        linhas.append(
+            f"{'TOTAL':<20} | {total:>7} | {integrados:>7} | {rejeitados:>7} | {taxa:>6.2f}% |"
+        )
+        return "\n".join(linhas)
+
+    @staticmethod
+    def salvar_resumo_json(resultados: List[ResultadoTenant], caminho_arquivo: str) -> None:
+        """Salva o resumo agregado em JSON"""
+        with open(caminho_arquivo, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "data_processamento": datetime.now().isoformat(),
+                    "tenants": [r.to_dict() for r in resultados],
+                },
+                f, indent=2, ensure_ascii=False,
+            )
@@ -0,0 +1,329 @@
+import contextvars
+import heapq
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Set, Tuple
+
+from models.pagamento import Pagamento
+from models.resultado_confronto import ResultadoConfrontoPedido
+from services.notification_service import NotificationService
+from services.payment_service import PaymentService
+from services.winthor_service import WinthorService
+from utils.circuit_breaker import FonteIndisponivelError
+from utils.janelas import formatar_utc, planejar_janelas
+from utils.logger import log
+
+
+@dataclass(order=True)
+class VerificacaoPendente:
+    """Pedido aguardando a nova consulta ao Winthor (ordenado pelo vencimento)"""
+    vencimento: float
+    pagamento: Pagamento = field(compare=False)
+    tentativas: int = field(default=0, compare=False)
+
+    @property
+    def numero_pedido(self) -> str:
+        return str(self.pagamento.codigo_pedido_maxima).strip()
+
+    def to_dict(self) -> dict:
+        return {
+            "vencimento": self.vencimento,
+            "tentativas": self.tentativas,
+            "pagamento": self.pagamento.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "VerificacaoPendente":
+        return cls(
+            vencimento=data["vencimento"],
+            pagamento=Pagamento(**data["pagamento"]),
+            tentativas=data.get("tentativas", 0),
+        )
+
+
+class WatchService:
+    """
+    Monitoramento contínuo de pagamentos novos (modo watch)
+
+    A cada `intervalo` segundos consulta a MaxPayment com páginas pequenas,
+    ordenadas por dtIncluido crescente a partir do último pagamento já visto
+    (cursor). Cada pagamento novo entra em uma fila de prioridade (heap)
+    pelo horário de vencimento da carência; ao vencer, o pedido é consultado
+    no Winthor e só gera alerta se ainda estiver ausente.
+    """
+
+    def __init__(
+        self,
+        payment_service: PaymentService,
+        winthor_service: WinthorService,
+        carencia: float = 600.0,
+        intervalo: float = 60.0,
+        itens_por_pagina: int = 20,
+        gateways: str = "3",
+        max_paginas: int = 50,
+        arquivo_estado: Optional[str] = None,
+        arquivo_alertas: Optional[str] = None,
+    ):
+        """
+        Args:
+            payment_service: Serviço da MaxPayment
+            winthor_service: Serviço do Winthor
+            carencia: Segundos entre o pagamento ser visto e a consulta ao Winthor
+            intervalo: Segundos entre consultas à MaxPayment
+            itens_por_pagina: Tamanho das páginas de consulta (pequeno = consulta barata)
+            gateways: Filtro de gateways da MaxPayment
+            max_paginas: Limite de páginas por consulta (protege contra cursor perdido)
+            arquivo_estado: JSON com cursor e fila pendente (retomada após reinício)
+            arquivo_alertas: JSONL onde os alertas são registrados
+        """
+        self.payment_service = payment_service
+        self.winthor_service = winthor_service
+        self.carencia = carencia
+        self.intervalo = intervalo
+        self.itens_por_pagina = itens_por_pagina
+        self.gateways = gateways
+        self.max_paginas = max_paginas
+        self.arquivo_estado = arquivo_estado or os.path.join(log.log_dir, ".cache", "watch_estado.json")
+        self.arquivo_alertas = arquivo_alertas or os.path.join(log.log_dir, "alertas_watch.jsonl")
+
+        self.cursor: Optional[datetime] = None
+        self.vistos_no_cursor: Set[str] = set()
+        self.pendentes: List[VerificacaoPendente] = []
+        self._carregar_estado()
+
+    @staticmethod
+    def _data_pagamento(pagamento: Pagamento) -> Optional[datetime]:
+        """dtIncluido como datetime com fuso (sem fuso informado = UTC)"""
+        valor = pagamento.data_pagamento
+        if not valor:
+            return None
+        try:
+            data = datetime.fromisoformat(valor.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        return data if data.tzinfo else data.replace(tzinfo=timezone.utc)
+
+    def buscar_novos(self) -> List[Pagamento]:
+        """
+        Busca os pagamentos incluídos depois do cursor e avança o cursor
+
+        Na primeira consulta (sem estado salvo) apenas define o cursor no
+        pagamento mais recente, sem agendar o histórico do dia. Depois, as
+        páginas vêm em ordem crescente de dtIncluido a partir do cursor: se o
+        limite de páginas for atingido, o cursor para no último pagamento
+        recebido e o restante vem na próxima consulta.
+
+        Returns:
+            Pagamentos novos, do mais antigo para o mais recente
+
+        Raises:
+            FonteIndisponivelError: se a MaxPayment não responder
+        """
+        agora = datetime.now(timezone.utc)
+        # Dia no fuso da operação: pagamentos da noite não caem no "amanhã" UTC
+        hoje = planejar_janelas(agora, agora + timedelta(microseconds=1), "dia")[0]
+        primeira_consulta = self.cursor is None
+        paginas = self.payment_service.iterar_paginas(
+            formatar_utc(self.cursor or hoje.inicio),
+            hoje.data_fim_api,
+            self.itens_por_pagina,
+            # Na primeira consulta basta a página mais recente para posicionar o cursor
+            max_paginas=1 if primeira_consulta else self.max_paginas,
+            crescente=not primeira_consulta,
+            gateways=self.gateways,
+        )
+
+        novos: List[Pagamento] = []
+        numeros: Set[str] = set()
+        lidas = 0
+        lote: List[Pagamento] = []
+        for lote in paginas:
+            lidas += 1
+            for pagamento in lote:
+                data = self._data_pagamento(pagamento)
+                numero = str(pagamento.codigo_pedido_maxima).strip()
+                if data is None or numero in numeros:
+                    continue
+                if self.cursor is not None:
+                    if data < self.cursor:
+                        continue
+                    if data == self.cursor and numero in self.vistos_no_cursor:
+                        continue
+                novos.append(pagamento)
+                numeros.add(numero)
+
+        if not primeira_consulta and lidas == self.max_paginas and len(lote) == self.itens_por_pagina:
+            log.warning(
+                f"Limite de {self.max_paginas} páginas atingido: cursor avança até o último pagamento "
+                f"recebido e o restante vem na próxima consulta",
+                stage="watch",
+            )
+
+        self._avancar_cursor(novos, agora)
+        return [] if primeira_consulta else novos
+
+    def _avancar_cursor(self, novos: List[Pagamento], agora: datetime) -> None:
+        datas = [(self._data_pagamento(p), str(p.codigo_pedido_maxima).strip()) for p in novos]
+        if not datas:
+            if self.cursor is None:
+                self.cursor = agora
+            return
+
+        mais_recente = max(data for data, _numero in datas)
+        no_cursor = {numero for data, numero in datas if data == mais_recente}
+        if mais_recente == self.cursor:
+            self.vistos_no_cursor |= no_cursor
+        else:
+            self.cursor = mais_recente
+            self.vistos_no_cursor = no_cursor
+
+    def agendar(self, pagamentos: List[Pagamento]) -> None:
+        """Agenda a consulta ao Winthor de cada pagamento para depois da carência"""
+        vencimento = time.time() + self.carencia
+        for pagamento in pagamentos:
+            heapq.heappush(self.pendentes, VerificacaoPendente(vencimento, pagamento))
+
+    def verificar_vencidos(self) -> Tuple[int, int]:
+        """
+        Consulta no Winthor, em paralelo, os pedidos cuja carência venceu
+
+        Pedidos encontrados saem da fila; ausentes geram alerta; falhas de
+        consulta voltam para a fila e são tentadas no próximo intervalo.
+
+        Returns:
+            Tupla (integrados, alertas)
+        """
+        agora = time.time()
+        vencidos: List[VerificacaoPendente] = []
+        while self.pendentes and self.pendentes[0].vencimento <= agora:
+            vencidos.append(heapq.heappop(self.pendentes))
+        if not vencidos:
+            return 0, 0
+
+        def consultar(item: VerificacaoPendente) -> Optional[bool]:
+            try:
+                return self.winthor_service.pedido_existe(item.numero_pedido)
+            except FonteIndisponivelError as e:
+                log.warning(f"Consulta do pedido {item.numero_pedido} adiada: {e}", stage="watch")
+                return None
+
+        with ThreadPoolExecutor(max_workers=min(len(vencidos), 8), thread_name_prefix="watch") as executor:
+            futuros = [
+                executor.submit(contextvars.copy_context().run, consultar, item)
+                for item in vencidos
+            ]
+            respostas = [futuro.result() for futuro in futuros]
+
+        integrados = alertas = 0
+        for item, existe in zip(vencidos, respostas):
+            if existe is None:
+                item.vencimento = time.time() + self.intervalo
+                item.tentativas += 1
+                heapq.heappush(self.pendentes, item)
+            elif existe:
+                integrados += 1
+            else:
+                alertas += 1
+                self._alertar(item)
+
+        log.info(
+            f"👀 {len(vencidos)} pedidos verificados: {integrados} integrados, {alertas} alertas, "
+            f"{len(self.pendentes)} aguardando",
+            stage="watch",
+        )
+        return integrados, alertas
+
+    def _alertar(self, item: VerificacaoPendente) -> None:
+        pagamento = item.pagamento
+        pedido = ResultadoConfrontoPedido(
+            codigo_filial=pagamento.codigo_filial,
+            numero_pedido=item.numero_pedido,
+            cliente=pagamento.nome_cliente,
+            status="REJEITADO",
+            detalhes={
+                "nome_filial": pagamento.nome_filial,
+                "valor": pagamento.valor,
+                "gateway": pagamento.gateway,
+                "data_pagamento": pagamento.data_pagamento,
+            },
+        )
+        data = self._data_pagamento(pagamento)
+        atraso = (datetime.now(timezone.utc) - data).total_seconds() / 60 if data else None
+        NotificationService.notificar_alerta_rejeitado(pedido, self.arquivo_alertas, atraso)
+
+    def executar_ciclo(self) -> None:
+        """Uma consulta à MaxPayment (falhas são registradas e tentadas no próximo ciclo)"""
+        try:
+            novos = self.buscar_novos()
+        except FonteIndisponivelError as e:
+            log.warning(f"Consulta de pagamentos novos falhou: {e}", stage="watch")
+            return
+
+        if novos:
+            self.agendar(novos)
+            log.info(
+                f"👀 {len(novos)} pagamentos novos; verificação no Winthor em {self.carencia / 60:.0f} min",
+                stage="watch",
+            )
+
+    def executar(self, max_ciclos: Optional[int] = None) -> None:
+        """
+        Laço principal: consulta a cada `intervalo` e dorme até a próxima
+        consulta ou o próximo vencimento, o que vier primeiro
+
+        Args:
+            max_ciclos: Quantidade de consultas antes de encerrar (None = indefinido)
+        """
+        ciclos = 0
+        proxima_consulta = 0.0
+        with log.contexto(stage="watch"):
+            while True:
+                if time.time() >= proxima_consulta:
+                    self.executar_ciclo()
+                    ciclos += 1
+                    proxima_consulta = time.time() + self.intervalo
+
+                self.verificar_vencidos()
+                self._salvar_estado()
+
+                if max_ciclos is not None and ciclos >= max_ciclos:
+                    return
+
+                proximo = min(proxima_consulta, self.pendentes[0].vencimento) if self.pendentes else proxima_consulta
+                time.sleep(max(proximo - time.time(), 0.0))
+
+    def _carregar_estado(self) -> None:
+        if not os.path.exists(self.arquivo_estado):
+            return
+        try:
+            with open(self.arquivo_estado, encoding="utf-8") as f:
+                estado = json.load(f)
+            self.cursor = datetime.fromisoformat(estado["cursor"]) if estado.get("cursor") else None
+            self.vistos_no_cursor = set(estado.get("vistos_no_cursor", []))
+            self.pendentes = [VerificacaoPendente.from_dict(p) for p in estado.get("pendentes", [])]
+            heapq.heapify(self.pendentes)
+            log.info(
+                f"👀 Estado do watch retomado: cursor {estado.get('cursor')}, {len(self.pendentes)} pendentes",
+                stage="watch",
+            )
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            log.warning(f"Estado do watch ignorado ({e})", stage="watch")
+
+    def _salvar_estado(self) -> None:
+        estado = {
+            "cursor": self.cursor.isoformat() if self.cursor else None,
+            "vistos_no_cursor": sorted(self.vistos_no_cursor),
+            "pendentes": [p.to_dict() for p in self.pendentes],
+        }
+        try:
+            os.makedirs(os.path.dirname(self.arquivo_estado), exist_ok=True)
+            temporario = self.arquivo_estado + ".tmp"
+            with open(temporario, "w", encoding="utf-8") as f:
+                json.dump(estado, f, ensure_ascii=False)
+            os.replace(temporario, self.arquivo_estado)
+        except OSError as e:
+            log.warning(f"Falha ao salvar estado do watch: {e}", stage="watch")
@@ -1,24 +1,43 @@
+import json
+import os
+import threading
 import requests
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from models.pedido_winthor import PedidoWinthor
+from utils.circuit_breaker import FonteIndisponivelError
+from utils.http_client import requisitar
+from utils.logger import log
+
+
+def _autenticacao_aceita(status: int) -> bool:
+    """Só respostas 2xx/304 confirmam que o esquema de autenticação foi aceito"""
+    return 200 <= status < 300 or status == 304
 
 
 class WinthorService:
     """Serviço para consultar pedidos importados no Winthor"""
 
-    def __init__(self, base_url: str, auth_token: str, auth_type: str = "Bearer"):
+    # Esquema de autenticação aceito por cada base URL (memória + disco)
+    _esquemas_negociados: Dict[str, str] = {}
+    _lock_esquemas = threading.Lock()
+
+    def __init__(self, base_url: str, auth_token: str, auth_type: Optional[str] = None):
         """
         Inicializa o serviço do Winthor
         
         Args:
             base_url: URL base da API do Winthor
             auth_token: Token de autenticação
-            auth_type: Tipo de autenticação ("Bearer" ou "Basic")
+            auth_type: Tipo de autenticação ("Bearer" ou "Basic"). Se omitido, usa o
+                       esquema já negociado para esta URL ou "Bearer"
         """
         self.base_url = base_url.rstrip('/')
         self.auth_token = self._limpar_token(auth_token)
-        self.auth_type = auth_type
+        self.auth_type = auth_type or self._esquema_negociado(self.base_url) or "Bearer"
         self.headers = self._preparar_headers()
+        self.cache_ttl = float(os.getenv("WINTHOR_CACHE_TTL", "0"))
+        # Serializa a renegociação entre threads (lotes da reverificação, sync por filial)
+        self._lock_auth = threading.Lock()
 
     @staticmethod
     def _limpar_token(token: str) -> str:
@@ -35,41 +54,124 @@ class WinthorService:
             "Authorization": f"{self.auth_type} {self.auth_token}",
         }
 
+    @staticmethod
+    def _arquivo_esquemas() -> str:
+        return os.path.join(log.log_dir, ".cache", "winthor_auth.json")
+
+    @classmethod
+    def _esquema_negociado(cls, base_url: str) -> Optional[str]:
+        """Esquema de autenticação já aceito pela base URL (em memória ou persistido)"""
+        with cls._lock_esquemas:
+            if not cls._esquemas_negociados:
+                try:
+                    with open(cls._arquivo_esquemas(), encoding="utf-8") as f:
+                        cls._esquemas_negociados.update(json.load(f))
+                except (OSError, ValueError):
+                    pass
+            return cls._esquemas_negociados.get(base_url)
+
+    @classmethod
+    def _salvar_esquema(cls, base_url: str, esquema: str) -> None:
+        with cls._lock_esquemas:
+            if cls._esquemas_negociados.get(base_url) == esquema:
+                return
+            cls._esquemas_negociados[base_url] = esquema
+            arquivo = cls._arquivo_esquemas()
+            try:
+                os.makedirs(os.path.dirname(arquivo), exist_ok=True)
+                with open(arquivo + ".tmp", "w", encoding="utf-8") as f:
+                    json.dump(cls._esquemas_negociados, f, indent=2)
+                os.replace(arquivo + ".tmp", arquivo)
+            except OSError as e:
+                log.warning(f"Falha ao salvar esquema de autenticação do Winthor: {e}")
+
+    def _requisitar(
+        self,
+        metodo: str,
+        endpoint: str,
+        cabecalhos: Optional[Dict[str, str]] = None,
+        **kwargs
+    ) -> requests.Response:
+        """
+        Executa a requisição com o esquema de autenticação negociado.
+        Em 401, tenta o esquema alternativo (Bearer/Basic) e, se aceito,
+        guarda-o para as próximas requisições e instâncias. Um esquema só é
+        considerado aceito com resposta 2xx/304: erros do servidor (5xx, 429,
+        páginas de erro) não provam que a autenticação funcionou.
+
+        A renegociação é feita sob um lock da instância: uma thread que recebe
+        401 com um esquema que outra thread já trocou apenas repete a
+        requisição com o esquema atual, sem inverter a troca.
+
+        Args:
+            cabecalhos: Cabeçalhos adicionais (ex.: If-None-Match)
+        """
+        headers = self.headers
+        response = requisitar(metodo, endpoint, headers={**headers, **(cabecalhos or {})}, **kwargs)
+
+        if response.status_code == 401:
+            esquema_usado = headers["Authorization"].split(" ", 1)[0]
+            with self._lock_auth:
+                if self.auth_type == esquema_usado:
+                    self.auth_type = "Basic" if esquema_usado == "Bearer" else "Bearer"
+                    self.headers = self._preparar_headers()
+                    response = requisitar(metodo, endpoint, headers={**self.headers, **(cabecalhos or {})}, **kwargs)
+
+                    if not _autenticacao_aceita(response.status_code):
+                        self.auth_type = esquema_usado
+                        self.headers = self._preparar_headers()
+                    else:
+                        log.info(f"Winthor: autenticação renegociada para {self.auth_type}", stage="winthor_fetch")
+                else:
+                    # Outra thread já renegociou enquanto esta requisição estava em voo
+                    response = requisitar(metodo, endpoint, headers={**self.headers, **(cabecalhos or {})}, **kwargs)
+                headers = self.headers
+
+        if _autenticacao_aceita(response.status_code):
+            self._salvar_esquema(self.base_url, headers["Authorization"].split(" ", 1)[0])
+
+        return response
+
+    @staticmethod
+    def extrair_pedidos(data_json: Any) -> List[PedidoWinthor]:
+        """Converte o corpo de uma resposta do Winthor (lista ou envelope) em PedidoWinthor"""
+        # Trata diferentes formatos de resposta
+        if isinstance(data_json, list):
+            data = data_json
+        else:
+            data = data_json.get("data", data_json.get("orders", data_json.get("items", [])))
+
+        if not data:
+            return []
+
+        return PedidoWinthor.from_list(data)
+
     def buscar_pedidos_importados(self) -> List[PedidoWinthor]:
         """
         Busca todos os pedidos do dia que foram importados no Winthor
         
         Returns:
             Lista de PedidoWinthor encontrados
+
+        Raises:
+            FonteIndisponivelError: se o Winthor não responder (a lista vazia
+                significa apenas que não há pedidos importados)
         """
         endpoint = f"{self.base_url}/imported"
 
         try:
-            response = requests.get(endpoint, headers=self.headers, timeout=30)
-            
-            # Tenta com Bearer primeiro, se falhar com 401, tenta Basic
-            if response.status_code == 401 and self.auth_type == "Bearer":
-                self.auth_type = "Basic"
-                self.headers = self._preparar_headers()
-                response = requests.get(endpoint, headers=self.headers, timeout=30)
-
+            response = self._requisitar(
+                "GET", endpoint, timeout=30, cache_ttl=self.cache_ttl, fonte="winthor"
+            )
             response.raise_for_status()
-            data_json = response.json()
-
-            # Trata diferentes formatos de resposta
-            if isinstance(data_json, list):
-                data = data_json
-            else:
-                data = data_json.get("data", data_json.get("orders", data_json.get("items", [])))
 
-            if not data:
-                return []
-
-            return PedidoWinthor.from_list(data)
+            return self.extrair_pedidos(response.json())
 
         except requests.exceptions.RequestException as e:
-            print(f"❌ Erro ao buscar pedidos do Winthor: {e}")
-            return []
+            log.error(f"❌ Erro ao buscar pedidos do Winthor: {e}", stage="winthor_fetch")
+            raise FonteIndisponivelError("winthor", str(e)) from e
+        except FonteIndisponivelError as e:
+            raise FonteIndisponivelError("winthor", e.motivo) from e
 
     def buscar_pedidos_por_filial(self, filial: str) -> List[PedidoWinthor]:
         """
@@ -80,40 +182,136 @@ class WinthorService:
         
         Returns:
             Lista de PedidoWinthor da filial
+
+        Raises:
+            FonteIndisponivelError: se o Winthor não responder
+        """
+        endpoint = f"{self.base_url}/imported/filial/{filial}"
+
+        try:
+            response = self._requisitar(
+                "GET", endpoint, timeout=30, cache_ttl=self.cache_ttl, fonte="winthor"
+            )
+            response.raise_for_status()
+
+            return self.extrair_pedidos(response.json())
+
+        except requests.exceptions.RequestException as e:
+            log.error(f"❌ Erro ao buscar pedidos da filial {filial}: {e}", stage="winthor_fetch", branch=filial)
+            raise FonteIndisponivelError("winthor", str(e)) from e
+        except FonteIndisponivelError as e:
+            raise FonteIndisponivelError("winthor", e.motivo) from e
+
+    def buscar_pedidos_importados_desde(self, data_inicio: str) -> List[PedidoWinthor]:
+        """
+        Busca os pedidos importados a partir de uma data (sincronização delta)
+
+        O filtro é enviado no parâmetro WINTHOR_FILTRO_DELTA (padrão
+        "dataImportacaoInicio"). Versões da API sem o filtro devolvem a lista
+        completa; cabe a quem chama detectar isso pelas datas recebidas.
+
+        Args:
+            data_inicio: dataImportacao mínima (ISO 8601, UTC)
+
+        Returns:
+            Lista de PedidoWinthor recebidos
+
+        Raises:
+            FonteIndisponivelError: se o Winthor não responder
+        """
+        endpoint = f"{self.base_url}/imported"
+        params = {os.getenv("WINTHOR_FILTRO_DELTA", "dataImportacaoInicio"): data_inicio}
+
+        try:
+            response = self._requisitar("GET", endpoint, params=params, timeout=30)
+            response.raise_for_status()
+
+            return self.extrair_pedidos(response.json())
+
+        except requests.exceptions.RequestException as e:
+            log.error(f"❌ Erro ao buscar pedidos novos do Winthor: {e}", stage="winthor_fetch")
+            raise FonteIndisponivelError("winthor", str(e)) from e
+        except FonteIndisponivelError as e:
+            raise FonteIndisponivelError("winthor", e.motivo) from e
+
+    def buscar_filial_se_alterada(
+        self,
+        filial: str,
+        etag: Optional[str] = None
+    ) -> Tuple[Optional[bytes], Optional[str]]:
+        """
+        Busca os pedidos de uma filial apenas se mudaram desde a versão conhecida
+
+        Args:
+            filial: Código da filial
+            etag: ETag da última versão recebida (If-None-Match)
+
+        Returns:
+            Tupla (corpo, etag): corpo None quando o Winthor responde 304
+
+        Raises:
+            FonteIndisponivelError: se o Winthor não responder
         """
         endpoint = f"{self.base_url}/imported/filial/{filial}"
+        cabecalhos = {"If-None-Match": etag} if etag else None
 
         try:
-            response = requests.get(endpoint, headers=self.headers, timeout=30)
+            response = self._requisitar("GET", endpoint, cabecalhos=cabecalhos, timeout=30)
+            if response.status_code == 304:
+                return None, etag
             response.raise_for_status()
-            data_json = response.json()
 
-            if isinstance(data_json, list):
-                data = data_json
-            else:
-                data = data_json.get("data", [])
+            return response.content, response.headers.get("ETag")
+
+        except requests.exceptions.RequestException as e:
+            log.error(f"❌ Erro ao buscar pedidos da filial {filial}: {e}", stage="winthor_fetch", branch=filial)
+            raise FonteIndisponivelError("winthor", str(e)) from e
+        except FonteIndisponivelError as e:
+            raise FonteIndisponivelError("winthor", e.motivo) from e
+
+    def pedido_existe(self, numero_pedido: str) -> bool:
+        """
+        Consulta se um pedido existe no Winthor, distinguindo "não existe" de falha
+
+        Args:
+            numero_pedido: Número do pedido a verificar
+
+        Returns:
+            True se o pedido existe (200), False se não existe (404)
 
-            return PedidoWinthor.from_list(data) if data else []
+        Raises:
+            FonteIndisponivelError: se o Winthor não responder ou responder com erro
+        """
+        endpoint = f"{self.base_url}/items/{numero_pedido}"
 
+        try:
+            response = self._requisitar("HEAD", endpoint, timeout=10)
         except requests.exceptions.RequestException as e:
-            print(f"❌ Erro ao buscar pedidos da filial {filial}: {e}")
-            return []
+            raise FonteIndisponivelError("winthor", str(e)) from e
+        except FonteIndisponivelError as e:
+            raise FonteIndisponivelError("winthor", e.motivo) from e
+
+        if response.status_code == 200:
+            return True
+        if response.status_code == 404:
+            return False
+        raise FonteIndisponivelError("winthor", f"HTTP {response.status_code} ao consultar pedido {numero_pedido}")
 
     def verificar_pedido_existente(self, numero_pedido: str) -> bool:
         """
         Verifica se um pedido específico existe no Winthor
-        
+
+        Falhas de consulta (inclusive circuito aberto) contam como "não
+        existe"; para distinguir os dois casos use `pedido_existe`.
+
         Args:
             numero_pedido: Número do pedido a verificar
         
         Returns:
             True se o pedido existe, False caso contrário
         """
-        endpoint = f"{self.base_url}/items/{numero_pedido}"
-
         try:
-            response = requests.head(endpoint, headers=self.headers, timeout=10)
-            return response.status_code == 200
-
-        except requests.exceptions.RequestException:
+            return self.pedido_existe(numero_pedido)
+        except FonteIndisponivelError as e:
+            log.warning(f"Pedido {numero_pedido} não verificado: {e}", stage="winthor_fetch")
             return False
@@ -0,0 +1,286 @@
+import contextvars
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Set
+
+from models.pedido_winthor import PedidoWinthor
+from services.winthor_service import WinthorService
+from utils.janelas import agora_local
+from utils.logger import log
+from utils.response_archive import obter_arquivo_ativo
+
+MODO_FILTRO = "filtro"
+MODO_FILIAL = "filial"
+
+
+def _chave_filial(filial: Optional[str]) -> str:
+    """Código da filial ("10" de "10 - Empresa Ltda"), como em Pagamento.codigo_filial"""
+    return (filial or "").split("-")[0].strip()
+
+
+def _data_importacao(pedido: PedidoWinthor) -> Optional[datetime]:
+    """dataImportacao como datetime com fuso (sem fuso informado = UTC)"""
+    if not pedido.data_importacao:
+        return None
+    try:
+        data = datetime.fromisoformat(pedido.data_importacao.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return data if data.tzinfo else data.replace(tzinfo=timezone.utc)
+
+
+class SincronizacaoWinthor:
+    """
+    Sincronização delta dos pedidos importados no Winthor
+
+    Mantém um snapshot local de `/imported` (logs/.cache/) e, a cada execução,
+    busca apenas o que mudou:
+
+    - modo "filtro": `/imported` filtrado por dataImportacao a partir do cursor
+      (maior dataImportacao já vista, menos uma margem de segurança);
+    - modo "filial": quando a API ignora o filtro, cada filial é consultada com
+      If-None-Match e só as que mudaram (200) são baixadas e substituídas. A
+      economia de banda depende do Winthor enviar ETag: sem ele toda filial é
+      baixada por completo a cada sincronização e o checksum do corpo só evita
+      reprocessar as iguais.
+
+    O modo é detectado na primeira sincronização incremental após cada carga
+    completa. O snapshot é refeito por completo na virada do dia e depois de
+    WINTHOR_SYNC_RESYNC_HORAS (cancelamentos não aparecem no delta), e só é
+    regravado em disco quando algo mudou.
+    """
+
+    def __init__(
+        self,
+        winthor_service: WinthorService,
+        arquivo: Optional[str] = None,
+        margem: Optional[float] = None,
+        resync_horas: Optional[float] = None,
+        max_workers: int = 8,
+    ):
+        """
+        Args:
+            winthor_service: Serviço do Winthor
+            arquivo: JSON do snapshot (padrão: logs/.cache/winthor_snapshot_<url>.json)
+            margem: Segundos reconsultados antes do cursor (WINTHOR_SYNC_MARGEM, padrão 300)
+            resync_horas: Idade máxima do snapshot antes de uma carga completa
+                          (WINTHOR_SYNC_RESYNC_HORAS, padrão 6; 0 = só na virada do dia)
+            max_workers: Filiais consultadas simultaneamente no modo "filial"
+        """
+        self.winthor_service = winthor_service
+        sufixo = hashlib.sha256(winthor_service.base_url.encode()).hexdigest()[:12]
+        self.arquivo = arquivo or os.path.join(log.log_dir, ".cache", f"winthor_snapshot_{sufixo}.json")
+        self.margem = margem if margem is not None else float(os.getenv("WINTHOR_SYNC_MARGEM", "300"))
+        self.resync_horas = resync_horas if resync_horas is not None else float(
+            os.getenv("WINTHOR_SYNC_RESYNC_HORAS", "6"))
+        self.max_workers = max_workers
+
+        self.pedidos: Dict[str, PedidoWinthor] = {}
+        self.modo: Optional[str] = None
+        self.cursor: Optional[datetime] = None
+        self.etags: Dict[str, str] = {}
+        self.checksums: Dict[str, str] = {}
+        self.dia: Optional[str] = None
+        self.completo_em = 0.0
+        self._alterado = False
+        self._carregar()
+
+    def sincronizar(self, filiais: Iterable[str] = ()) -> List[PedidoWinthor]:
+        """
+        Atualiza o snapshot e devolve todos os pedidos importados
+
+        Args:
+            filiais: Filiais com pagamentos no período (no modo "filial" são
+                     consultadas junto com as já presentes no snapshot)
+
+        Returns:
+            Lista de PedidoWinthor, equivalente a `buscar_pedidos_importados`
+
+        Raises:
+            FonteIndisponivelError: se o Winthor não responder (o snapshot em
+                disco não é alterado)
+        """
+        hoje = agora_local().date().isoformat()
+        expirado = self.resync_horas > 0 and time.time() - self.completo_em > self.resync_horas * 3600
+
+        if not self.pedidos or self.dia != hoje or expirado:
+            self._carga_completa(hoje)
+        elif self.modo != MODO_FILIAL and self._sincronizar_por_filtro():
+            pass
+        else:
+            self._sincronizar_por_filial(filiais)
+
+        if self._alterado:
+            self._salvar()
+        return list(self.pedidos.values())
+
+    def _carga_completa(self, hoje: str) -> None:
+        pedidos = self.winthor_service.buscar_pedidos_importados()
+        self.pedidos = {p.numero_pedido: p for p in pedidos}
+        self.dia = hoje
+        self.completo_em = time.time()
+        # O modo é detectado de novo: a API pode ter passado a aceitar o filtro
+        self.modo = None
+        self.cursor = None
+        self.etags.clear()
+        self.checksums.clear()
+        self._atualizar_cursor(pedidos)
+        self._alterado = True
+        log.info(f"🔄 Snapshot do Winthor recarregado: {len(self.pedidos)} pedidos", stage="winthor_fetch")
+
+    def _sincronizar_por_filtro(self) -> bool:
+        """
+        Busca os pedidos importados desde o cursor
+
+        Returns:
+            False se não há cursor (nenhum pedido com dataImportacao): a
+            sincronização desta vez é por filial, sem fixar o modo. True nos
+            demais casos; se a API ignorou o filtro, o modo passa a "filial" e
+            a lista completa recebida já atualiza o snapshot
+        """
+        if self.cursor is None:
+            return False
+
+        inicio = self.cursor - timedelta(seconds=self.margem)
+        recebidos = self.winthor_service.buscar_pedidos_importados_desde(
+            inicio.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+        )
+
+        # Pedidos sem dataImportacao não provam nada: só uma data anterior ao filtro prova que foi ignorado
+        datas = [_data_importacao(p) for p in recebidos]
+        if any(data is not None and data < inicio for data in datas):
+            log.info("🔄 Winthor sem filtro por dataImportacao: sincronização por filial", stage="winthor_fetch")
+            self.modo = MODO_FILIAL
+            self.pedidos = {p.numero_pedido: p for p in recebidos}
+            self.completo_em = time.time()
+            self._atualizar_cursor(recebidos)
+            self._alterado = True
+            self._arquivar_snapshot()
+            return True
+
+        cursor = self.cursor
+        novos = sum(1 for p in recebidos if p.numero_pedido not in self.pedidos)
+        alterados = sum(1 for p in recebidos if self.pedidos.get(p.numero_pedido) != p)
+        self.pedidos.update((p.numero_pedido, p) for p in recebidos)
+        self._alterado |= bool(alterados) or self.modo != MODO_FILTRO
+        self.modo = MODO_FILTRO
+        self._atualizar_cursor(recebidos)
+        self._alterado |= self.cursor != cursor
+        log.info(
+            f"🔄 Winthor sincronizado (delta): {len(recebidos)} recebidos, {novos} novos, "
+            f"{len(self.pedidos)} no snapshot",
+            stage="winthor_fetch",
+        )
+        self._arquivar_snapshot()
+        return True
+
+    def _sincronizar_por_filial(self, filiais: Iterable[str]) -> None:
+        numeros_por_filial: Dict[str, Set[str]] = {}
+        for numero, pedido in self.pedidos.items():
+            numeros_por_filial.setdefault(_chave_filial(pedido.filial), set()).add(numero)
+        consultar = sorted(({_chave_filial(f) for f in filiais} | set(numeros_por_filial)) - {""})
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="winthor-sync") as executor:
+            futuros = [
+                executor.submit(
+                    contextvars.copy_context().run,
+                    self.winthor_service.buscar_filial_se_alterada, filial, self.etags.get(filial),
+                )
+                for filial in consultar
+            ]
+            respostas = [futuro.result() for futuro in futuros]
+
+        alteradas = sem_etag = 0
+        for filial, (corpo, etag) in zip(consultar, respostas):
+            if etag and self.etags.get(filial) != etag:
+                self.etags[filial] = etag
+                self._alterado = True
+            if corpo is None:
+                continue
+            if not etag:
+                sem_etag += 1
+            checksum = hashlib.sha256(corpo).hexdigest()
+            if self.checksums.get(filial) == checksum:
+                continue
+
+            alteradas += 1
+            self._alterado = True
+            self.checksums[filial] = checksum
+            for numero in numeros_por_filial.get(filial, ()):
+                del self.pedidos[numero]
+            pedidos = WinthorService.extrair_pedidos(json.loads(corpo))
+            self.pedidos.update((p.numero_pedido, p) for p in pedidos)
+            self._atualizar_cursor(pedidos)
+
+        log.info(
+            f"🔄 Winthor sincronizado (por filial): {alteradas}/{len(consultar)} filiais alteradas, "
+            f"{len(self.pedidos)} no snapshot"
+            + (f" ({sem_etag} filiais sem ETag baixadas por completo)" if sem_etag else ""),
+            stage="winthor_fetch",
+        )
+        self._arquivar_snapshot()
+
+    def _atualizar_cursor(self, pedidos: Iterable[PedidoWinthor]) -> None:
+        for pedido in pedidos:
+            data = _data_importacao(pedido)
+            if data is not None and (self.cursor is None or data > self.cursor):
+                self.cursor = data
+
+    def _arquivar_snapshot(self) -> None:
+        """Com --arquivar, registra o snapshot completo (o replay não vê só o delta)"""
+        arquivo = obter_arquivo_ativo()
+        if arquivo is not None:
+            # Mesmo formato da resposta de /imported, para o ReplayService decodificar
+            corpo = json.dumps([
+                {"numpedrca": p.numero_pedido, "filial": p.filial, "cliente": p.cliente,
+                 "dataImportacao": p.data_importacao, "status": p.status}
+                for p in self.pedidos.values()
+            ], ensure_ascii=False)
+            arquivo.registrar(
+                "winthor", "GET", f"{self.winthor_service.base_url}/imported", {"snapshot": "delta"},
+                corpo.encode("utf-8"),
+            )
+
+    def _carregar(self) -> None:
+        if not os.path.exists(self.arquivo):
+            return
+        try:
+            with open(self.arquivo, encoding="utf-8") as f:
+                estado = json.load(f)
+            if estado.get("base_url") != self.winthor_service.base_url:
+                return
+            self.pedidos = {p["numero_pedido"]: PedidoWinthor(**p) for p in estado.get("pedidos", [])}
+            self.modo = estado.get("modo")
+            self.cursor = datetime.fromisoformat(estado["cursor"]) if estado.get("cursor") else None
+            self.etags = estado.get("etags", {})
+            self.checksums = estado.get("checksums", {})
+            self.dia = estado.get("dia")
+            self.completo_em = estado.get("completo_em", 0.0)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self.pedidos = {}
+            log.warning(f"Snapshot do Winthor ignorado ({e})", stage="winthor_fetch")
+
+    def _salvar(self) -> None:
+        estado = {
+            "base_url": self.winthor_service.base_url,
+            "dia": self.dia,
+            "completo_em": self.completo_em,
+            "modo": self.modo,
+            "cursor": self.cursor.isoformat() if self.cursor else None,
+            "etags": self.etags,
+            "checksums": self.checksums,
+            "pedidos": [p.to_dict() for p in self.pedidos.values()],
+        }
+        try:
+            os.makedirs(os.path.dirname(self.arquivo), exist_ok=True)
+            temporario = self.arquivo + ".tmp"
+            with open(temporario, "w", encoding="utf-8") as f:
+                json.dump(estado, f, ensure_ascii=False)
+            os.replace(temporario, self.arquivo)
+            self._alterado = False
+        except OSError as e:
+            log.warning(f"Falha ao salvar snapshot do Winthor: {e}", stage="winthor_fetch")
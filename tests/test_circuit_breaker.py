@@ -0,0 +1,110 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import pytest
+
+from utils import circuit_breaker, http_client
+from utils.circuit_breaker import ABERTO, FECHADO, MEIO_ABERTO, CircuitBreaker, FonteIndisponivelError
+
+TEMPO_ABERTO = 0.2
+
+
+def test_ciclo_fechado_aberto_meio_aberto():
+    circuito = CircuitBreaker("fonte", limite_falhas=2, tempo_aberto=TEMPO_ABERTO)
+
+    circuito.verificar()
+    circuito.registrar_falha()
+    assert circuito.estado == FECHADO
+    circuito.registrar_falha()
+    assert circuito.estado == ABERTO
+    with pytest.raises(FonteIndisponivelError):
+        circuito.verificar()
+
+    # Meio-aberto: só uma chamada de teste por vez; falha reabre
+    time.sleep(TEMPO_ABERTO)
+    circuito.verificar()
+    assert circuito.estado == MEIO_ABERTO
+    with pytest.raises(FonteIndisponivelError):
+        circuito.verificar()
+    circuito.registrar_falha()
+    assert circuito.estado == ABERTO
+
+    # Novo teste após a pausa; sucesso fecha
+    time.sleep(TEMPO_ABERTO)
+    circuito.verificar()
+    circuito.registrar_sucesso()
+    assert circuito.estado == FECHADO
+    assert circuito.falhas == 0
+
+
+class _HandlerSobrecarga(BaseHTTPRequestHandler):
+    status = 503
+    requisicoes = 0
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        type(self).requisicoes += 1
+        self.send_response(self.status)
+        if self.status == 503:
+            self.send_header("Retry-After", "0")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+@pytest.fixture
+def servidor(monkeypatch):
+    _HandlerSobrecarga.status = 503
+    _HandlerSobrecarga.requisicoes = 0
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), _HandlerSobrecarga)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{servidor.server_address[1]}/recurso"
+    # Circuito isolado, sem estado persistido de outras execuções
+    circuito = CircuitBreaker(urlparse(url).netloc, limite_falhas=1, tempo_aberto=TEMPO_ABERTO)
+    monkeypatch.setattr(circuit_breaker, "_circuitos", {circuito.nome: circuito})
+    monkeypatch.setenv("HTTP_TENTATIVAS_SOBRECARGA", "2")
+    yield url, circuito
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def test_teste_do_meio_aberto_com_503_repetido_reabre_e_depois_fecha(servidor):
+    url, circuito = servidor
+
+    assert http_client._executar("GET", url, timeout=5).status_code == 503
+    assert circuito.estado == ABERTO
+    with pytest.raises(FonteIndisponivelError):
+        http_client._executar("GET", url, timeout=5)
+
+    # A chamada de teste recebe 503 e repete sem esbarrar no próprio circuito
+    time.sleep(TEMPO_ABERTO)
+    _HandlerSobrecarga.requisicoes = 0
+    assert http_client._executar("GET", url, timeout=5).status_code == 503
+    assert _HandlerSobrecarga.requisicoes == 2
+    assert circuito.estado == ABERTO
+
+    _HandlerSobrecarga.status = 200
+    time.sleep(TEMPO_ABERTO)
+    assert http_client._executar("GET", url, timeout=5).status_code == 200
+    assert circuito.estado == FECHADO
+
+
+def test_excecao_fora_do_upstream_libera_a_chamada_de_teste(servidor, monkeypatch):
+    url, circuito = servidor
+    circuito.registrar_falha()
+    time.sleep(TEMPO_ABERTO)
+
+    class SessaoInterrompida:
+        def request(self, *args, **kwargs):
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(http_client, "_obter_sessao", lambda: SessaoInterrompida())
+    with pytest.raises(KeyboardInterrupt):
+        http_client._executar("GET", url, timeout=5)
+
+    # O teste do meio-aberto não ficou preso
+    circuito.verificar()
+    assert circuito.estado == MEIO_ABERTO
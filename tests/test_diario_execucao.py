@@ -0,0 +1,94 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+import requests
+
+from models.pagamento import Pagamento
+from services.payment_service import PaymentService
+from utils.circuit_breaker import FonteIndisponivelError
+from utils.diario_execucao import PAGINA, _REGISTRO, DiarioExecucao
+from utils.janelas import fuso_operacao, planejar_janelas
+
+ITENS_POR_PAGINA = 2
+TOTAL_PAGAMENTOS = 5  # páginas 1 e 2 cheias, página 3 incompleta
+
+
+class PaymentServiceFalso(PaymentService):
+    """MaxPayment em memória que registra as páginas pedidas e pode falhar em uma delas"""
+
+    def __init__(self, falhar_na_pagina=None):
+        super().__init__("http://maxpayment.invalid/pagamentos", "token")
+        self.falhar_na_pagina = falhar_na_pagina
+        self.paginas_pedidas = []
+
+    def _buscar_pagina(self, data_inicio, data_fim, pagina=1, itens_por_pagina=10, **filtros):
+        self.paginas_pedidas.append(pagina)
+        if pagina == self.falhar_na_pagina:
+            raise requests.exceptions.ConnectionError("conexão caiu")
+        inicio = (pagina - 1) * itens_por_pagina
+        return [
+            Pagamento(
+                codigo_filial="1",
+                nome_filial="1 - Filial",
+                nome_cliente=f"Cliente {numero}",
+                codigo_pedido_maxima=str(numero),
+            )
+            for numero in range(inicio, min(inicio + itens_por_pagina, TOTAL_PAGAMENTOS))
+        ]
+
+
+@pytest.fixture
+def janela_encerrada():
+    """Janela de um dia de três dias atrás (encerrada, portanto registrada no diário)"""
+    inicio = datetime.now(fuso_operacao()).replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=3)
+    return planejar_janelas(inicio, inicio + timedelta(days=1), "dia")[0]
+
+
+def test_retomar_descarta_registro_incompleto_e_nao_repete_paginas(tmp_path, janela_encerrada):
+    diario = DiarioExecucao.criar({"dia": "teste"}, run_id="interrompida", diretorio=str(tmp_path))
+    servico = PaymentServiceFalso(falhar_na_pagina=3)
+    with pytest.raises(FonteIndisponivelError):
+        servico.buscar_pagamentos_janelas([janela_encerrada], diario, itens_por_pagina=ITENS_POR_PAGINA)
+    diario.fechar()
+
+    # Queda no meio da escrita: cabeçalho de página com o conteúdo cortado
+    caminho = tmp_path / "interrompida.dex"
+    tamanho_valido = os.path.getsize(caminho)
+    with open(caminho, "ab") as f:
+        f.write(_REGISTRO.pack(64, 0, PAGINA) + b'{"janela": "')
+
+    diario = DiarioExecucao.retomar(diretorio=str(tmp_path))
+    assert diario.run_id == "interrompida"
+    assert os.path.getsize(caminho) == tamanho_valido
+    assert diario.total_paginas == 2
+
+    servico = PaymentServiceFalso()
+    pagamentos = servico.buscar_pagamentos_janelas(
+        [janela_encerrada], diario, itens_por_pagina=ITENS_POR_PAGINA
+    )
+    diario.fechar()
+
+    assert 1 not in servico.paginas_pedidas
+    assert 2 not in servico.paginas_pedidas
+    assert 3 in servico.paginas_pedidas
+    assert [p.codigo_pedido_maxima for p in pagamentos] == [str(n) for n in range(TOTAL_PAGAMENTOS)]
+
+
+def test_retomar_sem_run_id_ignora_execucoes_concluidas(tmp_path):
+    interrompida = DiarioExecucao.criar({"dia": "teste"}, run_id="interrompida", diretorio=str(tmp_path))
+    interrompida.fechar()
+    concluida = DiarioExecucao.criar({"dia": "teste"}, run_id="concluida", diretorio=str(tmp_path))
+    concluida.concluir()
+    # A concluída é a mais recente
+    agora = datetime.now().timestamp()
+    os.utime(tmp_path / "interrompida.dex", (agora - 60, agora - 60))
+
+    diario = DiarioExecucao.retomar(diretorio=str(tmp_path))
+    diario.fechar()
+    assert diario.run_id == "interrompida"
+
+    interrompida = DiarioExecucao.retomar("interrompida", diretorio=str(tmp_path))
+    interrompida.concluir()
+    with pytest.raises(FileNotFoundError):
+        DiarioExecucao.retomar(diretorio=str(tmp_path))
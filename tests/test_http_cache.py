@@ -0,0 +1,119 @@
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from utils import http_client
+from utils.http_cache import CacheHttp, EntradaCache
+
+
+def _entrada(corpo: bytes = b'{"data": []}', etag: str = '"v1"') -> EntradaCache:
+    return EntradaCache(corpo=corpo, cabecalhos={"ETag": etag, "Content-Type": "application/json"})
+
+
+def test_entrada_salva_e_lida_do_disco(tmp_path):
+    CacheHttp(str(tmp_path)).salvar("chave", _entrada())
+
+    entrada = CacheHttp(str(tmp_path)).obter("chave")
+    assert entrada.corpo == b'{"data": []}'
+    assert entrada.etag == '"v1"'
+
+
+def test_renovar_nao_regrava_o_corpo_nem_soma_bytes(tmp_path):
+    cache = CacheHttp(str(tmp_path))
+    entrada = _entrada()
+    entrada.armazenado_em = time.time() - 3600
+    cache.salvar("chave", entrada)
+    corpo_em_disco = (tmp_path / "chave.gz").read_bytes()
+    bytes_antes = cache._bytes_disco
+
+    cache.renovar("chave", entrada)
+
+    assert (tmp_path / "chave.gz").read_bytes() == corpo_em_disco
+    assert cache._bytes_disco == bytes_antes
+    # Outra instância (próxima execução) vê a revalidação
+    relida = CacheHttp(str(tmp_path)).obter("chave")
+    assert relida.valida(ttl=60)
+
+
+def test_regravar_entrada_nao_duplica_o_tamanho_estimado(tmp_path):
+    cache = CacheHttp(str(tmp_path))
+    cache.salvar("chave", _entrada())
+    cache.salvar("chave", _entrada())
+
+    # O tamanho do gzip varia alguns bytes com o horário gravado; compara com o arquivo final
+    assert cache._bytes_disco == os.path.getsize(tmp_path / "chave.gz")
+
+
+def test_salvar_descarta_revalidacao_anterior(tmp_path):
+    cache = CacheHttp(str(tmp_path))
+    cache.salvar("chave", _entrada())
+    cache.renovar("chave", _entrada())
+
+    cache.salvar("chave", _entrada(b'{"data": [1]}', '"v2"'))
+
+    assert not (tmp_path / "chave.rev").exists()
+    assert CacheHttp(str(tmp_path)).obter("chave").etag == '"v2"'
+
+
+def test_poda_remove_os_menos_usados_acima_do_limite(tmp_path):
+    cache = CacheHttp(str(tmp_path), max_bytes_disco=0)
+    corpo = os.urandom(4096)  # incompressível
+    agora = time.time()
+    for indice in range(4):
+        cache.salvar(f"chave{indice}", _entrada(corpo))
+        # chave0 é a usada há mais tempo
+        os.utime(tmp_path / f"chave{indice}.gz", (agora - 400 + indice, agora - 400 + indice))
+    cache.max_bytes_disco = 3 * 4096
+
+    assert cache.podar() >= 1
+    assert not (tmp_path / "chave0.gz").exists()
+    assert (tmp_path / "chave3.gz").exists()
+
+
+class _HandlerEtag(BaseHTTPRequestHandler):
+    requisicoes = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.requisicoes.append(self.headers.get("If-None-Match"))
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.send_header("ETag", '"v1"')
+            self.end_headers()
+            return
+        corpo = b'{"data": [1, 2, 3]}'
+        self.send_response(200)
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+
+@pytest.fixture
+def servidor_etag():
+    _HandlerEtag.requisicoes = []
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), _HandlerEtag)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{servidor.server_address[1]}/recurso", _HandlerEtag.requisicoes
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def test_requisitar_revalida_com_etag_e_usa_o_corpo_do_cache(tmp_path, monkeypatch, servidor_etag):
+    url, requisicoes = servidor_etag
+    monkeypatch.setattr(http_client, "_cache", CacheHttp(str(tmp_path)))
+    monkeypatch.setenv("HTTP_CACHE", "1")
+
+    primeira = http_client.requisitar("GET", url, cache_ttl=0, timeout=5)
+    segunda = http_client.requisitar("GET", url, cache_ttl=0, timeout=5)
+
+    assert requisicoes == [None, '"v1"']
+    assert primeira.status_code == segunda.status_code == 200
+    assert segunda.content == b'{"data": [1, 2, 3]}'
+    # O 304 só registrou a revalidação, sem regravar o corpo
+    assert len(list(tmp_path.glob("*.rev"))) == 1
@@ -0,0 +1,50 @@
+import pickle
+
+import pytest
+
+from utils.indice_pedidos import IndicePedidos
+
+NUMEROS = ["1001", " 1002 ", "1001", "00123", "ABC-7", "0", "²", ""]
+
+
+@pytest.fixture(params=[0, 10], ids=["sem_bloom", "com_bloom"])
+def indice(request):
+    return IndicePedidos.construir(NUMEROS, bits_bloom_por_pedido=request.param)
+
+
+def test_pertinencia_como_o_set_que_substitui(indice):
+    for numero in ("1001", "1002", "00123", "ABC-7", "0", "²"):
+        assert numero in indice
+    # Zeros à esquerda não se confundem com o número canônico
+    assert "123" not in indice
+    assert "0123" not in indice
+    assert "1003" not in indice
+    assert "" not in indice
+    assert 1001 not in indice
+
+
+def test_tamanho_e_iteracao_sem_duplicados(indice):
+    assert len(indice) == 6
+    assert set(indice) == {"0", "1001", "1002", "00123", "ABC-7", "²"}
+
+
+def test_salvar_e_carregar_via_mmap(tmp_path, indice):
+    caminho = str(tmp_path / "indice.bin")
+    indice.salvar(caminho)
+
+    carregado = IndicePedidos.carregar(caminho)
+    assert set(carregado) == set(indice)
+    assert "1002" in carregado and "00123" in carregado
+    assert "1003" not in carregado
+
+    # Envio para outro processo: copia os dados em vez do mmap
+    copia = pickle.loads(pickle.dumps(carregado))
+    assert set(copia) == set(indice)
+
+
+def test_carregar_rejeita_arquivo_invalido(tmp_path):
+    caminho = tmp_path / "indice.bin"
+    caminho.write_bytes(b"nao e um indice, mas tem mais de 32 bytes")
+
+    with pytest.raises(ValueError):
+        IndicePedidos.carregar(str(caminho))
@@ -0,0 +1,70 @@
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from utils.janelas import Janela, fuso_operacao, janelas_do_dia, planejar_janelas
+
+SAO_PAULO = ZoneInfo("America/Sao_Paulo")
+
+
+def test_janelas_alinhadas_ao_dia_local_sem_sobreposicao():
+    janelas = planejar_janelas(
+        datetime(2026, 2, 9, 15, 30), datetime(2026, 2, 11, 8), "dia", fuso=SAO_PAULO
+    )
+
+    assert [j.inicio.day for j in janelas] == [9, 10, 11]
+    assert janelas[0].inicio == datetime(2026, 2, 9, tzinfo=SAO_PAULO)
+    assert all(a.fim == b.inicio for a, b in zip(janelas, janelas[1:]))
+    # Datas da API em UTC, com dataFim inclusiva
+    assert janelas[0].data_inicio_api == "2026-02-09T03:00:00.000Z"
+    assert janelas[0].data_fim_api == "2026-02-10T02:59:59.999Z"
+
+
+def test_planejamento_deterministico_entre_execucoes():
+    """Períodos diferentes que cobrem a mesma hora geram a mesma janela (mesma chave de cache)"""
+    a = planejar_janelas(datetime(2026, 2, 9, 10, 5), datetime(2026, 2, 9, 12), "hora", fuso=SAO_PAULO)
+    b = planejar_janelas(datetime(2026, 2, 9, 10, 50), datetime(2026, 2, 9, 11, 1), "hora", fuso=SAO_PAULO)
+
+    assert a == b
+    assert len(a) == 2
+
+
+def test_horas_reais_na_mudanca_de_horario_de_verao():
+    nova_york = ZoneInfo("America/New_York")
+    # 08/03/2026: 02:00 local não existe (o relógio pula para 03:00)
+    janelas = planejar_janelas(
+        datetime(2026, 3, 8, tzinfo=nova_york), datetime(2026, 3, 9, tzinfo=nova_york), "hora", fuso=nova_york
+    )
+
+    assert len(janelas) == 23
+    assert janelas[2].inicio.hour == 3  # depois de 01:00 vem 03:00
+    assert all(
+        (j.fim.astimezone(timezone.utc) - j.inicio.astimezone(timezone.utc)) == timedelta(hours=1)
+        for j in janelas
+    )
+
+
+def test_granularidade_invalida():
+    with pytest.raises(ValueError):
+        planejar_janelas(datetime(2026, 2, 9), datetime(2026, 2, 10), "semana")
+
+
+def test_janela_fechada_apenas_apos_a_margem(monkeypatch):
+    monkeypatch.setenv("JANELA_MARGEM_FECHAMENTO", "900")
+    fim = datetime(2026, 2, 10, tzinfo=SAO_PAULO)
+    janela = Janela(fim - timedelta(days=1), fim)
+
+    assert not janela.fechada(fim + timedelta(minutes=14))
+    assert janela.fechada(fim + timedelta(minutes=15))
+
+
+def test_janelas_do_dia_descarta_horas_futuras():
+    fuso = fuso_operacao()
+    agora = datetime(2026, 2, 9, 10, 30, tzinfo=fuso)
+
+    janelas = janelas_do_dia(date(2026, 2, 9), "hora", agora)
+
+    assert len(janelas) == 11
+    assert janelas[-1].inicio == datetime(2026, 2, 9, 10, tzinfo=fuso)
+    assert janelas_do_dia(date(2026, 2, 10), "hora", agora) == []
@@ -0,0 +1,32 @@
+import json
+import os
+
+from utils.logger import log
+
+
+def _ultima_linha() -> dict:
+    with open(os.path.join(log.log_dir, "execution.jsonl"), encoding="utf-8") as f:
+        return json.loads(f.readlines()[-1])
+
+
+def test_exception_grava_traceback_no_campo_exc():
+    try:
+        1 / 0
+    except ZeroDivisionError:
+        log.exception("falha no teste", stage="teste")
+    log.flush()
+
+    linha = _ultima_linha()
+    assert linha["msg"] == "falha no teste"
+    assert linha["stage"] == "teste"
+    assert "ZeroDivisionError" in linha["exc"]
+    assert "Traceback" not in linha["msg"]
+
+
+def test_registro_sem_excecao_nao_tem_campo_exc():
+    log.info("sem exceção", stage="teste")
+    log.flush()
+
+    linha = _ultima_linha()
+    assert linha["msg"] == "sem exceção"
+    assert "exc" not in linha
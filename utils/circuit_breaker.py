@@ -0,0 +1,154 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from utils.logger import log
+
+FECHADO = "FECHADO"
+ABERTO = "ABERTO"
+MEIO_ABERTO = "MEIO_ABERTO"
+
+
+class FonteIndisponivelError(Exception):
+    """Upstream indisponível: circuito aberto ou falha ao obter os dados"""
+
+    def __init__(self, fonte: str, motivo: str = ""):
+        self.fonte = fonte
+        self.motivo = motivo
+        super().__init__(f"Fonte indisponível: {fonte}" + (f" ({motivo})" if motivo else ""))
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker de um upstream
+
+    Após `limite_falhas` falhas consecutivas o circuito abre e as chamadas falham
+    imediatamente por `tempo_aberto` segundos. Depois disso uma única chamada de
+    teste é liberada (meio-aberto): sucesso fecha o circuito, falha o reabre.
+    O estado é persistido em disco para que execuções seguintes (cron) também
+    falhem rápido durante uma indisponibilidade.
+    """
+
+    def __init__(self, nome: str, limite_falhas: int = 5, tempo_aberto: float = 300.0,
+                 arquivo_estado: Optional[str] = None):
+        self.nome = nome
+        self.limite_falhas = limite_falhas
+        self.tempo_aberto = tempo_aberto
+        self.arquivo_estado = arquivo_estado
+        self.estado = FECHADO
+        self.falhas = 0
+        self.aberto_ate = 0.0
+        self._teste_em_andamento = False
+        self._lock = threading.Lock()
+        self._carregar()
+
+    def verificar(self) -> None:
+        """Lança FonteIndisponivelError se o circuito não permitir a chamada"""
+        with self._lock:
+            if self.estado == FECHADO:
+                return
+            if self.estado == ABERTO and time.time() >= self.aberto_ate:
+                self.estado = MEIO_ABERTO
+                self._teste_em_andamento = False
+            if self.estado == MEIO_ABERTO and not self._teste_em_andamento:
+                self._teste_em_andamento = True
+                return
+            restante = max(self.aberto_ate - time.time(), 0)
+        raise FonteIndisponivelError(self.nome, f"circuito aberto, nova tentativa em {restante:.0f}s")
+
+    def registrar_sucesso(self) -> None:
+        with self._lock:
+            mudou = self.estado != FECHADO or self.falhas
+            self.estado = FECHADO
+            self.falhas = 0
+            self._teste_em_andamento = False
+        if mudou:
+            self._salvar()
+
+    def registrar_falha(self) -> None:
+        with self._lock:
+            self.falhas += 1
+            abrir = self.estado == MEIO_ABERTO or self.falhas >= self.limite_falhas
+            if abrir:
+                self.estado = ABERTO
+                self.aberto_ate = time.time() + self.tempo_aberto
+                self._teste_em_andamento = False
+        if abrir:
+            log.warning(
+                f"⚡ Circuito de {self.nome} aberto por {self.tempo_aberto:.0f}s "
+                f"após {self.falhas} falhas",
+                stage="circuit_breaker",
+            )
+        self._salvar()
+
+    def liberar_teste(self) -> None:
+        """
+        Libera a chamada de teste do meio-aberto sem registrar resultado
+
+        Usado quando a chamada liberada por verificar() termina sem sucesso
+        nem falha do upstream (ex.: interrompida), para que a próxima possa testar.
+        """
+        with self._lock:
+            self._teste_em_andamento = False
+
+    def _carregar(self) -> None:
+        dados = _ler_estados(self.arquivo_estado).get(self.nome)
+        if dados:
+            self.estado = dados.get("estado", FECHADO)
+            self.falhas = dados.get("falhas", 0)
+            self.aberto_ate = dados.get("aberto_ate", 0.0)
+
+    def _salvar(self) -> None:
+        if not self.arquivo_estado:
+            return
+        with _lock_arquivo:
+            estados = _ler_estados(self.arquivo_estado)
+            estados[self.nome] = {
+                "estado": self.estado,
+                "falhas": self.falhas,
+                "aberto_ate": self.aberto_ate,
+            }
+            try:
+                os.makedirs(os.path.dirname(self.arquivo_estado), exist_ok=True)
+                temporario = self.arquivo_estado + ".tmp"
+                with open(temporario, "w", encoding="utf-8") as f:
+                    json.dump(estados, f, indent=2)
+                os.replace(temporario, self.arquivo_estado)
+            except OSError as e:
+                log.warning(f"Falha ao salvar estado do circuito: {e}")
+
+
+def _ler_estados(arquivo: Optional[str]) -> Dict:
+    if not arquivo or not os.path.exists(arquivo):
+        return {}
+    try:
+        with open(arquivo, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+_circuitos: Dict[str, CircuitBreaker] = {}
+_lock_circuitos = threading.Lock()
+_lock_arquivo = threading.Lock()
+
+
+def obter_circuito(url: str) -> CircuitBreaker:
+    """
+    Retorna o circuit breaker compartilhado do host da URL
+
+    Configurável por CIRCUITO_LIMITE_FALHAS e CIRCUITO_TEMPO_ABERTO (segundos).
+    """
+    host = urlparse(url).netloc
+    with _lock_circuitos:
+        if host not in _circuitos:
+            _circuitos[host] = CircuitBreaker(
+                host,
+                limite_falhas=int(os.getenv("CIRCUITO_LIMITE_FALHAS", "5")),
+                tempo_aberto=float(os.getenv("CIRCUITO_TEMPO_ABERTO", "300")),
+                arquivo_estado=os.path.join(log.log_dir, ".cache", "circuitos.json"),
+            )
+        return _circuitos[host]
@@ -0,0 +1,261 @@
+import glob
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.logger import log
+
+# Arquivo: assinatura de 8 bytes seguida de registros
+#   <tamanho do conteúdo, crc32 do conteúdo, tipo> + conteúdo (JSON utf-8)
+# Um registro truncado ou com CRC inválido (queda no meio da escrita) marca o
+# fim do diário; ao retomar, o arquivo é cortado nesse ponto antes de anexar.
+_ASSINATURA = b"DEX1\0\0\0\0"
+_REGISTRO = struct.Struct("<IIB")
+
+INICIO = 1
+PAGINA = 2
+JANELA_CONCLUIDA = 3
+CONFRONTO = 4
+FIM = 5
+
+
+def diretorio_padrao() -> str:
+    """Pasta padrão dos diários (logs/diarios)"""
+    return os.path.join(log.log_dir, "diarios")
+
+
+class DiarioExecucao:
+    """
+    Diário de execução append-only, para retomar uma reconciliação interrompida
+
+    Registra o início (parâmetros), cada página de pagamentos recebida, cada
+    janela de consulta concluída, o resumo do confronto e o fim. Ao retomar
+    (`--retomar`), o arquivo é aberto via mmap e apenas indexado: as páginas
+    só são decodificadas quando a janela correspondente é reaproveitada.
+
+    As escritas são anexadas e descarregadas a cada registro; janelas
+    concluídas e o fim são checkpoints com fsync.
+    """
+
+    def __init__(self, caminho: str, parametros: Optional[Dict[str, Any]] = None):
+        self.caminho = caminho
+        self.parametros: Dict[str, Any] = parametros or {}
+        self.concluido = False
+        self.confronto: Optional[Dict[str, Any]] = None
+        self._paginas: Dict[str, Dict[int, Tuple[int, int]]] = {}
+        self._janelas_concluidas: Dict[str, int] = {}
+        self._mapa: Optional[mmap.mmap] = None
+        self._lock = threading.Lock()
+        self._arquivo = None
+
+    @property
+    def run_id(self) -> str:
+        return os.path.splitext(os.path.basename(self.caminho))[0]
+
+    @classmethod
+    def criar(
+        cls,
+        parametros: Dict[str, Any],
+        run_id: Optional[str] = None,
+        diretorio: Optional[str] = None,
+        retencao_dias: float = 7
+    ) -> "DiarioExecucao":
+        """
+        Cria o diário de uma nova execução
+
+        Args:
+            parametros: Parâmetros necessários para retomar (dia, granularidade...)
+            run_id: Nome do diário (padrão: run_id do log)
+            diretorio: Pasta dos diários (padrão: logs/diarios)
+            retencao_dias: Diários mais antigos que isso são removidos
+
+        Returns:
+            DiarioExecucao aberto para escrita
+        """
+        diretorio = diretorio or diretorio_padrao()
+        os.makedirs(diretorio, exist_ok=True)
+        cls._expurgar(diretorio, retencao_dias)
+
+        diario = cls(os.path.join(diretorio, f"{run_id or log.run_id}.dex"), parametros)
+        diario._arquivo = open(diario.caminho, "wb")
+        diario._arquivo.write(_ASSINATURA)
+        diario._registrar(INICIO, parametros, sincronizar=True)
+        return diario
+
+    @classmethod
+    def retomar(cls, run_id: Optional[str] = None, diretorio: Optional[str] = None) -> "DiarioExecucao":
+        """
+        Abre o diário de uma execução anterior para continuar de onde parou
+
+        Args:
+            run_id: Execução a retomar (padrão: o diário mais recente ainda não concluído)
+            diretorio: Pasta dos diários (padrão: logs/diarios)
+
+        Returns:
+            DiarioExecucao indexado e aberto para anexar
+
+        Raises:
+            FileNotFoundError: se não houver diário para retomar
+            ValueError: se o arquivo não for um diário válido
+        """
+        diretorio = diretorio or diretorio_padrao()
+        if run_id:
+            caminho = os.path.join(diretorio, f"{run_id}.dex")
+        else:
+            existentes = sorted(glob.glob(os.path.join(diretorio, "*.dex")), key=os.path.getmtime, reverse=True)
+            caminho = next((c for c in existentes if not cls._terminou(c)), None)
+            if caminho is None:
+                raise FileNotFoundError(f"Nenhuma execução interrompida em {diretorio}")
+        if not os.path.exists(caminho):
+            raise FileNotFoundError(f"Diário de execução não encontrado: {caminho}")
+
+        diario = cls(caminho)
+        fim_valido = diario._indexar()
+        if fim_valido < os.path.getsize(caminho):
+            log.warning(f"Diário {diario.run_id}: registro final incompleto descartado")
+            # O mapa é refeito depois de cortar o arquivo (não se corta um arquivo mapeado)
+            diario._mapa.close()
+            with open(caminho, "r+b") as f:
+                f.truncate(fim_valido)
+            with open(caminho, "rb") as f:
+                diario._mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        diario._arquivo = open(caminho, "ab")
+        return diario
+
+    @staticmethod
+    def _terminou(caminho: str) -> bool:
+        """
+        Indica se o último registro completo do diário é o FIM
+
+        Percorre só os cabeçalhos dos registros, saltando o conteúdo das
+        páginas; arquivos ilegíveis contam como não terminados.
+        """
+        ultimo = None
+        try:
+            with open(caminho, "rb") as f:
+                tamanho_arquivo = os.fstat(f.fileno()).st_size
+                if f.read(len(_ASSINATURA)) != _ASSINATURA:
+                    return False
+                posicao = len(_ASSINATURA)
+                while posicao + _REGISTRO.size <= tamanho_arquivo:
+                    f.seek(posicao)
+                    tamanho, _crc, tipo = _REGISTRO.unpack(f.read(_REGISTRO.size))
+                    posicao += _REGISTRO.size + tamanho
+                    if posicao > tamanho_arquivo:
+                        break
+                    ultimo = tipo
+        except OSError:
+            return False
+        return ultimo == FIM
+
+    def _indexar(self) -> int:
+        """Lê os registros via mmap e devolve a posição do fim do último registro válido"""
+        with open(self.caminho, "rb") as f:
+            if os.fstat(f.fileno()).st_size < len(_ASSINATURA):
+                raise ValueError(f"Diário inválido: {self.caminho}")
+            self._mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        mapa = self._mapa
+        if mapa[:len(_ASSINATURA)] != _ASSINATURA:
+            raise ValueError(f"Diário inválido: {self.caminho}")
+
+        posicao = len(_ASSINATURA)
+        while posicao + _REGISTRO.size <= len(mapa):
+            tamanho, crc, tipo = _REGISTRO.unpack_from(mapa, posicao)
+            inicio = posicao + _REGISTRO.size
+            fim = inicio + tamanho
+            if fim > len(mapa) or zlib.crc32(mapa[inicio:fim]) != crc:
+                break
+
+            if tipo == PAGINA:
+                # Só o cabeçalho da página é lido agora; os itens ficam no mmap
+                cabecalho = json.loads(mapa[inicio:mapa.find(b"\n", inicio, fim)])
+                self._paginas.setdefault(cabecalho["janela"], {})[cabecalho["pagina"]] = (inicio, fim)
+            else:
+                dados = json.loads(mapa[inicio:fim])
+                if tipo == INICIO:
+                    self.parametros = dados
+                elif tipo == JANELA_CONCLUIDA:
+                    self._janelas_concluidas[dados["janela"]] = dados["itens"]
+                elif tipo == CONFRONTO:
+                    self.confronto = dados
+                elif tipo == FIM:
+                    self.concluido = True
+            posicao = fim
+        return posicao
+
+    def _registrar(self, tipo: int, dados: Any, sincronizar: bool = False, conteudo: bytes = None) -> None:
+        if conteudo is None:
+            conteudo = json.dumps(dados, ensure_ascii=False).encode("utf-8")
+        with self._lock:
+            self._arquivo.write(_REGISTRO.pack(len(conteudo), zlib.crc32(conteudo), tipo) + conteudo)
+            self._arquivo.flush()
+            if sincronizar:
+                os.fsync(self._arquivo.fileno())
+
+    def registrar_pagina(self, janela: str, pagina: int, itens: List[Dict[str, Any]]) -> None:
+        """Anexa uma página recebida (itens como dicionários, ex.: Pagamento.to_dict())"""
+        cabecalho = json.dumps({"janela": janela, "pagina": pagina}, ensure_ascii=False)
+        conteudo = (cabecalho + "\n" + json.dumps(itens, ensure_ascii=False)).encode("utf-8")
+        self._registrar(PAGINA, None, conteudo=conteudo)
+
+    def concluir_janela(self, janela: str, itens: int) -> None:
+        """Checkpoint: todas as páginas da janela foram registradas"""
+        self._registrar(JANELA_CONCLUIDA, {"janela": janela, "itens": itens}, sincronizar=True)
+        self._janelas_concluidas[janela] = itens
+
+    def registrar_confronto(self, resumo: Dict[str, Any]) -> None:
+        """Registra o resumo do confronto (totais e status por pedido)"""
+        self._registrar(CONFRONTO, resumo, sincronizar=True)
+        self.confronto = resumo
+
+    def concluir(self) -> None:
+        """Marca a execução como concluída e fecha o diário"""
+        self._registrar(FIM, {"ts": time.time()}, sincronizar=True)
+        self.concluido = True
+        self.fechar()
+
+    def janela_concluida(self, janela: str) -> bool:
+        return janela in self._janelas_concluidas
+
+    def paginas_janela(self, janela: str) -> Dict[int, List[Dict[str, Any]]]:
+        """Páginas já registradas da janela, decodificadas do mmap"""
+        if self._mapa is None:
+            return {}
+        paginas = {}
+        for pagina, (inicio, fim) in self._paginas.get(janela, {}).items():
+            quebra = self._mapa.find(b"\n", inicio, fim)
+            paginas[pagina] = json.loads(self._mapa[quebra + 1:fim])
+        return paginas
+
+    @property
+    def total_paginas(self) -> int:
+        return sum(len(p) for p in self._paginas.values())
+
+    @property
+    def total_janelas_concluidas(self) -> int:
+        return len(self._janelas_concluidas)
+
+    def fechar(self) -> None:
+        with self._lock:
+            if self._arquivo is not None:
+                self._arquivo.close()
+                self._arquivo = None
+        if self._mapa is not None:
+            self._mapa.close()
+            self._mapa = None
+
+    @staticmethod
+    def _expurgar(diretorio: str, retencao_dias: float) -> None:
+        limite = time.time() - retencao_dias * 86400
+        for caminho in glob.glob(os.path.join(diretorio, "*.dex")):
+            try:
+                if os.path.getmtime(caminho) < limite:
+                    os.remove(caminho)
+            except OSError:
+                pass
@@ -0,0 +1,252 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from utils.logger import log
+
+# Cabeçalhos preservados junto com o corpo da resposta
+CABECALHOS_CACHE = ("Content-Type", "ETag", "Last-Modified")
+
+
+@dataclass
+class EntradaCache:
+    """Resposta armazenada no cache"""
+    corpo: bytes
+    status: int = 200
+    cabecalhos: Dict[str, str] = field(default_factory=dict)
+    armazenado_em: float = field(default_factory=time.time)
+    imutavel: bool = False
+
+    @property
+    def etag(self) -> Optional[str]:
+        return self.cabecalhos.get("ETag")
+
+    @property
+    def last_modified(self) -> Optional[str]:
+        return self.cabecalhos.get("Last-Modified")
+
+    def valida(self, ttl: float) -> bool:
+        """True se a entrada pode ser usada sem consultar o servidor"""
+        return self.imutavel or (time.time() - self.armazenado_em) < ttl
+
+
+class CacheHttp:
+    """
+    Cache de respostas HTTP em dois níveis: LRU em memória e arquivos
+    comprimidos em disco, com revalidação por ETag/Last-Modified
+
+    O disco é limitado por tamanho e idade: arquivos não usados há mais de
+    `max_dias_disco` são removidos e, acima de `max_bytes_disco`, os menos
+    usados recentemente saem primeiro (a leitura atualiza o mtime). A poda
+    roda na abertura do cache e quando as gravações ultrapassam o limite;
+    entradas de tokens antigos (a chave inclui o token) expiram assim.
+
+    Uma revalidação (304) não regrava o corpo: o horário fica em um arquivo
+    `<chave>.rev` ao lado do `.gz`, que prevalece sobre o do cabeçalho.
+    """
+
+    def __init__(
+        self,
+        diretorio: str,
+        max_itens_memoria: int = 128,
+        max_bytes_disco: int = 512 * 1024 * 1024,
+        max_dias_disco: float = 30
+    ):
+        """
+        Inicializa o cache
+
+        Args:
+            diretorio: Pasta dos arquivos de cache em disco
+            max_itens_memoria: Quantidade máxima de respostas mantidas em memória
+            max_bytes_disco: Tamanho máximo dos arquivos em disco (0 = sem limite)
+            max_dias_disco: Dias sem uso até um arquivo ser removido (0 = sem limite)
+        """
+        self.diretorio = diretorio
+        self.max_itens_memoria = max_itens_memoria
+        self.max_bytes_disco = max_bytes_disco
+        self.max_dias_disco = max_dias_disco
+        self._memoria: "OrderedDict[str, EntradaCache]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._lock_poda = threading.Lock()
+        self._bytes_disco = 0
+        os.makedirs(diretorio, exist_ok=True)
+        self.podar()
+
+    @staticmethod
+    def gerar_chave(metodo: str, url: str, params: Optional[dict], autorizacao: str = "") -> str:
+        """Chave estável da requisição (a credencial entra apenas como hash)"""
+        base = json.dumps(
+            [metodo.upper(), url, sorted((params or {}).items()), autorizacao],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(base.encode("utf-8")).hexdigest()
+
+    def _caminho(self, chave: str) -> str:
+        return os.path.join(self.diretorio, f"{chave}.gz")
+
+    def _caminho_revalidacao(self, chave: str) -> str:
+        return os.path.join(self.diretorio, f"{chave}.rev")
+
+    def obter(self, chave: str) -> Optional[EntradaCache]:
+        """Busca a entrada na memória e, se não houver, no disco"""
+        with self._lock:
+            entrada = self._memoria.get(chave)
+            if entrada is not None:
+                self._memoria.move_to_end(chave)
+                return entrada
+
+        caminho = self._caminho(chave)
+        if not os.path.exists(caminho):
+            return None
+
+        try:
+            # Marca o uso para a poda por idade/tamanho
+            os.utime(caminho)
+            with gzip.open(caminho, "rb") as f:
+                cabecalho, corpo = f.read().split(b"\n", 1)
+            meta = json.loads(cabecalho)
+            entrada = EntradaCache(corpo=corpo, **meta)
+            revalidado_em = self._ler_revalidacao(chave)
+            if revalidado_em is not None:
+                entrada.armazenado_em = max(entrada.armazenado_em, revalidado_em)
+        except (OSError, ValueError, TypeError) as e:
+            log.warning(f"Entrada de cache corrompida descartada ({chave[:12]}): {e}")
+            self.remover(chave)
+            return None
+
+        self._guardar_memoria(chave, entrada)
+        return entrada
+
+    def salvar(self, chave: str, entrada: EntradaCache) -> None:
+        """Grava a entrada na memória e no disco (escrita atômica)"""
+        self._guardar_memoria(chave, entrada)
+
+        meta = {
+            "status": entrada.status,
+            "cabecalhos": entrada.cabecalhos,
+            "armazenado_em": entrada.armazenado_em,
+            "imutavel": entrada.imutavel,
+        }
+        caminho = self._caminho(chave)
+        temporario = f"{caminho}.{threading.get_ident()}.tmp"
+        try:
+            with gzip.open(temporario, "wb", compresslevel=5) as f:
+                f.write(json.dumps(meta).encode("utf-8") + b"\n" + entrada.corpo)
+            try:
+                anterior = os.path.getsize(caminho)
+            except OSError:
+                anterior = 0
+            os.replace(temporario, caminho)
+            tamanho = os.path.getsize(caminho)
+        except OSError as e:
+            log.warning(f"Falha ao gravar cache em disco: {e}")
+            return
+        # O cabeçalho novo já traz o horário; uma revalidação anterior não vale mais
+        self._remover_arquivo(self._caminho_revalidacao(chave))
+
+        with self._lock:
+            # Estimativa (só a diferença, se a entrada já existia); a poda recalcula o valor exato
+            self._bytes_disco += tamanho - anterior
+            excedeu = self.max_bytes_disco and self._bytes_disco > self.max_bytes_disco
+        if excedeu:
+            self.podar()
+
+    def podar(self) -> int:
+        """
+        Remove do disco os arquivos expirados e, acima do limite de tamanho,
+        os usados há mais tempo (até 90% do limite)
+
+        Returns:
+            Quantidade de arquivos removidos
+        """
+        if not self._lock_poda.acquire(blocking=False):
+            return 0  # Outra thread já está podando
+        try:
+            agora = time.time()
+            arquivos = []
+            removidos = 0
+            with os.scandir(self.diretorio) as entradas:
+                for entrada in entradas:
+                    try:
+                        info = entrada.stat()
+                    except OSError:
+                        continue
+                    expirado = self.max_dias_disco and agora - info.st_mtime > self.max_dias_disco * 86400
+                    temporario_orfao = entrada.name.endswith(".tmp") and agora - info.st_mtime > 3600
+                    if expirado or temporario_orfao:
+                        removidos += self._remover_arquivo(entrada.path)
+                    elif entrada.name.endswith(".gz"):
+                        arquivos.append((info.st_mtime, info.st_size, entrada.path))
+                    elif entrada.name.endswith(".rev") and not os.path.exists(entrada.path[:-4] + ".gz"):
+                        self._remover_arquivo(entrada.path)
+
+            total = sum(tamanho for _mtime, tamanho, _caminho in arquivos)
+            if self.max_bytes_disco and total > self.max_bytes_disco:
+                alvo = self.max_bytes_disco * 0.9
+                for _mtime, tamanho, caminho in sorted(arquivos):
+                    if total <= alvo:
+                        break
+                    if self._remover_arquivo(caminho):
+                        self._remover_arquivo(caminho[:-3] + ".rev")
+                        removidos += 1
+                        total -= tamanho
+
+            with self._lock:
+                self._bytes_disco = total
+            if removidos:
+                log.info(f"🧹 Cache HTTP: {removidos} arquivos removidos ({total / 1024 / 1024:.1f} MB em disco)")
+            return removidos
+        finally:
+            self._lock_poda.release()
+
+    @staticmethod
+    def _remover_arquivo(caminho: str) -> int:
+        try:
+            os.remove(caminho)
+            return 1
+        except OSError:
+            return 0
+
+    def renovar(self, chave: str, entrada: EntradaCache) -> None:
+        """
+        Marca a entrada como revalidada agora (resposta 304)
+
+        Só o horário é gravado (`<chave>.rev`); o corpo em disco não muda.
+        """
+        entrada.armazenado_em = time.time()
+        self._guardar_memoria(chave, entrada)
+
+        caminho = self._caminho_revalidacao(chave)
+        temporario = f"{caminho}.{threading.get_ident()}.tmp"
+        try:
+            with open(temporario, "w", encoding="utf-8") as f:
+                f.write(repr(entrada.armazenado_em))
+            os.replace(temporario, caminho)
+        except OSError as e:
+            log.warning(f"Falha ao gravar revalidação do cache: {e}")
+
+    def _ler_revalidacao(self, chave: str) -> Optional[float]:
+        try:
+            with open(self._caminho_revalidacao(chave), encoding="utf-8") as f:
+                return float(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def remover(self, chave: str) -> None:
+        with self._lock:
+            self._memoria.pop(chave, None)
+        self._remover_arquivo(self._caminho(chave))
+        self._remover_arquivo(self._caminho_revalidacao(chave))
+
+    def _guardar_memoria(self, chave: str, entrada: EntradaCache) -> None:
+        with self._lock:
+            self._memoria[chave] = entrada
+            self._memoria.move_to_end(chave)
+            while len(self._memoria) > self.max_itens_memoria:
+                self._memoria.popitem(last=False)
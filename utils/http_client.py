@@ -0,0 +1,261 @@
+import hashlib
+import os
+import threading
+import time
+from typing import Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from urllib3.util import make_headers
+
+from utils.circuit_breaker import obter_circuito
+from utils.http_cache import CABECALHOS_CACHE, CacheHttp, EntradaCache
+from utils.logger import log
+from utils.metrics import metricas
+from utils.rate_limiter import STATUS_SOBRECARGA, obter_limitador
+from utils.response_archive import obter_arquivo_ativo
+
+TRANSPORTES = ("requests", "httpx")
+
+# Sessão compartilhada: reaproveita conexões TCP/TLS entre as chamadas
+_sessao = None
+_lock_sessao = threading.Lock()
+
+# Cache de respostas (desative com HTTP_CACHE=0)
+_cache: Optional[CacheHttp] = None
+
+
+def obter_cache() -> Optional[CacheHttp]:
+    """Retorna o cache HTTP compartilhado, criando-o no primeiro uso"""
+    global _cache
+    if os.getenv("HTTP_CACHE", "1") == "0":
+        return None
+    if _cache is None:
+        _cache = CacheHttp(
+            os.path.join(log.log_dir, ".cache", "http"),
+            max_itens_memoria=int(os.getenv("HTTP_CACHE_MEMORIA", "128")),
+            max_bytes_disco=int(float(os.getenv("HTTP_CACHE_DISCO_MB", "512")) * 1024 * 1024),
+            max_dias_disco=float(os.getenv("HTTP_CACHE_DISCO_DIAS", "30")),
+        )
+    return _cache
+
+
+def _criar_sessao_requests() -> requests.Session:
+    sessao = requests.Session()
+    adaptador = requests.adapters.HTTPAdapter(pool_connections=8, pool_maxsize=32)
+    sessao.mount("http://", adaptador)
+    sessao.mount("https://", adaptador)
+    # gzip/deflate (e br, se o pacote brotli estiver instalado) decodificados pelo urllib3
+    sessao.headers["Accept-Encoding"] = make_headers(accept_encoding=True)["accept-encoding"]
+    return sessao
+
+
+def definir_transporte(nome: Optional[str] = None) -> str:
+    """
+    Seleciona o transporte das requisições (HTTP_TRANSPORTE, padrão "requests")
+
+    "httpx" usa HTTP/2 (HTTP2=0 desativa) e multiplexa as requisições
+    concorrentes ao mesmo host em uma conexão; sem o pacote httpx instalado,
+    volta para requests com um aviso.
+
+    Args:
+        nome: "requests" ou "httpx" (padrão: variável HTTP_TRANSPORTE)
+
+    Returns:
+        Nome do transporte efetivamente em uso
+
+    Raises:
+        ValueError: se o transporte for desconhecido
+    """
+    with _lock_sessao:
+        return _trocar_sessao(nome)
+
+
+def _trocar_sessao(nome: Optional[str]) -> str:
+    global _sessao
+    nome = (nome or os.getenv("HTTP_TRANSPORTE", "requests")).lower()
+    if nome not in TRANSPORTES:
+        raise ValueError(f"Transporte HTTP inválido: {nome} (use {', '.join(TRANSPORTES)})")
+
+    anterior = _sessao
+    if nome == "httpx":
+        try:
+            from utils.transporte_httpx import SessaoHttpx
+            _sessao = SessaoHttpx(http2=os.getenv("HTTP2", "1") != "0")
+        except ImportError as e:
+            log.warning(f"Transporte httpx indisponível ({e}); usando requests")
+            nome = "requests"
+    if nome == "requests":
+        _sessao = _criar_sessao_requests()
+
+    if anterior is not None:
+        anterior.close()
+    return nome
+
+
+def _obter_sessao():
+    if _sessao is None:
+        with _lock_sessao:
+            if _sessao is None:
+                _trocar_sessao(None)
+    return _sessao
+
+
+def requisitar(
+    metodo: str,
+    url: str,
+    cache_ttl: Optional[float] = None,
+    imutavel: bool = False,
+    fonte: Optional[str] = None,
+    **kwargs
+) -> requests.Response:
+    """
+    Executa uma requisição HTTP registrando status, bytes e tempo de espera
+    na etapa ativa de `metricas`
+
+    Args:
+        metodo: Método HTTP ("GET", "HEAD"...)
+        url: URL completa
+        cache_ttl: Se informado, usa o cache por esse tempo (segundos) antes de
+                   revalidar com If-None-Match/If-Modified-Since (0 = sempre revalidar)
+        imutavel: Marca a resposta como definitiva (nunca revalidada)
+        fonte: Nome da origem ("maxpayment", "winthor"); se o arquivo de respostas
+               estiver ativo, respostas 200 dessa fonte são arquivadas
+        **kwargs: Argumentos repassados para requests (headers, params, timeout...)
+
+    Returns:
+        requests.Response
+
+    Raises:
+        FonteIndisponivelError: se o circuito do host estiver aberto
+    """
+    response = _requisitar_com_cache(metodo, url, cache_ttl, imutavel, **kwargs)
+
+    arquivo = obter_arquivo_ativo()
+    if arquivo is not None and fonte and response.status_code == 200 and metodo.upper() == "GET":
+        arquivo.registrar(fonte, metodo, url, kwargs.get("params"), response.content)
+
+    return response
+
+
+def _requisitar_com_cache(
+    metodo: str,
+    url: str,
+    cache_ttl: Optional[float],
+    imutavel: bool,
+    **kwargs
+) -> requests.Response:
+    cache = obter_cache() if (cache_ttl is not None or imutavel) and metodo.upper() == "GET" else None
+    if cache is None:
+        return _executar(metodo, url, **kwargs)
+
+    headers = dict(kwargs.pop("headers", None) or {})
+    autorizacao = hashlib.sha256(headers.get("Authorization", "").encode()).hexdigest()
+    chave = cache.gerar_chave(metodo, url, kwargs.get("params"), autorizacao)
+    entrada = cache.obter(chave)
+
+    if entrada is not None and entrada.valida(cache_ttl or 0):
+        metricas.registrar_cache(acerto=True)
+        return _resposta_do_cache(entrada, url)
+
+    if entrada is not None:
+        if entrada.etag:
+            headers["If-None-Match"] = entrada.etag
+        if entrada.last_modified:
+            headers["If-Modified-Since"] = entrada.last_modified
+
+    response = _executar(metodo, url, headers=headers, **kwargs)
+
+    if response.status_code == 304 and entrada is not None:
+        metricas.registrar_cache(acerto=True)
+        cache.renovar(chave, entrada)
+        return _resposta_do_cache(entrada, url)
+
+    metricas.registrar_cache(acerto=False)
+    if response.status_code == 200:
+        cache.salvar(chave, EntradaCache(
+            corpo=response.content,
+            status=response.status_code,
+            cabecalhos={h: response.headers[h] for h in CABECALHOS_CACHE if h in response.headers},
+            imutavel=imutavel,
+        ))
+    return response
+
+
+def _executar(metodo: str, url: str, **kwargs) -> requests.Response:
+    """
+    Executa a requisição dentro do limitador do host
+
+    Respostas 429/503 de GET/HEAD são repetidas até HTTP_TENTATIVAS_SOBRECARGA
+    vezes (padrão 4): o limitador pausa o host pelo Retry-After (ou backoff
+    exponencial) e a nova tentativa aguarda essa pausa. O circuit breaker é
+    consultado uma vez antes da primeira tentativa e só a resposta final conta
+    como sucesso ou falha; se a chamada terminar de outra forma (ex.: exceção
+    do limitador), a chamada de teste do meio-aberto é liberada.
+    """
+    circuito = obter_circuito(url)
+    limitador = obter_limitador(url)
+    sessao = _obter_sessao()
+    idempotente = metodo.upper() in ("GET", "HEAD")
+    tentativas = max(int(os.getenv("HTTP_TENTATIVAS_SOBRECARGA", "4")), 1) if idempotente else 1
+
+    circuito.verificar()
+    registrado = False
+    try:
+        for tentativa in range(tentativas):
+            with limitador.slot():
+                inicio = time.perf_counter()
+                try:
+                    response = sessao.request(metodo, url, **kwargs)
+                except requests.exceptions.RequestException:
+                    duracao = time.perf_counter() - inicio
+                    limitador.registrar(None, duracao)
+                    circuito.registrar_falha()
+                    registrado = True
+                    metricas.registrar_http(None, 0, duracao)
+                    raise
+                duracao = time.perf_counter() - inicio
+
+            limitador.registrar(response.status_code, duracao, response.headers.get("Retry-After"), tentativa)
+            metricas.registrar_http(response.status_code, _bytes_recebidos(response), duracao)
+            if response.status_code not in STATUS_SOBRECARGA or tentativa + 1 == tentativas:
+                break
+            log.debug(
+                f"{response.status_code} em {url}: nova tentativa ({tentativa + 2}/{tentativas})",
+                stage="rate_limit",
+            )
+
+        if response.status_code >= 500 or response.status_code == 429:
+            circuito.registrar_falha()
+        else:
+            circuito.registrar_sucesso()
+        registrado = True
+    finally:
+        if not registrado:
+            circuito.liberar_teste()
+    return response
+
+
+def _bytes_recebidos(response: requests.Response) -> int:
+    """Bytes do corpo como trafegaram na rede (comprimidos, se houve gzip/br)"""
+    conteudo = response.content or b""
+    if hasattr(response, "bytes_recebidos"):
+        return response.bytes_recebidos
+    lidos = getattr(response.raw, "tell", None)
+    if callable(lidos):
+        try:
+            return lidos() or len(conteudo)
+        except (OSError, ValueError):
+            pass
+    return len(conteudo)
+
+
+def _resposta_do_cache(entrada: EntradaCache, url: str) -> requests.Response:
+    """Reconstrói um requests.Response a partir da entrada do cache"""
+    response = requests.Response()
+    response.status_code = entrada.status
+    response._content = entrada.corpo
+    response.headers = CaseInsensitiveDict(entrada.cabecalhos)
+    response.url = url
+    response.encoding = "utf-8"
+    return response
@@ -0,0 +1,208 @@
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from typing import FrozenSet, Iterable, Optional, Sequence, Union
+
+# Cabeçalho do arquivo: assinatura, quantidade de números, bytes do Bloom,
+# funções de hash do Bloom e bytes da lista de números não numéricos.
+# Ocupa 32 bytes para que o bloco de inteiros fique alinhado em 8 bytes no mmap.
+_ASSINATURA = b"IPW1"
+_CABECALHO = struct.Struct("<4sQQIQ")
+_TAMANHO_CABECALHO = 32
+
+# Constantes de hash multiplicativo (64 bits) para o filtro de Bloom
+_MASCARA_64 = (1 << 64) - 1
+_MULT_1 = 0x9E3779B97F4A7C15
+_MULT_2 = 0xC2B2AE3D27D4EB4F
+
+
+def _numero_canonico(numero: str) -> Optional[int]:
+    """Inteiro do número do pedido se a conversão for reversível ("00123" e "²" não são)"""
+    # isdigit() sozinho aceita dígitos Unicode ("²", "٣"), que int() rejeita ou normaliza
+    if numero.isascii() and numero.isdigit() and len(numero) < 19 and (numero[0] != "0" or numero == "0"):
+        return int(numero)
+    return None
+
+
+class IndicePedidos:
+    """
+    Conjunto compacto de números de pedido do Winthor (somente leitura)
+
+    Números canônicos ficam em um array ordenado de inteiros de 64 bits
+    (8 bytes por pedido, busca binária); os demais (com letras ou zeros à
+    esquerda) ficam em um frozenset de apoio. Opcionalmente um filtro de Bloom
+    responde "não está" sem tocar no array, útil quando o índice é lido via
+    mmap de um arquivo frio. Suporta `in` e `len`, como o set que substitui.
+    """
+
+    def __init__(
+        self,
+        numeros: Union[array, memoryview],
+        outros: FrozenSet[str] = frozenset(),
+        bloom: Optional[Sequence[int]] = None,
+        funcoes_bloom: int = 0,
+        _mmap: Optional[mmap.mmap] = None,
+    ):
+        self._numeros = numeros
+        self._outros = outros
+        self._bloom = bloom
+        self._bits_bloom = len(bloom) * 8 if bloom else 0
+        self._funcoes_bloom = funcoes_bloom
+        self._mmap = _mmap
+
+    @classmethod
+    def construir(
+        cls,
+        numeros_pedido: Iterable[str],
+        bits_bloom_por_pedido: int = 0
+    ) -> "IndicePedidos":
+        """
+        Monta o índice a partir dos números de pedido
+
+        Args:
+            numeros_pedido: Números de pedido (ex.: p.numero_pedido de cada PedidoWinthor)
+            bits_bloom_por_pedido: Tamanho do filtro de Bloom (0 = sem filtro;
+                                   10 bits ≈ 1% de falsos positivos)
+
+        Returns:
+            IndicePedidos pronto para consulta
+        """
+        inteiros = []
+        outros = set()
+        for numero in numeros_pedido:
+            numero = numero.strip()
+            valor = _numero_canonico(numero)
+            if valor is None:
+                if numero:
+                    outros.add(numero)
+            else:
+                inteiros.append(valor)
+
+        numeros = array("q", sorted(set(inteiros)))
+
+        bloom = None
+        funcoes = 0
+        if bits_bloom_por_pedido > 0 and numeros:
+            total_bits = max(len(numeros) * bits_bloom_por_pedido, 64)
+            bloom = bytearray((total_bits + 7) // 8)
+            funcoes = max(round(bits_bloom_por_pedido * 0.693), 1)
+            total_bits = len(bloom) * 8
+            for valor in numeros:
+                for posicao in cls._posicoes_bloom(valor, funcoes, total_bits):
+                    bloom[posicao >> 3] |= 1 << (posicao & 7)
+
+        return cls(numeros, frozenset(outros), bloom, funcoes)
+
+    @staticmethod
+    def _posicoes_bloom(valor: int, funcoes: int, total_bits: int):
+        h1 = (valor * _MULT_1) & _MASCARA_64
+        h2 = ((valor * _MULT_2) & _MASCARA_64) | 1
+        for i in range(funcoes):
+            yield (h1 + i * h2) % total_bits
+
+    def __contains__(self, numero: object) -> bool:
+        if not isinstance(numero, str):
+            return False
+        valor = _numero_canonico(numero)
+        if valor is None:
+            return numero in self._outros
+
+        if self._bloom is not None:
+            bloom = self._bloom
+            total_bits = self._bits_bloom
+            posicao = (valor * _MULT_1) & _MASCARA_64
+            passo = ((valor * _MULT_2) & _MASCARA_64) | 1
+            for _ in range(self._funcoes_bloom):
+                bit = posicao % total_bits
+                if not bloom[bit >> 3] & (1 << (bit & 7)):
+                    return False
+                posicao += passo
+
+        numeros = self._numeros
+        i = bisect_left(numeros, valor)
+        return i < len(numeros) and numeros[i] == valor
+
+    def __len__(self) -> int:
+        return len(self._numeros) + len(self._outros)
+
+    def __iter__(self):
+        for valor in self._numeros:
+            yield str(valor)
+        yield from self._outros
+
+    @property
+    def bytes_em_memoria(self) -> int:
+        """Tamanho aproximado dos dados do índice (sem o frozenset de apoio)"""
+        return len(self._numeros) * 8 + (len(self._bloom) if self._bloom else 0)
+
+    def salvar(self, caminho: str) -> None:
+        """
+        Grava o índice em formato binário (escrita atômica), para ser aberto
+        com `carregar` via mmap em execuções seguintes
+
+        Args:
+            caminho: Arquivo de destino
+        """
+        outros = "\n".join(sorted(self._outros)).encode("utf-8")
+        bloom = bytes(self._bloom) if self._bloom else b""
+
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        with open(temporario, "wb") as f:
+            cabecalho = _CABECALHO.pack(
+                _ASSINATURA, len(self._numeros), len(bloom), self._funcoes_bloom, len(outros)
+            )
+            f.write(cabecalho.ljust(_TAMANHO_CABECALHO, b"\0"))
+            f.write(self._numeros.tobytes())
+            f.write(bloom)
+            f.write(outros)
+        os.replace(temporario, caminho)
+
+    @classmethod
+    def carregar(cls, caminho: str) -> "IndicePedidos":
+        """
+        Abre um índice salvo sem copiar os números para a memória do processo
+        (o array é uma view sobre o mmap do arquivo)
+
+        Args:
+            caminho: Arquivo gerado por `salvar`
+
+        Returns:
+            IndicePedidos somente leitura
+
+        Raises:
+            ValueError: se o arquivo não for um índice válido
+        """
+        with open(caminho, "rb") as f:
+            tamanho = os.fstat(f.fileno()).st_size
+            if tamanho < _TAMANHO_CABECALHO:
+                raise ValueError(f"Índice inválido: {caminho}")
+            mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        assinatura, quantidade, bytes_bloom, funcoes, bytes_outros = _CABECALHO.unpack_from(mapa, 0)
+        fim_numeros = _TAMANHO_CABECALHO + quantidade * 8
+        if assinatura != _ASSINATURA or fim_numeros + bytes_bloom + bytes_outros != tamanho:
+            mapa.close()
+            raise ValueError(f"Índice inválido: {caminho}")
+
+        visao = memoryview(mapa)
+        numeros = visao[_TAMANHO_CABECALHO:fim_numeros].cast("q")
+        bloom = visao[fim_numeros:fim_numeros + bytes_bloom] if bytes_bloom else None
+        texto_outros = bytes(visao[fim_numeros + bytes_bloom:]).decode("utf-8")
+        outros = frozenset(texto_outros.split("\n")) if texto_outros else frozenset()
+        return cls(numeros, outros, bloom, funcoes, _mmap=mapa)
+
+    def __getstate__(self):
+        # Envio para outros processos (confronto em paralelo): copia o array,
+        # já que o mmap não pode ser serializado
+        return {
+            "numeros": array("q", self._numeros),
+            "outros": self._outros,
+            "bloom": bytes(self._bloom) if self._bloom else None,
+            "funcoes": self._funcoes_bloom,
+        }
+
+    def __setstate__(self, estado):
+        self.__init__(estado["numeros"], estado["outros"], estado["bloom"], estado["funcoes"])
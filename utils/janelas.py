@@ -0,0 +1,150 @@
+import os
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone, tzinfo
+from typing import List, Optional
+
+from utils.logger import log
+
+GRANULARIDADES = ("hora", "dia")
+
+# Sem a base de fusos do sistema (tzdata ausente no Windows, por exemplo)
+_FUSO_FIXO = timezone(timedelta(hours=-3), "UTC-03")
+_fuso: Optional[tzinfo] = None
+
+
+def fuso_operacao() -> tzinfo:
+    """
+    Fuso horário da operação (FUSO_HORARIO, padrão America/Sao_Paulo)
+
+    O dia do Winthor e dos relatórios é o dia local; sem a base de fusos
+    disponível, usa UTC-3 fixo.
+    """
+    global _fuso
+    if _fuso is None:
+        nome = os.getenv("FUSO_HORARIO", "America/Sao_Paulo")
+        try:
+            from zoneinfo import ZoneInfo
+            _fuso = ZoneInfo(nome)
+        except (ImportError, ValueError, KeyError) as e:
+            log.warning(f"Fuso {nome} indisponível ({e}); usando UTC-3")
+            _fuso = _FUSO_FIXO
+    return _fuso
+
+
+def agora_local() -> datetime:
+    """Data e hora atuais no fuso da operação"""
+    return datetime.now(fuso_operacao())
+
+
+def formatar_utc(data: datetime) -> str:
+    """Data no formato aceito pela MaxPayment (2026-02-09T03:00:00.000Z)"""
+    return data.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+def margem_fechamento() -> float:
+    """Segundos após o fim de uma janela até ela ser considerada imutável (JANELA_MARGEM_FECHAMENTO)"""
+    return float(os.getenv("JANELA_MARGEM_FECHAMENTO", "900"))
+
+
+@dataclass(frozen=True, order=True)
+class Janela:
+    """Intervalo de consulta [inicio, fim), com fuso, alinhado à hora ou ao dia local"""
+    inicio: datetime
+    fim: datetime
+
+    @property
+    def data_inicio_api(self) -> str:
+        return formatar_utc(self.inicio)
+
+    @property
+    def data_fim_api(self) -> str:
+        # A API trata dataFim como inclusiva
+        return formatar_utc(self.fim - timedelta(milliseconds=1))
+
+    def fechada(self, agora: Optional[datetime] = None) -> bool:
+        """Indica se a janela terminou há mais que a margem (resposta imutável)"""
+        agora = agora or datetime.now(timezone.utc)
+        return self.fim + timedelta(seconds=margem_fechamento()) <= agora
+
+    def __str__(self) -> str:
+        return f"{self.inicio.isoformat()} → {self.fim.isoformat()}"
+
+
+def _inicio_periodo(data: datetime, granularidade: str) -> datetime:
+    if granularidade == "dia":
+        return datetime.combine(data.date(), time(), tzinfo=data.tzinfo)
+    return data.replace(minute=0, second=0, microsecond=0)
+
+
+def _proximo_periodo(inicio: datetime, granularidade: str) -> datetime:
+    if granularidade == "dia":
+        return datetime.combine(inicio.date() + timedelta(days=1), time(), tzinfo=inicio.tzinfo)
+    # Soma em UTC: uma hora "real" mesmo em mudanças de horário de verão
+    return (inicio.astimezone(timezone.utc) + timedelta(hours=1)).astimezone(inicio.tzinfo)
+
+
+def planejar_janelas(
+    inicio: datetime,
+    fim: datetime,
+    granularidade: str = "dia",
+    fuso: Optional[tzinfo] = None
+) -> List[Janela]:
+    """
+    Divide um período em janelas consecutivas, sem sobreposição, alinhadas
+    à hora ou ao dia do fuso da operação
+
+    O alinhamento é fixo (a primeira janela começa no início da hora/dia que
+    contém `inicio`), então execuções e backfills diferentes geram exatamente
+    as mesmas janelas e reaproveitam as respostas já em cache.
+
+    Args:
+        inicio: Início do período (sem fuso = fuso da operação)
+        fim: Fim do período, exclusivo
+        granularidade: "hora" ou "dia"
+        fuso: Fuso das janelas (padrão: fuso_operacao())
+
+    Returns:
+        Janelas em ordem cronológica
+
+    Raises:
+        ValueError: se a granularidade for inválida
+    """
+    if granularidade not in GRANULARIDADES:
+        raise ValueError(f"Granularidade inválida: {granularidade} (use {', '.join(GRANULARIDADES)})")
+
+    fuso = fuso or fuso_operacao()
+    inicio = inicio.astimezone(fuso) if inicio.tzinfo else inicio.replace(tzinfo=fuso)
+    fim = fim.astimezone(fuso) if fim.tzinfo else fim.replace(tzinfo=fuso)
+
+    janelas: List[Janela] = []
+    atual = _inicio_periodo(inicio, granularidade)
+    while atual < fim:
+        proximo = _proximo_periodo(atual, granularidade)
+        janelas.append(Janela(atual, proximo))
+        atual = proximo
+    return janelas
+
+
+def janelas_do_dia(
+    dia: date,
+    granularidade: str = "dia",
+    agora: Optional[datetime] = None
+) -> List[Janela]:
+    """
+    Janelas de um dia local, sem as que ainda não começaram
+
+    Args:
+        dia: Dia no fuso da operação
+        granularidade: "hora" ou "dia"
+        agora: Referência para descartar janelas futuras (padrão: agora)
+
+    Returns:
+        Janelas em ordem cronológica
+    """
+    fuso = fuso_operacao()
+    agora = agora or datetime.now(fuso)
+    inicio = datetime.combine(dia, time(), tzinfo=fuso)
+    fim = min(datetime.combine(dia + timedelta(days=1), time(), tzinfo=fuso), agora)
+    if fim <= inicio:
+        return []
+    return planejar_janelas(inicio, fim, granularidade, fuso)
@@ -1,6 +1,103 @@
+import atexit
+import contextvars
+import copy
+import gzip
+import json
 import logging
 import os
+import queue
+import shutil
+import threading
+import uuid
+from contextlib import contextmanager
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+
+# Contexto da execução atual (run_id, stage, branch...) propagado por thread/tarefa
+_contexto = contextvars.ContextVar("contexto_log", default={})
+
+
+class JsonFormatter(logging.Formatter):
+    """Formata cada registro como uma linha JSON com os campos estruturados"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        dados = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "msg": record.getMessage(),
+        }
+        dados.update(getattr(record, "campos", {}))
+
+        if record.exc_info:
+            dados["exc"] = self.formatException(record.exc_info)
+
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+class QueueHandlerEstruturado(QueueHandler):
+    """
+    QueueHandler que mantém `exc_info` até o listener
+
+    O `prepare` padrão formata o registro (traceback junto da mensagem) e
+    descarta `exc_info`; aqui só a mensagem é resolvida, para que o
+    JsonFormatter grave o traceback no campo "exc". A fila é em memória,
+    então o traceback não precisa ser serializável.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class RotatingCompressedFileHandler(TimedRotatingFileHandler):
+    """
+    Arquivo de log com rotação por horário (meia-noite) e por tamanho.
+    Os arquivos rotacionados são comprimidos com gzip.
+    """
+
+    def __init__(self, filename: str, max_bytes: int = 0, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.max_bytes = max_bytes
+        self.namer = self._nomear_gz
+        self.rotator = self._comprimir
+
+    def shouldRollover(self, record: logging.LogRecord) -> int:
+        if super().shouldRollover(record):
+            return 1
+        if self.max_bytes > 0 and self.stream is not None:
+            self.stream.seek(0, 2)
+            if self.stream.tell() + len(self.format(record)) + 1 >= self.max_bytes:
+                return 1
+        return 0
+
+    def getFilesToDelete(self):
+        # Mantém apenas os backupCount arquivos .gz mais recentes
+        prefixo = os.path.basename(self.baseFilename) + "."
+        diretorio = os.path.dirname(self.baseFilename)
+        arquivos = sorted(
+            (os.path.join(diretorio, nome) for nome in os.listdir(diretorio)
+             if nome.startswith(prefixo) and nome.endswith(".gz")),
+            key=os.path.getmtime,
+        )
+        return arquivos[:max(len(arquivos) - self.backupCount, 0)]
+
+    def _nomear_gz(self, nome: str) -> str:
+        # Rotações por tamanho no mesmo dia recebem um sufixo sequencial
+        destino = nome + ".gz"
+        sequencia = 1
+        while os.path.exists(destino):
+            destino = f"{nome}.{sequencia}.gz"
+            sequencia += 1
+        return destino
+
+    @staticmethod
+    def _comprimir(origem: str, destino: str) -> None:
+        with open(origem, "rb") as f_in, gzip.open(destino, "wb") as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        os.remove(origem)
+
 
 class Logger:
     _instance = None
@@ -17,29 +114,84 @@ class Logger:
         if not os.path.exists(log_dir):
             os.makedirs(log_dir)
 
-        log_file = os.path.join(log_dir, f"execution_{datetime.now().strftime('%Y-%m-%d')}.log")
+        self.log_dir = log_dir
+        self.run_id = uuid.uuid4().hex[:12]
+        log_file = os.path.join(log_dir, "execution.jsonl")
 
         # Configuração básica
         self.logger = logging.getLogger("MaximaSystem")
         self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
 
-        # Formato: Data - Nível - Mensagem
+        # Formato console: Data - Nível - Mensagem
         formatter = logging.Formatter('%(asctime)s | %(levelname)s | %(message)s', datefmt='%H:%M:%S')
 
-        # Handler para Arquivo
-        file_handler = logging.FileHandler(log_file, encoding='utf-8')
-        file_handler.setFormatter(formatter)
+        # Handler para Arquivo: JSON estruturado, rotação diária/por tamanho, comprimido
+        file_handler = RotatingCompressedFileHandler(
+            log_file,
+            max_bytes=int(os.getenv("LOG_MAX_BYTES", str(20 * 1024 * 1024))),
+            when="midnight",
+            backupCount=int(os.getenv("LOG_BACKUP_COUNT", "30")),
+            encoding='utf-8',
+        )
+        file_handler.setFormatter(JsonFormatter())
 
         # Handler para Console
         console_handler = logging.StreamHandler()
         console_handler.setFormatter(formatter)
 
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
+        # A escrita acontece na thread do QueueListener, fora do fluxo principal
+        fila = queue.SimpleQueue()
+        self.logger.addHandler(QueueHandlerEstruturado(fila))
+        self._listener = QueueListener(
+            fila, file_handler, console_handler, respect_handler_level=True
+        )
+        self._listener.start()
+        self._listener_ativo = True
+        self._lock_listener = threading.Lock()
+        atexit.register(self._encerrar)
+
+    def _log(self, nivel: int, msg, campos: dict, exc_info: bool = False):
+        if not self.logger.isEnabledFor(nivel):
+            return
+        dados = {"run_id": self.run_id}
+        dados.update(_contexto.get())
+        dados.update(campos)
+        self.logger.log(nivel, msg, exc_info=exc_info, extra={"campos": dados})
+
+    def info(self, msg, **campos): self._log(logging.INFO, msg, campos)
+    def error(self, msg, **campos): self._log(logging.ERROR, msg, campos)
+    def warning(self, msg, **campos): self._log(logging.WARNING, msg, campos)
+    def debug(self, msg, **campos): self._log(logging.DEBUG, msg, campos)
+    def exception(self, msg, **campos): self._log(logging.ERROR, msg, campos, exc_info=True)
+
+    @contextmanager
+    def contexto(self, **campos):
+        """
+        Define campos estruturados (stage, branch...) para todos os logs do bloco
+
+        Args:
+            **campos: Campos adicionados a cada linha JSON emitida dentro do bloco
+        """
+        token = _contexto.set({**_contexto.get(), **campos})
+        try:
+            yield
+        finally:
+            _contexto.reset(token)
+
+    def flush(self):
+        """Aguarda a escrita de todos os registros pendentes na fila"""
+        # stop() só retorna depois de esvaziar a fila
+        with self._lock_listener:
+            if self._listener_ativo:
+                self._listener.stop()
+                self._listener.start()
 
-    def info(self, msg): self.logger.info(msg)
-    def error(self, msg): self.logger.error(msg)
-    def warning(self, msg): self.logger.warning(msg)
+    def _encerrar(self):
+        with self._lock_listener:
+            if self._listener_ativo:
+                self._listener.stop()
+                self._listener_ativo = False
 
 # Instância única para o projeto todo
-log = Logger()
\ No newline at end of file
+log = Logger()
@@ -0,0 +1,208 @@
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from utils.logger import log
+
+# Etapa ativa no contexto atual (usada para atribuir as chamadas HTTP)
+_etapa_atual = contextvars.ContextVar("etapa_atual", default=None)
+
+
+@dataclass
+class MedicaoEtapa:
+    """Métricas acumuladas de uma etapa do workflow"""
+    nome: str
+    execucoes: int = 0
+    duracao: float = 0.0
+    cpu: float = 0.0
+    itens: int = 0
+    bytes: int = 0
+    requisicoes: int = 0
+    tempo_http: float = 0.0
+    erros: int = 0
+    cache_acertos: int = 0
+    cache_falhas: int = 0
+    status_http: Dict[str, int] = field(default_factory=dict)
+
+    def adicionar_itens(self, quantidade: int) -> None:
+        """Soma itens processados (pagamentos, pedidos, linhas de relatório...)"""
+        self.itens += quantidade
+
+    def to_dict(self) -> Dict:
+        return {
+            "execucoes": self.execucoes,
+            "duracao_s": round(self.duracao, 6),
+            "cpu_s": round(self.cpu, 6),
+            "itens": self.itens,
+            "bytes": self.bytes,
+            "requisicoes": self.requisicoes,
+            "tempo_http_s": round(self.tempo_http, 6),
+            "erros": self.erros,
+            "cache_acertos": self.cache_acertos,
+            "cache_falhas": self.cache_falhas,
+            "status_http": dict(self.status_http),
+        }
+
+
+class Metricas:
+    """Registro leve de duração, itens, bytes e status HTTP por etapa"""
+
+    def __init__(self):
+        self._etapas: Dict[str, MedicaoEtapa] = {}
+        self._lock = threading.Lock()
+        self.inicio = time.time()
+
+    def _obter(self, nome: str) -> MedicaoEtapa:
+        with self._lock:
+            if nome not in self._etapas:
+                self._etapas[nome] = MedicaoEtapa(nome=nome)
+            return self._etapas[nome]
+
+    @contextmanager
+    def etapa(self, nome: str):
+        """
+        Mede uma etapa do workflow (payment_fetch, winthor_fetch, reconcile...)
+
+        Args:
+            nome: Nome da etapa
+
+        Yields:
+            MedicaoEtapa para registrar itens processados
+        """
+        medicao = self._obter(nome)
+        token = _etapa_atual.set(medicao)
+        inicio = time.perf_counter()
+        inicio_cpu = time.process_time()
+        erro = False
+        try:
+            with log.contexto(stage=nome):
+                yield medicao
+        except BaseException:
+            erro = True
+            raise
+        finally:
+            duracao = time.perf_counter() - inicio
+            cpu = time.process_time() - inicio_cpu
+            _etapa_atual.reset(token)
+            with self._lock:
+                medicao.execucoes += 1
+                medicao.duracao += duracao
+                medicao.cpu += cpu
+                if erro:
+                    medicao.erros += 1
+            log.info(f"Etapa {nome} concluída em {duracao:.3f}s", stage=nome, duration=round(duracao, 6))
+
+    def medir(self, nome: str):
+        """Decorator equivalente a `etapa` para funções inteiras"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.etapa(nome):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def registrar_http(self, status: Optional[int], tamanho: int, duracao: float) -> None:
+        """
+        Registra uma chamada HTTP na etapa ativa (ou em "http" se não houver)
+
+        Args:
+            status: Código HTTP (None em caso de erro de conexão)
+            tamanho: Bytes do corpo recebidos pela rede (comprimidos, se houve gzip/br)
+            duracao: Tempo de espera da requisição em segundos
+        """
+        medicao = _etapa_atual.get() or self._obter("http")
+        chave = str(status) if status is not None else "erro_conexao"
+        with self._lock:
+            medicao.requisicoes += 1
+            medicao.bytes += tamanho
+            medicao.tempo_http += duracao
+            medicao.status_http[chave] = medicao.status_http.get(chave, 0) + 1
+            if status is None or status >= 400:
+                medicao.erros += 1
+
+    def registrar_cache(self, acerto: bool) -> None:
+        """Registra um acerto (resposta servida do cache) ou falha de cache na etapa ativa"""
+        medicao = _etapa_atual.get() or self._obter("http")
+        with self._lock:
+            if acerto:
+                medicao.cache_acertos += 1
+            else:
+                medicao.cache_falhas += 1
+
+    def consultar(self, nome: str) -> Optional[MedicaoEtapa]:
+        """Medição acumulada da etapa, sem criá-la se ainda não existir"""
+        with self._lock:
+            return self._etapas.get(nome)
+
+    def tempo_http_total(self) -> float:
+        """Soma do tempo de espera em chamadas HTTP de todas as etapas"""
+        with self._lock:
+            return sum(m.tempo_http for m in self._etapas.values())
+
+    def resumo(self) -> Dict:
+        """Resumo de todas as etapas registradas"""
+        with self._lock:
+            return {
+                "run_id": log.run_id,
+                "inicio": self.inicio,
+                "duracao_total_s": round(time.time() - self.inicio, 6),
+                "etapas": {nome: m.to_dict() for nome, m in self._etapas.items()},
+            }
+
+    def exportar_json(self, caminho_arquivo: str) -> str:
+        """Salva o resumo da execução em JSON"""
+        os.makedirs(os.path.dirname(caminho_arquivo) or ".", exist_ok=True)
+        with open(caminho_arquivo, "w", encoding="utf-8") as f:
+            json.dump(self.resumo(), f, indent=2, ensure_ascii=False)
+        return caminho_arquivo
+
+    def exportar_prometheus(self, caminho_arquivo: str) -> str:
+        """
+        Salva as métricas no formato texto do Prometheus (textfile collector).
+        A escrita é atômica para não expor arquivos parciais ao coletor.
+        """
+        resumo = self.resumo()
+        linhas = [
+            "# TYPE reconciliacao_duracao_total_segundos gauge",
+            f"reconciliacao_duracao_total_segundos {resumo['duracao_total_s']}",
+        ]
+        series = (
+            ("etapa_duracao_segundos", "duracao_s"),
+            ("etapa_cpu_segundos", "cpu_s"),
+            ("etapa_itens", "itens"),
+            ("etapa_bytes", "bytes"),
+            ("etapa_requisicoes", "requisicoes"),
+            ("etapa_tempo_http_segundos", "tempo_http_s"),
+            ("etapa_erros", "erros"),
+            ("etapa_cache_acertos", "cache_acertos"),
+            ("etapa_cache_falhas", "cache_falhas"),
+        )
+        for metrica, chave in series:
+            linhas.append(f"# TYPE reconciliacao_{metrica} gauge")
+            for nome, dados in resumo["etapas"].items():
+                linhas.append(f'reconciliacao_{metrica}{{etapa="{nome}"}} {dados[chave]}')
+
+        linhas.append("# TYPE reconciliacao_etapa_status_http gauge")
+        for nome, dados in resumo["etapas"].items():
+            for status, total in dados["status_http"].items():
+                linhas.append(
+                    f'reconciliacao_etapa_status_http{{etapa="{nome}",status="{status}"}} {total}'
+                )
+
+        os.makedirs(os.path.dirname(caminho_arquivo) or ".", exist_ok=True)
+        temporario = caminho_arquivo + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            f.write("\n".join(linhas) + "\n")
+        os.replace(temporario, caminho_arquivo)
+        return caminho_arquivo
+
+
+# Instância única para o projeto todo
+metricas = Metricas()
@@ -0,0 +1,132 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from typing import Any, Callable, List, Tuple
+
+from utils.logger import log
+from utils.metrics import metricas
+
+
+def executar_com_perfil(
+    func: Callable[..., Any],
+    *args,
+    top_n: int = 30,
+    **kwargs
+) -> Tuple[Any, str]:
+    """
+    Executa uma função sob o cProfile e salva os resultados em logs/
+
+    Gera dois arquivos:
+      - perfil_<run_id>.prof: estatísticas completas (abrir com pstats/snakeviz)
+      - perfil_<run_id>.txt: resumo com tempo de parede, CPU, espera de I/O HTTP
+        e as top-N funções mais custosas
+
+    As threads criadas durante a execução (pools de páginas, filiais,
+    reverificação) ganham um perfil próprio, somado ao da thread principal.
+
+    Args:
+        func: Função a ser perfilada
+        *args: Argumentos posicionais da função
+        top_n: Quantidade de funções listadas no resumo
+        **kwargs: Argumentos nomeados da função
+
+    Returns:
+        Tupla com (retorno da função, caminho do resumo em texto)
+    """
+    profiler = cProfile.Profile()
+    perfis_threads: List[cProfile.Profile] = []
+    lock = threading.Lock()
+
+    def perfilar_thread(_frame, _evento, _arg):
+        # Chamado no primeiro evento de cada thread nova: troca este gancho pelo cProfile
+        sys.setprofile(None)
+        perfil = cProfile.Profile()
+        try:
+            perfil.enable()
+        except ValueError:
+            # Python 3.12+: o cProfile usa sys.monitoring e já acompanha todas as threads
+            return
+        with lock:
+            perfis_threads.append(perfil)
+
+    http_antes = metricas.tempo_http_total()
+    inicio_parede = time.perf_counter()
+    inicio_cpu = time.process_time()
+
+    threading.setprofile(perfilar_thread)
+    try:
+        retorno = profiler.runcall(func, *args, **kwargs)
+    finally:
+        threading.setprofile(None)
+        parede = time.perf_counter() - inicio_parede
+        cpu = time.process_time() - inicio_cpu
+        espera_http = metricas.tempo_http_total() - http_antes
+
+        estatisticas = pstats.Stats(profiler)
+        with lock:
+            for perfil in perfis_threads:
+                estatisticas.add(perfil)
+
+        arquivo_prof = os.path.join(log.log_dir, f"perfil_{log.run_id}.prof")
+        arquivo_txt = os.path.join(log.log_dir, f"perfil_{log.run_id}.txt")
+        estatisticas.dump_stats(arquivo_prof)
+
+        with open(arquivo_txt, "w", encoding="utf-8") as f:
+            f.write(_gerar_resumo(estatisticas, len(perfis_threads), parede, cpu, espera_http, top_n))
+
+        log.info(
+            f"🔬 Perfil salvo em {arquivo_prof} (resumo: {arquivo_txt})",
+            stage="profile",
+            duration=round(parede, 6),
+        )
+
+    return retorno, arquivo_txt
+
+
+def _gerar_resumo(
+    estatisticas: pstats.Stats,
+    threads: int,
+    parede: float,
+    cpu: float,
+    espera_http: float,
+    top_n: int
+) -> str:
+    """Monta o resumo textual do perfil (tempos globais, por etapa e top-N funções)"""
+    linhas = []
+    linhas.append("=" * 80)
+    linhas.append(f"PERFIL DA EXECUÇÃO {log.run_id}")
+    linhas.append("=" * 80)
+    linhas.append(f"  Tempo de parede:        {parede:10.3f}s")
+    linhas.append(f"  Tempo de CPU:           {cpu:10.3f}s")
+    # Soma das requisições de todas as threads: com buscas paralelas passa do tempo de parede
+    linhas.append(f"  HTTP (soma das threads):{espera_http:10.3f}s")
+    linhas.append(f"  Threads perfiladas:     {threads + 1:10d}")
+    linhas.append("  (os tempos das funções abaixo somam todas as threads)")
+    linhas.append("")
+
+    etapas = metricas.resumo()["etapas"]
+    if etapas:
+        linhas.append("POR ETAPA:")
+        linhas.append(f"  {'ETAPA':<16} | {'PAREDE':>10} | {'CPU':>10} | {'HTTP SOMA':>10} | {'ITENS':>8}")
+        linhas.append("-" * 80)
+        for nome, dados in etapas.items():
+            linhas.append(
+                f"  {nome:<16} | {dados['duracao_s']:>9.3f}s | {dados['cpu_s']:>9.3f}s | "
+                f"{dados['tempo_http_s']:>9.3f}s | {dados['itens']:>8}"
+            )
+        linhas.append("")
+
+    estatisticas.strip_dirs()
+    for titulo, ordem in (("TOP FUNÇÕES (TEMPO PRÓPRIO)", "tottime"),
+                          ("TOP FUNÇÕES (TEMPO ACUMULADO)", "cumulative")):
+        buffer = io.StringIO()
+        estatisticas.stream = buffer
+        estatisticas.sort_stats(ordem).print_stats(top_n)
+        linhas.append(f"{titulo}:")
+        linhas.append(buffer.getvalue())
+
+    return "\n".join(linhas)
@@ -0,0 +1,147 @@
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from utils.logger import log
+from utils.metrics import metricas
+from utils.rate_limiter import limitadores_ativos
+
+
+def _formatar_bytes(valor: float) -> str:
+    for unidade in ("B", "KB", "MB", "GB"):
+        if valor < 1024 or unidade == "GB":
+            return f"{valor:.0f} {unidade}" if unidade == "B" else f"{valor:.1f} {unidade}"
+        valor /= 1024
+    return f"{valor:.1f} GB"
+
+
+def _formatar_duracao(segundos: float) -> str:
+    segundos = int(segundos)
+    horas, resto = divmod(segundos, 3600)
+    minutos, segundos = divmod(resto, 60)
+    return f"{horas}:{minutos:02d}:{segundos:02d}" if horas else f"{minutos}:{segundos:02d}"
+
+
+class Progresso:
+    """
+    Progresso de uma etapa longa (páginas, itens/s, bytes/s, ETA e requisições em voo)
+
+    Os laços de busca só incrementam dois contadores por página (`avancar`);
+    bytes e requisições em voo são lidos de `metricas` e dos limitadores por
+    uma thread que redesenha a barra no terminal (stderr TTY) ou, sem
+    terminal, registra uma linha de log a cada PROGRESSO_INTERVALO segundos.
+    Desative com PROGRESSO=0.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ativo = False
+        self.nome = ""
+        self.total: Optional[int] = None
+        self.itens = 0
+        self.paginas = 0
+        self.inicio = 0.0
+        self._bytes_inicio = 0
+
+    def avancar(self, itens: int = 0, paginas: int = 1) -> None:
+        """Registra itens e páginas recebidos (sem efeito fora de `acompanhar`)"""
+        if not self._ativo:
+            return
+        with self._lock:
+            self.itens += itens
+            self.paginas += paginas
+
+    def adicionar_total(self, total: int) -> None:
+        """Soma o total esperado de itens (ex.: campo "total" da 1ª página de cada janela)"""
+        if not self._ativo:
+            return
+        with self._lock:
+            self.total = (self.total or 0) + total
+
+    @contextmanager
+    def acompanhar(self, nome: str, intervalo: Optional[float] = None):
+        """
+        Exibe o progresso da etapa `nome` enquanto o bloco executa
+
+        Args:
+            nome: Etapa de `metricas` de onde vêm os bytes (ex.: "payment_fetch")
+            intervalo: Segundos entre atualizações (padrão: 0.5 no terminal,
+                       PROGRESSO_INTERVALO ou 15 sem terminal)
+        """
+        if os.getenv("PROGRESSO", "1") == "0" or self._ativo:
+            yield self
+            return
+
+        terminal = sys.stderr.isatty()
+        if intervalo is None:
+            intervalo = 0.5 if terminal else float(os.getenv("PROGRESSO_INTERVALO", "15"))
+
+        medicao = metricas.consultar(nome)
+        with self._lock:
+            self.nome = nome
+            self.total = None
+            self.itens = self.paginas = 0
+            self.inicio = time.perf_counter()
+            self._bytes_inicio = medicao.bytes if medicao else 0
+            self._ativo = True
+
+        parar = threading.Event()
+        thread = threading.Thread(
+            target=self._exibir, args=(parar, intervalo, terminal), name="progresso", daemon=True
+        )
+        thread.start()
+        try:
+            yield self
+        finally:
+            parar.set()
+            thread.join()
+            self._ativo = False
+            if terminal:
+                sys.stderr.write("\r\033[K")
+                sys.stderr.flush()
+
+    def _exibir(self, parar: threading.Event, intervalo: float, terminal: bool) -> None:
+        while not parar.wait(intervalo):
+            texto = self.descrever(barra=terminal)
+            if terminal:
+                sys.stderr.write("\r\033[K" + texto)
+                sys.stderr.flush()
+            else:
+                log.info(texto, stage=self.nome, pages=self.paginas, items=self.itens)
+
+    def descrever(self, barra: bool = False) -> str:
+        """Linha de progresso atual (ex.: para log ou terminal)"""
+        with self._lock:
+            itens, paginas, total = self.itens, self.paginas, self.total
+        decorrido = max(time.perf_counter() - self.inicio, 1e-9)
+        medicao = metricas.consultar(self.nome)
+        bytes_recebidos = (medicao.bytes if medicao else 0) - self._bytes_inicio
+
+        partes = []
+        if total:
+            fracao = min(itens / total, 1.0)
+            if barra:
+                cheio = int(fracao * 20)
+                partes.append(f"▕{'█' * cheio}{'░' * (20 - cheio)}▏ {fracao:4.0%}")
+            partes.append(f"{itens}/{total} itens")
+        else:
+            partes.append(f"{itens} itens")
+        partes.append(f"{paginas} pág")
+        partes.append(f"{itens / decorrido:.0f} itens/s")
+        partes.append(f"{_formatar_bytes(bytes_recebidos / decorrido)}/s")
+        if total and itens:
+            restante = max(total - itens, 0) / (itens / decorrido)
+            partes.append(f"ETA {_formatar_duracao(restante)}")
+
+        em_voo = [f"{host} {em_uso}/{limite}" for host, (em_uso, limite) in limitadores_ativos().items() if em_uso]
+        if em_voo:
+            partes.append("em voo: " + ", ".join(em_voo))
+
+        return f"⏳ {self.nome} " + " · ".join(partes)
+
+
+# Instância única para o projeto todo
+progresso = Progresso()
@@ -0,0 +1,213 @@
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from utils.logger import log
+
+# Status que indicam sobrecarga do servidor
+STATUS_SOBRECARGA = (429, 503)
+
+# Teto da pausa após 429/503 (Retry-After maiores são limitados a isso)
+ESPERA_MAXIMA = 60.0
+
+
+def tempo_espera(retry_after: Optional[str], tentativa: int = 0) -> float:
+    """
+    Segundos de pausa após uma resposta 429/503
+
+    Args:
+        retry_after: Cabeçalho Retry-After (segundos ou data HTTP), se houver
+        tentativa: Tentativas já feitas da mesma requisição (backoff exponencial
+                   com jitter quando não há Retry-After: 1s, 2s, 4s...)
+
+    Returns:
+        Segundos de espera, no máximo ESPERA_MAXIMA
+    """
+    if retry_after:
+        try:
+            return min(max(float(retry_after), 0.0), ESPERA_MAXIMA)
+        except ValueError:
+            try:
+                data = parsedate_to_datetime(retry_after)
+                return min(max((data - datetime.now(timezone.utc)).total_seconds(), 0.0), ESPERA_MAXIMA)
+            except (TypeError, ValueError):
+                pass
+    return min(2.0 ** tentativa * (1 + random.random() * 0.25), ESPERA_MAXIMA)
+
+
+class TokenBucket:
+    """Limitador de taxa (requisições por segundo) com rajada limitada"""
+
+    def __init__(self, taxa: float, capacidade: Optional[float] = None):
+        """
+        Args:
+            taxa: Requisições por segundo permitidas em regime
+            capacidade: Tamanho máximo da rajada (padrão: igual à taxa)
+        """
+        self.taxa = taxa
+        self.capacidade = capacidade or max(taxa, 1.0)
+        self._tokens = self.capacidade
+        self._ultimo = time.monotonic()
+        self._pausado_ate = 0.0
+        self._lock = threading.Lock()
+
+    def adquirir(self) -> None:
+        """Bloqueia até haver um token disponível"""
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                self._tokens = min(self.capacidade, self._tokens + (agora - self._ultimo) * self.taxa)
+                self._ultimo = agora
+
+                if agora >= self._pausado_ate and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                espera = max(self._pausado_ate - agora, (1 - self._tokens) / self.taxa)
+            time.sleep(espera)
+
+    def pausar(self, segundos: float) -> None:
+        """Suspende a liberação de tokens (ex.: cabeçalho Retry-After)"""
+        with self._lock:
+            self._pausado_ate = max(self._pausado_ate, time.monotonic() + segundos)
+            self._tokens = 0
+
+
+class ControladorConcorrencia:
+    """
+    Limite de requisições simultâneas ajustado por AIMD:
+    cresce aditivamente enquanto a API responde bem e cai pela metade
+    em 429/503 ou picos de latência
+    """
+
+    def __init__(self, minimo: int = 1, maximo: int = 16, inicial: int = 2, fator_pico: float = 3.0):
+        self.minimo = minimo
+        self.maximo = maximo
+        self.fator_pico = fator_pico
+        self._limite = float(inicial)
+        self._em_uso = 0
+        self._latencia_media: Optional[float] = None
+        self._ultima_reducao = 0.0
+        self._condicao = threading.Condition()
+
+    @property
+    def limite(self) -> int:
+        return max(self.minimo, int(self._limite))
+
+    @property
+    def em_uso(self) -> int:
+        return self._em_uso
+
+    def adquirir(self) -> None:
+        with self._condicao:
+            while self._em_uso >= self.limite:
+                self._condicao.wait()
+            self._em_uso += 1
+
+    def liberar(self) -> None:
+        with self._condicao:
+            self._em_uso -= 1
+            self._condicao.notify_all()
+
+    def registrar(self, status: Optional[int], latencia: float) -> None:
+        """
+        Ajusta o limite a partir do resultado de uma requisição
+
+        Args:
+            status: Código HTTP (None em erro de conexão)
+            latencia: Duração da requisição em segundos
+        """
+        with self._condicao:
+            media = self._latencia_media
+            pico = media is not None and latencia > media * self.fator_pico
+            self._latencia_media = latencia if media is None else media * 0.8 + latencia * 0.2
+
+            if status is None or status in STATUS_SOBRECARGA or pico:
+                # Uma redução por janela de latência evita colapsar o limite em rajadas de erro
+                agora = time.monotonic()
+                if agora - self._ultima_reducao >= (self._latencia_media or 0):
+                    self._limite = max(float(self.minimo), self._limite / 2)
+                    self._ultima_reducao = agora
+            elif status < 400:
+                self._limite = min(float(self.maximo), self._limite + 1 / self._limite)
+
+            self._condicao.notify_all()
+
+
+class LimitadorUpstream:
+    """Token bucket + controle de concorrência de um upstream (host)"""
+
+    def __init__(self, nome: str, taxa: float, concorrencia_maxima: int):
+        self.nome = nome
+        self.bucket = TokenBucket(taxa)
+        self.controlador = ControladorConcorrencia(maximo=concorrencia_maxima)
+
+    @contextmanager
+    def slot(self):
+        """Reserva uma vaga de concorrência e um token antes da requisição"""
+        self.controlador.adquirir()
+        try:
+            self.bucket.adquirir()
+            yield
+        finally:
+            self.controlador.liberar()
+
+    def registrar(
+        self,
+        status: Optional[int],
+        latencia: float,
+        retry_after: Optional[str] = None,
+        tentativa: int = 0
+    ) -> None:
+        """
+        Ajusta concorrência e taxa a partir do resultado de uma requisição
+
+        Em 429/503 o bucket do host é pausado (Retry-After ou backoff pela
+        `tentativa`), então a nova tentativa e as demais requisições ao mesmo
+        upstream esperam juntas.
+        """
+        limite_anterior = self.controlador.limite
+        self.controlador.registrar(status, latencia)
+
+        if status in STATUS_SOBRECARGA:
+            self.bucket.pausar(tempo_espera(retry_after, tentativa))
+
+        if self.controlador.limite != limite_anterior:
+            log.debug(
+                f"Concorrência de {self.nome}: {limite_anterior} → {self.controlador.limite}",
+                stage="rate_limit",
+            )
+
+
+_limitadores: Dict[str, LimitadorUpstream] = {}
+_lock_limitadores = threading.Lock()
+
+
+def obter_limitador(url: str) -> LimitadorUpstream:
+    """
+    Retorna o limitador compartilhado do host da URL
+
+    A taxa e a concorrência máxima vêm de RATE_LIMIT_RPS e CONCORRENCIA_MAXIMA.
+    """
+    host = urlparse(url).netloc
+    with _lock_limitadores:
+        if host not in _limitadores:
+            _limitadores[host] = LimitadorUpstream(
+                host,
+                taxa=float(os.getenv("RATE_LIMIT_RPS", "10")),
+                concorrencia_maxima=int(os.getenv("CONCORRENCIA_MAXIMA", "8")),
+            )
+        return _limitadores[host]
+
+
+def limitadores_ativos() -> Dict[str, Tuple[int, int]]:
+    """Requisições em andamento e limite de concorrência atual por host"""
+    with _lock_limitadores:
+        limitadores = list(_limitadores.values())
+    return {l.nome: (l.controlador.em_uso, l.controlador.limite) for l in limitadores}
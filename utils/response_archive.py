@@ -0,0 +1,124 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from utils.logger import log
+
+
+class ArquivoRespostas:
+    """
+    Arquivo de respostas brutas das APIs, comprimido e endereçado por conteúdo
+
+    Estrutura em disco:
+        objetos/<sha[:2]>/<sha256>.gz   corpo da resposta (gzip), gravado uma única vez
+        execucoes/<run_id>.jsonl        manifesto da execução (uma linha por resposta)
+    """
+
+    def __init__(self, diretorio: str, run_id: str):
+        """
+        Args:
+            diretorio: Pasta raiz do arquivo
+            run_id: Identificador da execução (manifesto)
+        """
+        self.diretorio = diretorio
+        self.run_id = run_id
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(diretorio, "objetos"), exist_ok=True)
+        os.makedirs(os.path.join(diretorio, "execucoes"), exist_ok=True)
+
+    @property
+    def arquivo_manifesto(self) -> str:
+        return self._caminho_manifesto(self.diretorio, self.run_id)
+
+    @staticmethod
+    def _caminho_manifesto(diretorio: str, run_id: str) -> str:
+        return os.path.join(diretorio, "execucoes", f"{run_id}.jsonl")
+
+    @staticmethod
+    def _caminho_objeto(diretorio: str, sha: str) -> str:
+        return os.path.join(diretorio, "objetos", sha[:2], f"{sha}.gz")
+
+    def registrar(self, fonte: str, metodo: str, url: str, params: Optional[dict], corpo: bytes) -> str:
+        """
+        Arquiva o corpo de uma resposta e registra a entrada no manifesto
+
+        Args:
+            fonte: Origem dos dados ("maxpayment" ou "winthor")
+            metodo: Método HTTP
+            url: URL requisitada
+            params: Parâmetros de query
+            corpo: Corpo bruto da resposta
+
+        Returns:
+            Hash SHA-256 do conteúdo
+        """
+        sha = hashlib.sha256(corpo).hexdigest()
+        caminho = self._caminho_objeto(self.diretorio, sha)
+
+        if not os.path.exists(caminho):
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+            temporario = f"{caminho}.{threading.get_ident()}.tmp"
+            with gzip.open(temporario, "wb", compresslevel=6) as f:
+                f.write(corpo)
+            os.replace(temporario, caminho)
+
+        entrada = {
+            "ts": datetime.now().isoformat(),
+            "fonte": fonte,
+            "metodo": metodo.upper(),
+            "url": url,
+            "params": params or {},
+            "sha256": sha,
+            "bytes": len(corpo),
+        }
+        with self._lock, open(self.arquivo_manifesto, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+
+        return sha
+
+    @classmethod
+    def listar_entradas(cls, diretorio: str, run_id: str) -> List[Dict]:
+        """Lê o manifesto de uma execução arquivada"""
+        caminho = cls._caminho_manifesto(diretorio, run_id)
+        if not os.path.exists(caminho):
+            raise FileNotFoundError(f"Execução {run_id} não encontrada em {diretorio}")
+        with open(caminho, encoding="utf-8") as f:
+            return [json.loads(linha) for linha in f if linha.strip()]
+
+    @classmethod
+    def ler_corpo(cls, diretorio: str, sha: str) -> bytes:
+        """Lê o corpo arquivado a partir do hash"""
+        with gzip.open(cls._caminho_objeto(diretorio, sha), "rb") as f:
+            return f.read()
+
+    @classmethod
+    def ler_respostas(cls, diretorio: str, run_id: str, fonte: str) -> Iterator[bytes]:
+        """Corpos das respostas GET de uma fonte, na ordem em que foram recebidas"""
+        for entrada in cls.listar_entradas(diretorio, run_id):
+            if entrada["fonte"] == fonte and entrada["metodo"] == "GET":
+                yield cls.ler_corpo(diretorio, entrada["sha256"])
+
+
+def diretorio_padrao() -> str:
+    """Pasta padrão do arquivo de respostas (logs/arquivo)"""
+    return os.path.join(log.log_dir, "arquivo")
+
+
+# Arquivo ativo na execução atual (None = arquivamento desligado)
+_arquivo_ativo: Optional[ArquivoRespostas] = None
+
+
+def ativar_arquivo(run_id: Optional[str] = None, diretorio: Optional[str] = None) -> ArquivoRespostas:
+    """Liga o arquivamento das respostas para a execução atual"""
+    global _arquivo_ativo
+    _arquivo_ativo = ArquivoRespostas(diretorio or diretorio_padrao(), run_id or log.run_id)
+    log.info(f"🗄️  Arquivando respostas em {_arquivo_ativo.arquivo_manifesto}")
+    return _arquivo_ativo
+
+
+def obter_arquivo_ativo() -> Optional[ArquivoRespostas]:
+    return _arquivo_ativo
@@ -0,0 +1,90 @@
+import httpx
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from utils.logger import log
+
+
+def codificacoes_suportadas() -> str:
+    """Valor de Accept-Encoding com os formatos que o httpx consegue decodificar"""
+    codificacoes = ["gzip", "deflate"]
+    try:
+        import brotli  # noqa: F401
+        codificacoes.append("br")
+    except ImportError:
+        try:
+            import brotlicffi  # noqa: F401
+            codificacoes.append("br")
+        except ImportError:
+            pass
+    return ", ".join(codificacoes)
+
+
+class SessaoHttpx:
+    """
+    Transporte HTTP opcional baseado em httpx (HTTP/2 + gzip/br)
+
+    Usado quando HTTP_TRANSPORTE=httpx. Com HTTP/2 (negociado via ALPN em
+    conexões TLS), as requisições concorrentes de páginas e filiais para o
+    mesmo host são multiplexadas em uma única conexão. Expõe a mesma interface
+    de `requests.Session.request` usada pelo http_client: as respostas são
+    convertidas em requests.Response e os erros em exceções do requests, então
+    cache, circuit breaker e arquivo de respostas não mudam.
+
+    Requer: pip install "httpx[http2,brotli]"
+    """
+
+    def __init__(self, http2: bool = True, max_conexoes: int = 32):
+        """
+        Args:
+            http2: Habilita HTTP/2 (requer o pacote h2; sem TLS o httpx usa HTTP/1.1)
+            max_conexoes: Conexões simultâneas no pool (por host, com HTTP/1.1)
+        """
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                log.warning("Pacote h2 ausente: transporte httpx em HTTP/1.1")
+                http2 = False
+        self.http2 = http2
+        self._cliente = httpx.Client(
+            http2=http2,
+            limits=httpx.Limits(max_connections=max_conexoes, max_keepalive_connections=max_conexoes),
+            headers={"Accept-Encoding": codificacoes_suportadas()},
+        )
+
+    def request(self, metodo: str, url: str, allow_redirects: bool = True, **kwargs) -> requests.Response:
+        """
+        Executa a requisição e devolve um requests.Response equivalente
+
+        Args:
+            metodo: Método HTTP
+            url: URL completa
+            allow_redirects: Segue redirecionamentos, como o requests (follow_redirects no httpx)
+            **kwargs: Repassados ao httpx (params, headers, timeout, json, data...)
+
+        Raises:
+            requests.exceptions.Timeout: se o tempo limite estourar
+            requests.exceptions.ConnectionError: em falhas de conexão/protocolo
+        """
+        try:
+            resposta = self._cliente.request(metodo, url, follow_redirects=allow_redirects, **kwargs)
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e)) from e
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+
+        convertida = requests.Response()
+        convertida.status_code = resposta.status_code
+        convertida._content = resposta.content
+        convertida.headers = CaseInsensitiveDict(resposta.headers)
+        convertida.url = str(resposta.url)
+        convertida.reason = resposta.reason_phrase
+        convertida.encoding = resposta.encoding
+        convertida.elapsed = resposta.elapsed
+        # Bytes efetivamente trafegados (comprimidos), usados nas métricas
+        convertida.bytes_recebidos = resposta.num_bytes_downloaded
+        return convertida
+
+    def close(self) -> None:
+        self._cliente.close()